@@ -2,6 +2,8 @@
 ASGI config for core project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
+Production only runs it for the live proctoring monitor (Procfile `monitor`); the
+web process serves assessments.wsgi.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/5.1/howto/deployment/asgi/
@@ -12,5 +14,6 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'assessments.settings')
+os.environ.setdefault('DJANGO_ASGI', '1')  # read by assessments/db.py
 
 application = get_asgi_application()
@@ -0,0 +1,81 @@
+"""
+Database profile, built from the environment by settings.py.
+
+DATABASE_URL picks the engine. Render provides its PostgreSQL URL; without one the app
+runs on the local db.sqlite3.
+
+PostgreSQL
+    Connections are persistent (DATABASE_CONN_MAX_AGE seconds, default 60) and health
+    checked before reuse, so a request does not pay for a new connection and TLS handshake.
+    DATABASE_POOL=1 switches to psycopg's connection pool instead, sized by
+    DATABASE_POOL_MIN_SIZE / DATABASE_POOL_MAX_SIZE per process. Django requires
+    CONN_MAX_AGE = 0 with a pool, since the pool owns connection lifetime.
+
+    Under ASGI (assessments/asgi.py sets DJANGO_ASGI=1) the default is CONN_MAX_AGE = 0:
+    each request's sync code runs in its own thread, so per-thread persistent connections
+    are rarely reused and pile up against the server's connection limit. Use
+    DATABASE_POOL=1 to reuse connections there.
+
+SQLite (local runs)
+    WAL journal, so readers don't block the writer, plus a busy timeout
+    (SQLITE_BUSY_TIMEOUT seconds) and BEGIN IMMEDIATE transactions. Concurrent writers
+    then queue for the lock instead of failing with "database is locked".
+
+DATABASE_REPLICA_URL adds a read replica for reporting traffic (assessments/db_routers.py).
+
+`python manage.py benchmark_answer_saves` measures the answer-save endpoints under
+whichever profile is active.
+"""
+import os
+
+import dj_database_url
+
+
+def _env_int(name, default):
+    return int(os.environ.get(name, default))
+
+
+def _default_conn_max_age():
+    return 0 if os.environ.get("DJANGO_ASGI") == "1" else 60
+
+
+def database_config(default_url, env="DATABASE_URL"):
+    """DATABASES entry for the URL in `env` (or `default_url`); None when neither is set."""
+    url = os.environ.get(env) or default_url
+    if not url:
+        return None
+    config = dj_database_url.parse(
+        url,
+        conn_max_age=_env_int("DATABASE_CONN_MAX_AGE", _default_conn_max_age()),
+        conn_health_checks=True,
+    )
+    engine = config["ENGINE"]
+    options = config.setdefault("OPTIONS", {})
+
+    if engine == "django.db.backends.sqlite3":
+        options.update({
+            "timeout": _env_int("SQLITE_BUSY_TIMEOUT", 20),
+            "transaction_mode": "IMMEDIATE",
+            "init_command": "PRAGMA journal_mode=WAL; PRAGMA synchronous=NORMAL;",
+        })
+    elif engine == "django.db.backends.postgresql" and os.environ.get("DATABASE_POOL", "0") == "1":
+        config["CONN_MAX_AGE"] = 0
+        config["CONN_HEALTH_CHECKS"] = False
+        options["pool"] = {
+            "min_size": _env_int("DATABASE_POOL_MIN_SIZE", 2),
+            "max_size": _env_int("DATABASE_POOL_MAX_SIZE", 10),
+            "timeout": _env_int("DATABASE_POOL_TIMEOUT", 10),
+        }
+    return config
+
+
+def describe(config):
+    """One-line summary of a DATABASES entry (no credentials), for logs and the benchmark."""
+    engine = config["ENGINE"].rsplit(".", 1)[-1]
+    options = config.get("OPTIONS", {})
+    if engine == "sqlite3":
+        return f"sqlite3 {config['NAME']} (busy timeout {options.get('timeout')}s, {options.get('transaction_mode', 'DEFERRED')})"
+    if "pool" in options:
+        pool = options["pool"]
+        return f"{engine} {config.get('HOST')}/{config.get('NAME')} (pool {pool['min_size']}-{pool['max_size']})"
+    return f"{engine} {config.get('HOST')}/{config.get('NAME')} (CONN_MAX_AGE {config.get('CONN_MAX_AGE')})"
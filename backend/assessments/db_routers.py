@@ -0,0 +1,107 @@
+"""
+Read-replica routing for reporting and admin traffic.
+
+When DATABASE_REPLICA_URL is set, settings.py adds a "replica" alias. Reads run there only
+inside a reporting context: admin GET pages (changelists, including the heartbeat
+monitor), the admin export actions and ScoreReportByEmailAPIView. The candidate flow
+(answer saves, session start/resume, proctoring) never enters that context, so it always
+reads and writes the primary and does not compete with report queries.
+
+Read-your-writes: a write pins the rest of the request to the primary. An admin request
+that wrote also sets a short-lived cookie (REPLICA_STICKY_SECONDS), which keeps that
+browser on the primary until the replica has caught up. Auth, session, admin-log and
+content-type tables are never read from the replica, so a fresh login does not look
+logged out. Without a replica alias everything runs on "default" and these helpers do
+nothing.
+"""
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+
+
+REPLICA_ALIAS = "replica"
+PRIMARY_ONLY_APPS = {"auth", "sessions", "admin", "contenttypes"}
+PIN_COOKIE = "db_primary_pin"
+
+_reporting = ContextVar("reporting_reads", default=False)
+_pinned = ContextVar("pinned_to_primary", default=False)
+
+
+def replica_configured():
+    return REPLICA_ALIAS in settings.DATABASES
+
+
+@contextmanager
+def reporting_reads():
+    """Send reads in this block to the replica (unless the request has already written)."""
+    token = _reporting.set(True)
+    try:
+        yield
+    finally:
+        _reporting.reset(token)
+
+
+def replica_iter(iterable):
+    """Keep reporting reads on while a streaming response is consumed after the view returned."""
+    iterator = iter(iterable)
+    while True:
+        with reporting_reads():
+            try:
+                item = next(iterator)
+            except StopIteration:
+                return
+        yield item
+
+
+def pinned_to_primary():
+    return _pinned.get()
+
+
+def pin_to_primary():
+    _pinned.set(True)
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        if (
+            _reporting.get()
+            and not _pinned.get()
+            and model._meta.app_label not in PRIMARY_ONLY_APPS
+            and replica_configured()
+        ):
+            return REPLICA_ALIAS
+        return "default"
+
+    def db_for_write(self, model, **hints):
+        pin_to_primary()
+        return "default"
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True  # same data on both aliases
+
+
+class ReplicaRoutingMiddleware:
+    """Reporting context for admin GETs; cross-request stickiness after an admin write."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not replica_configured():
+            return self.get_response(request)
+
+        pin_token = _pinned.set(PIN_COOKIE in request.COOKIES)
+        admin = request.path.startswith("/admin/")
+        reporting_token = _reporting.set(admin and request.method in ("GET", "HEAD"))
+        try:
+            response = self.get_response(request)
+            if admin and _pinned.get():
+                response.set_cookie(
+                    PIN_COOKIE, "1", max_age=getattr(settings, "REPLICA_STICKY_SECONDS", 10),
+                    httponly=True, samesite="Lax",
+                )
+            return response
+        finally:
+            _reporting.reset(reporting_token)
+            _pinned.reset(pin_token)
@@ -0,0 +1,8 @@
+"""URLs of the live monitor process (LIVE_MONITOR_ONLY=1): the event stream and nothing else."""
+from django.urls import path
+
+from proctoring.live import live_monitor
+
+urlpatterns = [
+    path("api/proctoring/live-monitor/<int:test_id>/", live_monitor, name="live-monitor"),
+]
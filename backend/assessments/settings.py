@@ -11,14 +11,22 @@ https://docs.djangoproject.com/en/5.1/ref/settings/
 """
 import os
 from pathlib import Path
-import dj_database_url
+from .db import database_config
 
 BASE_DIR = Path(__file__).resolve().parent.parent
 DEBUG = False
 
+# DATABASE_URL (Render PostgreSQL) or the local SQLite file; see assessments/db.py for
+# persistent connections, the optional pool and the SQLite WAL/busy-timeout profile.
 DATABASES = {
-    'default': dj_database_url.config(default='sqlite:///' + str(BASE_DIR / 'db.sqlite3'))
+    'default': database_config('sqlite:///' + str(BASE_DIR / 'db.sqlite3'))
 }
+# Optional read replica for admin pages, exports and score reports (assessments/db_routers.py).
+if os.environ.get('DATABASE_REPLICA_URL'):
+    DATABASES['replica'] = database_config(None, env='DATABASE_REPLICA_URL')
+DATABASE_ROUTERS = ['assessments.db_routers.ReplicaRouter']
+# Seconds an admin browser keeps reading the primary after it wrote something.
+REPLICA_STICKY_SECONDS = 10
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 
 
@@ -36,7 +44,7 @@ SECRET_KEY = 'django-insecure-)phccw#5^(roi6zo(=19kyb4gk4khb1)@f6_n6md3iet@ca2*l
 # SECURITY WARNING: don't run with debug turned on in production!
 DEBUG = True
 
-ALLOWED_HOSTS = ['localhost', '127.0.0.1', 'shreds-platform.onrender.com']
+ALLOWED_HOSTS = ['localhost', '127.0.0.1', 'shreds-platform.onrender.com', 'shreds-live-monitor.onrender.com']
 
 
 
@@ -66,6 +74,7 @@ MIDDLEWARE = [
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'assessments.db_routers.ReplicaRoutingMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -93,15 +102,7 @@ WSGI_APPLICATION = 'assessments.wsgi.application'
 
 
 
-# Database
-# https://docs.djangoproject.com/en/5.1/ref/settings/#databases
-
-DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
-    }
-}
+# Database: configured at the top of this file from DATABASE_URL (assessments/db.py).
 
 
 # Password validation
@@ -166,6 +167,7 @@ CORS_ALLOWED_ORIGIN_REGEXES = [
     r"^http:\/\/localhost:3000$",
     r"^https:\/\/temp-test-platform\.vercel\.app$",
     r"^https:\/\/temp-test-platform\.shredsindia\.org$",
+    r"^https:\/\/shreds-platform\.onrender\.com$",  # admin live monitor page → monitor host
 ]
 
 
@@ -176,3 +178,57 @@ MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
 
 STATICFILES_STORAGE = 'whitenoise.storage.CompressedManifestStaticFilesStorage'
+
+
+# Write-behind buffer for per-question autosaves (test_engine/utils/answer_buffer.py).
+# Buffers live in the worker process: only enable when a candidate's requests
+# are served by a single process (e.g. one gunicorn worker with threads).
+ANSWER_WRITE_BEHIND = os.environ.get("ANSWER_WRITE_BEHIND", "0") == "1"
+ANSWER_FLUSH_INTERVAL_SECONDS = int(os.environ.get("ANSWER_FLUSH_INTERVAL_SECONDS", "2"))
+
+# Number of compiled answer keys kept per process (test_engine/utils/compiled_test.py).
+COMPILED_TEST_CACHE_SIZE = 64
+
+# Score report generation runs in `python manage.py run_report_jobs`.
+# Set REPORT_JOBS_EAGER=1 to generate reports inline when no worker is running.
+REPORT_JOBS_EAGER = os.environ.get("REPORT_JOBS_EAGER", "0") == "1"
+
+# Section deadlines are also enforced by `python manage.py run_section_timer`
+# (test_engine/utils/section_timer.py), this long after the deadline so in-flight autosaves land.
+SECTION_TIMER_GRACE_SECONDS = 10
+
+# Processes used by `manage.py export_answer_sheets` to render evaluated answer sheets
+# (test_engine/utils/answer_sheets.py). Unset → min(4, CPU count); 1 renders inline.
+# The admin action always renders inline.
+ANSWER_SHEET_EXPORT_WORKERS = int(os.environ.get("ANSWER_SHEET_EXPORT_WORKERS", "0")) or None
+
+# Proctoring heartbeats are coalesced in memory and written in bulk (proctoring/utils/heartbeats.py).
+HEARTBEAT_FLUSH_INTERVAL_SECONDS = int(os.environ.get("HEARTBEAT_FLUSH_INTERVAL_SECONDS", "5"))
+HEARTBEAT_SESSION_TTL_SECONDS = 60
+# Repeats of the same violation type this close together are stored as one event
+# (proctoring/utils/violations.py); keep in sync with VIOLATION_MERGE_WINDOW_MS in frontend/utils/api.js.
+VIOLATION_MERGE_WINDOW_SECONDS = 2
+
+# Live proctoring monitor (proctoring/live.py). It runs in its own ASGI process (Procfile
+# `monitor`) with LIVE_MONITOR_ONLY=1, which routes nothing but the event stream; the rest of
+# the app stays on WSGI, where streamed exports are not buffered in full.
+if os.environ.get("LIVE_MONITOR_ONLY") == "1":
+    ROOT_URLCONF = "assessments.monitor_urls"
+LIVE_MONITOR_KEEPALIVE_SECONDS = 15
+LIVE_MONITOR_QUEUE_SIZE = 500
+# How long publishers trust their last check for a listening monitor process.
+LIVE_MONITOR_PRESENCE_SECONDS = 5
+# Origin of the monitor process ("" = this host, e.g. locally under uvicorn) and how long a
+# stream token issued by the admin page stays valid for opening a stream.
+LIVE_MONITOR_URL = os.environ.get("LIVE_MONITOR_URL", "")
+LIVE_MONITOR_TOKEN_SECONDS = 60
+
+# Proctoring photo uploads (proctoring/utils/photos.py): size cap used when the test's own
+# limit is not known before parsing, and the thumbnail worker pool.
+PROCTORING_UPLOAD_MAX_MB = 10
+PHOTO_THUMBNAIL_WORKERS = int(os.environ.get("PHOTO_THUMBNAIL_WORKERS", "2"))
+# Periodic screen captures within this many dHash bits of the previous one reuse its file
+# (proctoring/utils/capture_store.py); -1 keeps every frame that is not byte-identical.
+SCREEN_CAPTURE_DEDUP_DISTANCE = 4
+# check_ready caches each test's proctoring config this long (the admin invalidates on edit).
+PROCTORING_CONFIG_CACHE_SECONDS = 60
@@ -1,7 +1,15 @@
 from django.contrib import admin
+from django.http import JsonResponse
+from django.shortcuts import get_object_or_404
+from django.template.response import TemplateResponse
+from django.urls import path, reverse
 from django.utils.html import format_html
 from django.utils import timezone
-from django.db.models import Sum, Max
+from django.db.models import OuterRef, Subquery
+
+from test_engine.models import Test
+from .live import stream_url
+from .utils import readiness
 
 
 from .models import (
@@ -11,24 +19,72 @@ from .models import (
     CandidateConsent,
     ProctoringViolation,
     ProctoringHeartbeat,
+    LiveProctoringStatus,
+    ProctoringRetentionPolicy,
+    ProctoringViolationSummary,
 )
-from test_engine.models import CandidateTestSession
+
+def _capture_preview(url, thumbnail_url, taken_at, ok=None):
+    """Thumbnail linking to the full capture; plain link while the thumbnail is pending."""
+    title = timezone.localtime(taken_at).strftime('%H:%M:%S') if taken_at else ""
+    status = "" if ok is None else (" ✅" if ok else " ❌")
+    if thumbnail_url:
+        return format_html(
+            '<a href="{0}" target="_blank"><img src="{1}" height="50" title="{2}" /></a>{3}',
+            url, thumbnail_url, title, status
+        )
+    return format_html('<a href="{0}" target="_blank" title="{1}">🖼️ open</a>{2}', url, title, status)
+
 
 @admin.register(IDDocumentType)
 class IDDocumentTypeAdmin(admin.ModelAdmin):
     list_display = ('id', 'name', 'description')
     search_fields = ('name',)
 
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        readiness.invalidate_config()  # names are part of every cached requirements block
+
+    def delete_model(self, request, obj):
+        super().delete_model(request, obj)
+        readiness.invalidate_config()
+
+    def delete_queryset(self, request, queryset):
+        super().delete_queryset(request, queryset)
+        readiness.invalidate_config()
+
 @admin.register(TestProctoringConfig)
 class TestProctoringConfigAdmin(admin.ModelAdmin):
     list_display = ('test', 'require_face_photo', 'require_signature_photo')
     filter_horizontal = ('allowed_id_documents',)
 
+    # check_ready caches the config per test (proctoring/utils/readiness.py)
+    def save_related(self, request, form, formsets, change):
+        super().save_related(request, form, formsets, change)  # after allowed_id_documents
+        readiness.invalidate_config(form.instance.test_id)
+
+    def delete_model(self, request, obj):
+        super().delete_model(request, obj)
+        readiness.invalidate_config(obj.test_id)
+
+    def delete_queryset(self, request, queryset):
+        test_ids = list(queryset.values_list('test_id', flat=True))
+        super().delete_queryset(request, queryset)
+        for test_id in test_ids:
+            readiness.invalidate_config(test_id)
+
 @admin.register(ProctoringPhoto)
 class ProctoringPhotoAdmin(admin.ModelAdmin):
-    list_display = ('candidate', 'test_assignment', 'photo_type', 'created_at', 'quality_self_declared', 'quality_flagged_by_admin')
+    list_display = ('candidate', 'test_assignment', 'photo_type', 'preview', 'created_at', 'quality_self_declared', 'quality_flagged_by_admin')
     list_filter = ('photo_type', 'quality_flagged_by_admin')
     search_fields = ('candidate__name',)
+    list_select_related = ('candidate', 'test_assignment__candidate', 'test_assignment__test')
+
+    def preview(self, obj):
+        if obj.archive_name:
+            return format_html('<span title="{0}">🗄️ archived</span>', obj.archive_name)
+        return _capture_preview(obj.image.url, obj.thumbnail.url if obj.thumbnail else None, obj.created_at)
+    preview.short_description = "Photo"
 
 @admin.register(CandidateConsent)
 class CandidateConsentAdmin(admin.ModelAdmin):
@@ -69,87 +125,119 @@ class ProctoringHeartbeatAdmin(admin.ModelAdmin):
         return obj.assignment.test.name
     get_test_name.short_description = "Test"
 
+    def get_queryset(self, request):
+        # Everything the changelist shows comes from the live status projection
+        # (proctoring/utils/live_status.py): one query per page, whatever the page size.
+        live = LiveProctoringStatus.objects.filter(assignment_id=OuterRef("assignment_id"))
+        return super().get_queryset(request).select_related(
+            "assignment__candidate", "assignment__test"
+        ).annotate(
+            live_attempt=Subquery(live.values("attempt_number")[:1]),
+            live_violations=Subquery(live.values("violation_count")[:1]),
+            live_severity=Subquery(live.values("severity_total")[:1]),
+            live_fullscreen_ok=Subquery(live.values("fullscreen_ok")[:1]),
+            live_fullscreen_exit_time=Subquery(live.values("fullscreen_exit_time")[:1]),
+        )
+
     def get_attempt_number(self, obj):
-        session = CandidateTestSession.objects.filter(assignment=obj.assignment).order_by('-attempt_number').first()
-        return session.attempt_number if session else "-"
+        return obj.live_attempt if obj.live_attempt is not None else "-"
     get_attempt_number.short_description = "Attempt #"
 
     def get_violation_count(self, obj):
-        session = CandidateTestSession.objects.filter(assignment=obj.assignment).order_by('-attempt_number').first()
-        if not session:
-            return "-"
-
-        end_time = session.sectionstatus_set.aggregate(max_end=Max("submitted_at"))['max_end'] or timezone.now()
-
-        return ProctoringViolation.objects.filter(
-            assignment=obj.assignment,
-            attempt_number=session.attempt_number,
-            timestamp__gte=session.started_at,
-            timestamp__lte=end_time
-        ).count()
+        return obj.live_violations if obj.live_violations is not None else "-"
+    get_violation_count.short_description = "Violations"
 
     def formatted_last_seen(self, obj):
         return timezone.localtime(obj.last_seen).strftime('%b %d, %Y, %I:%M %p') if obj.last_seen else "-"
     formatted_last_seen.short_description = "Last Seen"
 
     def fullscreen_status(self, obj):
-        session = CandidateTestSession.objects.filter(assignment=obj.assignment).order_by('-attempt_number').first()
-        if not session:
-            return "-"
-
-        heartbeat = ProctoringHeartbeat.objects.filter(
-            assignment=obj.assignment,
-            attempt_number=session.attempt_number
-        ).order_by('-last_seen').first()
-
-        if not heartbeat:
+        if obj.live_fullscreen_ok is None:
             return "-"
 
-        if not heartbeat.fullscreen_ok:
-            if heartbeat.fullscreen_exit_time:
-                return f"❌ Exited @ {timezone.localtime(heartbeat.fullscreen_exit_time).strftime('%H:%M:%S')}"
+        if not obj.live_fullscreen_ok:
+            if obj.live_fullscreen_exit_time:
+                return f"❌ Exited @ {timezone.localtime(obj.live_fullscreen_exit_time).strftime('%H:%M:%S')}"
             return "❌"
 
-        if heartbeat.fullscreen_exit_time:
-            return f"✅ Resumed after {timezone.localtime(heartbeat.last_seen).strftime('%H:%M:%S')}"
+        if obj.live_fullscreen_exit_time:
+            return f"✅ Resumed after {timezone.localtime(obj.last_seen).strftime('%H:%M:%S')}"
 
         return "✅"
     fullscreen_status.short_description = "Fullscreen"
 
     def face_photo_preview(self, obj):
         if obj.last_face_photo_url:
-            return format_html(
-                '<a href="{0}" target="_blank"><img src="{0}" height="50" title="{1}" /></a>{2}',
-                obj.last_face_photo_url,
-                timezone.localtime(obj.last_face_timestamp).strftime('%H:%M:%S') if obj.last_face_timestamp else "",
-                " ✅" if obj.last_face_capture_ok else " ❌"
-            )
+            return _capture_preview(obj.last_face_photo_url, obj.last_face_thumbnail_url, obj.last_face_timestamp, obj.last_face_capture_ok)
         return "-"
     face_photo_preview.short_description = "Face"
 
     def screen_photo_preview(self, obj):
         if obj.last_screen_photo_url:
-            return format_html(
-                '<a href="{0}" target="_blank"><img src="{0}" height="50" title="{1}" /></a>{2}',
-                obj.last_screen_photo_url,
-                timezone.localtime(obj.last_screen_timestamp).strftime('%H:%M:%S') if obj.last_screen_timestamp else "",
-                " ✅" if obj.last_screen_ok else " ❌"
-            )
+            return _capture_preview(obj.last_screen_photo_url, obj.last_screen_thumbnail_url, obj.last_screen_timestamp, obj.last_screen_ok)
         return "-"
     screen_photo_preview.short_description = "Screen"
 
     def get_severity_score(self, obj):
-        session = CandidateTestSession.objects.filter(assignment=obj.assignment).order_by('-attempt_number').first()
-        if not session:
-            return obj.severity_score
+        return obj.live_severity if obj.live_severity is not None else obj.severity_score
+    get_severity_score.short_description = "Severity"
+
 
-        end_time = session.sectionstatus_set.filter(
-            submitted_at__isnull=False
-        ).aggregate(max_end=Max("submitted_at"))['max_end']
+@admin.register(LiveProctoringStatus)
+class LiveProctoringStatusAdmin(admin.ModelAdmin):
+    list_display = [
+        'assignment', 'attempt_number', 'candidate_status', 'violation_count', 'severity_total',
+        'fullscreen_ok', 'screen_ok', 'last_seen', 'updated_at', 'monitor_link',
+    ]
+    list_filter = ['candidate_status', 'fullscreen_ok', 'screen_ok']
+    list_select_related = ['assignment__candidate', 'assignment__test']
+    search_fields = ['assignment__candidate__name', 'assignment__candidate__email']
+    ordering = ['-severity_total']
+
+    def get_urls(self):
+        urls = super().get_urls()
+        custom_urls = [
+            path('monitor/<int:test_id>/', self.admin_site.admin_view(self.monitor_view), name='proctoring-live-monitor'),
+            path(
+                'monitor/<int:test_id>/stream-url/', self.admin_site.admin_view(self.stream_url_view),
+                name='proctoring-live-monitor-url',
+            ),
+        ]
+        return custom_urls + urls
+
+    def monitor_link(self, obj):
+        return format_html(
+            '<a class="button" href="{}">Live monitor</a>',
+            reverse('admin:proctoring-live-monitor', args=[obj.assignment.test_id]),
+        )
+    monitor_link.short_description = 'Monitor'
+
+    def monitor_view(self, request, test_id):
+        """Live table for one test, fed by the server-sent event stream (proctoring/live.py)."""
+        test = get_object_or_404(Test, pk=test_id)
+        return TemplateResponse(request, 'admin/proctoring/live_monitor.html', {
+            **self.admin_site.each_context(request),
+            'title': f'Live monitor: {test.name}',
+            'test': test,
+            'stream_url_endpoint': reverse('admin:proctoring-live-monitor-url', args=[test.id]),
+        })
+
+    def stream_url_view(self, request, test_id):
+        # fetched on every (re)connect, so the short-lived token is always fresh
+        return JsonResponse({'url': stream_url(request.user, test_id)})
+
+
+@admin.register(ProctoringRetentionPolicy)
+class ProctoringRetentionPolicyAdmin(admin.ModelAdmin):
+    list_display = [
+        'test', 'downsample_after_days', 'downsample_interval_minutes', 'periodic_keep_days',
+        'violation_rollup_days', 'archive_after_days',
+    ]
 
-        return ProctoringViolation.objects.filter(
-            assignment=obj.assignment,
-            timestamp__gte=session.started_at,
-            timestamp__lte=end_time or timezone.now()
-        ).aggregate(score=Sum("severity"))['score'] or 0
 
+@admin.register(ProctoringViolationSummary)
+class ProctoringViolationSummaryAdmin(admin.ModelAdmin):
+    list_display = ['assignment', 'attempt_number', 'violation_type', 'event_count', 'severity_total', 'first_at', 'last_at']
+    list_filter = ['violation_type']
+    list_select_related = ['assignment__candidate', 'assignment__test']
+    search_fields = ['assignment__candidate__name']
@@ -0,0 +1,102 @@
+"""
+Live proctoring monitor: a server-sent events stream per test, for staff.
+
+GET /api/proctoring/live-monitor/<test_id>/?token=... first sends a
+`snapshot` event with the test's LiveProctoringStatus rows, then every event published
+through proctoring/utils/live_events.py for that test: `heartbeats`, `violations`,
+`capture`, `section_submitted` and `test_completed`. Idle streams get a comment line
+every LIVE_MONITOR_KEEPALIVE_SECONDS so proxies keep them open.
+
+Served by the separate ASGI `monitor` process (see Procfile) on its own host
+(LIVE_MONITOR_URL); under WSGI a stream would pin a worker thread. The admin session cookie
+does not reach that host, so the admin page (LiveProctoringStatusAdmin → "Live monitor")
+asks for a stream URL carrying a signed token that names the staff user and the test and
+expires after LIVE_MONITOR_TOKEN_SECONDS. The token is only checked when the stream
+opens; a page reconnecting fetches a new one. A staff session on the same host still works
+without a token. Locally, `uvicorn assessments.asgi:application` serves the whole app
+including the monitor.
+"""
+import asyncio
+import json
+
+from urllib.parse import urlencode
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core import signing
+from django.core.handlers.asgi import ASGIRequest
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import HttpResponse, HttpResponseForbidden, StreamingHttpResponse
+from django.urls import reverse
+
+from .models import LiveProctoringStatus
+from .utils import live_events
+
+
+TOKEN_SALT = "proctoring.live-monitor"
+
+
+def stream_url(user, test_id):
+    """Stream URL for `user` (staff) on the monitor host, with a fresh signed token."""
+    token = signing.dumps({"user": user.pk, "test": int(test_id)}, salt=TOKEN_SALT)
+    base = getattr(settings, "LIVE_MONITOR_URL", "").rstrip("/")
+    return f"{base}{reverse('live-monitor', args=[test_id])}?{urlencode({'token': token})}"
+
+
+def _token_user(token, test_id):
+    try:
+        grant = signing.loads(token, salt=TOKEN_SALT, max_age=getattr(settings, "LIVE_MONITOR_TOKEN_SECONDS", 60))
+    except signing.BadSignature:  # also raised for expired tokens
+        return None
+    if grant.get("test") != int(test_id):
+        return None
+    return get_user_model().objects.filter(pk=grant.get("user"), is_active=True).first()
+
+
+def _snapshot(test_id):
+    return list(
+        LiveProctoringStatus.objects.filter(assignment__test_id=test_id).values(
+            "assignment_id", "assignment__candidate__name", "assignment__candidate__email",
+            "attempt_number", "candidate_status", "violation_count", "severity_total",
+            "fullscreen_ok", "fullscreen_exit_time", "screen_ok", "last_seen",
+            "attempt_started_at", "test_completed_at",
+        )
+    )
+
+
+def _sse(event_type, data):
+    return f"event: {event_type}\ndata: {json.dumps(data, cls=DjangoJSONEncoder)}\n\n"
+
+
+async def _stream(test_id, subscription):
+    keepalive = getattr(settings, "LIVE_MONITOR_KEEPALIVE_SECONDS", 15)
+    try:
+        yield _sse("snapshot", await sync_to_async(_snapshot)(test_id))
+        while True:
+            try:
+                event = await asyncio.wait_for(subscription.queue.get(), timeout=keepalive)
+            except asyncio.TimeoutError:
+                yield ": keepalive\n\n"
+                continue
+            if event["type"] == "resync":
+                yield _sse("snapshot", await sync_to_async(_snapshot)(test_id))
+            else:
+                yield _sse(event["type"], event)
+    finally:
+        live_events.unsubscribe(subscription)
+
+
+async def live_monitor(request, test_id):
+    token = request.GET.get("token")
+    user = await sync_to_async(_token_user)(token, test_id) if token else await request.auser()
+    if user is None or not user.is_staff:
+        return HttpResponseForbidden("Staff only")
+    if not isinstance(request, ASGIRequest):
+        return HttpResponse("The live monitor needs the ASGI server", status=501)
+
+    subscription = live_events.subscribe(test_id)
+    response = StreamingHttpResponse(_stream(test_id, subscription), content_type="text/event-stream")
+    response["Cache-Control"] = "no-cache"
+    response["X-Accel-Buffering"] = "no"
+    return response
@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from proctoring.utils.retention import apply_retention
+
+
+class Command(BaseCommand):
+    help = "Down-sample, expire, roll up and archive old proctoring media and events per test retention policy"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--test", type=int, action="append", help="Only this test (repeatable)")
+
+    def handle(self, *args, **options):
+        stats = apply_retention(options["test"])
+        for key in ("photos_deleted", "files_deleted", "violations_rolled_up", "violation_summaries",
+                    "photos_archived", "archives_written"):
+            self.stdout.write(f"  {key.replace('_', ' ')}: {stats[key]}")
+        self.stdout.write(self.style.SUCCESS("✅ Retention applied"))
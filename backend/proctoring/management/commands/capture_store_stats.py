@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+
+from proctoring.models import ProctoringPhoto
+from proctoring.utils.capture_store import savings
+
+
+class Command(BaseCommand):
+    help = "Report how much storage capture deduplication saves, overall or for one test"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--test", type=int, help="Only captures of this test")
+
+    def handle(self, *args, **options):
+        queryset = ProctoringPhoto.objects.all()
+        if options["test"]:
+            queryset = queryset.filter(test_assignment__test_id=options["test"])
+        stats = savings(queryset)
+        self.stdout.write(
+            f"📸 {stats['captures']} capture(s) stored as {stats['stored_files']} file(s), "
+            f"{stats['duplicates']} duplicate(s)"
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f"💾 {stats['stored_bytes'] / 1e6:.1f} MB on disk for {stats['logical_bytes'] / 1e6:.1f} MB of captures "
+            f"({stats['saved_ratio']:.0%} saved)"
+        ))
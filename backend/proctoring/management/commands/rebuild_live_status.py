@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from proctoring.utils.live_status import rebuild_live_status
+
+
+class Command(BaseCommand):
+    help = "Recompute the live proctoring status rows from sessions, violations and heartbeats"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--assignment", type=int, action="append", help="Only this assignment (repeatable)")
+
+    def handle(self, *args, **options):
+        written = rebuild_live_status(options["assignment"])
+        self.stdout.write(self.style.SUCCESS(f"✅ Rebuilt {written} live status row(s)"))
@@ -0,0 +1,34 @@
+# Generated by Django 5.1.7 on 2026-10-17 22:26
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('proctoring', '0012_proctoringheartbeat_created_at'),
+        ('test_engine', '0021_sessionscorestate'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LiveProctoringStatus',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('attempt_number', models.IntegerField(default=1)),
+                ('attempt_started_at', models.DateTimeField(blank=True, null=True)),
+                ('test_completed_at', models.DateTimeField(blank=True, null=True)),
+                ('candidate_status', models.CharField(default='in_progress', max_length=20)),
+                ('violation_count', models.IntegerField(default=0)),
+                ('severity_total', models.IntegerField(default=0)),
+                ('fullscreen_ok', models.BooleanField(default=True)),
+                ('fullscreen_exit_time', models.DateTimeField(blank=True, null=True)),
+                ('screen_ok', models.BooleanField(default=True)),
+                ('last_seen', models.DateTimeField(blank=True, null=True)),
+                ('updated_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('assignment', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='live_status', to='test_engine.testassignment')),
+            ],
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.1.7 on 2026-10-17 22:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('proctoring', '0013_liveproctoringstatus'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='proctoringheartbeat',
+            name='last_face_thumbnail_url',
+            field=models.URLField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='proctoringheartbeat',
+            name='last_screen_thumbnail_url',
+            field=models.URLField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='proctoringphoto',
+            name='thumbnail',
+            field=models.ImageField(blank=True, null=True, upload_to='proctoring_photos/thumbs/'),
+        ),
+    ]
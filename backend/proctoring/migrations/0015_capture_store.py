@@ -0,0 +1,44 @@
+# Generated by Django 5.1.7 on 2026-10-17 22:33
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('proctoring', '0014_photo_thumbnails'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='proctoringphoto',
+            name='duplicate_of',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='duplicates', to='proctoring.proctoringphoto'),
+        ),
+        migrations.AddField(
+            model_name='proctoringphoto',
+            name='phash',
+            field=models.CharField(blank=True, default='', max_length=16),
+        ),
+        migrations.AddField(
+            model_name='proctoringphoto',
+            name='sha256',
+            field=models.CharField(blank=True, db_index=True, default='', max_length=64),
+        ),
+        migrations.AddField(
+            model_name='proctoringphoto',
+            name='size_bytes',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AlterField(
+            model_name='proctoringphoto',
+            name='image',
+            field=models.ImageField(max_length=255, upload_to='proctoring_photos/'),
+        ),
+        migrations.AlterField(
+            model_name='proctoringphoto',
+            name='thumbnail',
+            field=models.ImageField(blank=True, max_length=255, null=True, upload_to='proctoring_photos/thumbs/'),
+        ),
+    ]
@@ -0,0 +1,49 @@
+# Generated by Django 5.1.7 on 2026-10-17 22:35
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('proctoring', '0015_capture_store'),
+        ('test_engine', '0021_sessionscorestate'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='proctoringphoto',
+            name='archive_name',
+            field=models.CharField(blank=True, default='', max_length=255),
+        ),
+        migrations.CreateModel(
+            name='ProctoringRetentionPolicy',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('downsample_after_days', models.PositiveIntegerField(default=7)),
+                ('downsample_interval_minutes', models.PositiveIntegerField(default=10)),
+                ('periodic_keep_days', models.PositiveIntegerField(default=90)),
+                ('violation_rollup_days', models.PositiveIntegerField(default=30)),
+                ('archive_after_days', models.PositiveIntegerField(default=180)),
+                ('test', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='retention_policy', to='test_engine.test')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='ProctoringViolationSummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('attempt_number', models.IntegerField(default=1)),
+                ('violation_type', models.CharField(choices=[('camera_lost', 'Camera Feed Lost'), ('camera_capture_failed', 'Camera Capture Failed'), ('screen_lost', 'Screen Share Lost'), ('screen_capture_failed', 'Screen Capture Failed'), ('fullscreen_exit', 'Fullscreen Exited'), ('face_mismatch', 'Face Mismatch'), ('multiple_faces', 'Multiple Faces'), ('no_face', 'No Face Detected'), ('keyboard_activity', 'Prohibited Keyboard Activity'), ('tab_switch', 'Tab Switch or Blur'), ('right_click', 'Right Click Detected'), ('other', 'Other')], max_length=64)),
+                ('event_count', models.IntegerField(default=0)),
+                ('severity_total', models.IntegerField(default=0)),
+                ('max_severity', models.IntegerField(default=0)),
+                ('first_at', models.DateTimeField()),
+                ('last_at', models.DateTimeField()),
+                ('assignment', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='test_engine.testassignment')),
+            ],
+            options={
+                'unique_together': {('assignment', 'attempt_number', 'violation_type')},
+            },
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 5.1.7 on 2026-10-17 22:36
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('proctoring', '0016_retention'),
+        ('test_engine', '0022_hot_path_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='proctoringheartbeat',
+            index=models.Index(fields=['assignment', 'attempt_number', 'created_at'], name='proctoring__assignm_702502_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='proctoringphoto',
+            index=models.Index(fields=['candidate', 'test_assignment', 'photo_type', 'context'], name='proctoring__candida_b79f61_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='proctoringphoto',
+            index=models.Index(fields=['test_assignment', 'photo_type', 'context'], name='proctoring__test_as_3f7b7a_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='proctoringviolation',
+            index=models.Index(fields=['assignment', 'attempt_number', 'timestamp'], name='proctoring__assignm_bc336a_idx'),
+        ),
+    ]
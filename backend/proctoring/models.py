@@ -89,11 +89,25 @@ class ProctoringPhoto(models.Model):
     candidate = models.ForeignKey(Candidate, on_delete=models.CASCADE)
     test_assignment = models.ForeignKey(TestAssignment, on_delete=models.CASCADE)
     id_document_type = models.ForeignKey(IDDocumentType, null=True, blank=True, on_delete=models.SET_NULL)
-    image = models.ImageField(upload_to='proctoring_photos/')
+    image = models.ImageField(upload_to='proctoring_photos/', max_length=255)
+    thumbnail = models.ImageField(upload_to='proctoring_photos/thumbs/', max_length=255, blank=True, null=True)
+    # Capture store (proctoring/utils/capture_store.py): rows may share one stored file
+    sha256 = models.CharField(max_length=64, blank=True, default='', db_index=True)
+    phash = models.CharField(max_length=16, blank=True, default='')
+    size_bytes = models.PositiveIntegerField(blank=True, null=True)
+    duplicate_of = models.ForeignKey('self', null=True, blank=True, on_delete=models.SET_NULL, related_name='duplicates')
+    # Set once the file was moved into a per-assignment archive; `image` is then the member name
+    archive_name = models.CharField(max_length=255, blank=True, default='')
     created_at = models.DateTimeField(auto_now_add=True)
     quality_self_declared = models.BooleanField(default=False)
     quality_flagged_by_admin = models.BooleanField(default=False)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=["candidate", "test_assignment", "photo_type", "context"]),  # check_ready
+            models.Index(fields=["test_assignment", "photo_type", "context"]),  # capture store, retention
+        ]
+
     def __str__(self):
         return f"{self.candidate.name} - {self.photo_type}"
 
@@ -131,6 +145,9 @@ class ProctoringViolation(models.Model):
     timestamp = models.DateTimeField(auto_now_add=True)
     metadata = models.JSONField(null=True, blank=True)
 
+    class Meta:
+        indexes = [models.Index(fields=["assignment", "attempt_number", "timestamp"])]
+
     def __str__(self):
         return f"{self.assignment_id} - {self.violation_type} @ {self.timestamp.strftime('%H:%M:%S')}"
 
@@ -145,10 +162,12 @@ class ProctoringHeartbeat(models.Model):
     last_face_photo_url = models.URLField(blank=True, null=True)
     last_face_timestamp = models.DateTimeField(blank=True, null=True)
     last_face_capture_ok = models.BooleanField(default=True)
+    last_face_thumbnail_url = models.URLField(blank=True, null=True)
 
     last_screen_photo_url = models.URLField(blank=True, null=True)
     last_screen_timestamp = models.DateTimeField(blank=True, null=True)
     last_screen_ok = models.BooleanField(default=True)
+    last_screen_thumbnail_url = models.URLField(blank=True, null=True)
 
     fullscreen_ok = models.BooleanField(default=True)
     fullscreen_exit_time = models.DateTimeField(blank=True, null=True)
@@ -166,6 +185,13 @@ class ProctoringHeartbeat(models.Model):
     test_started_at = models.DateTimeField(blank=True, null=True)
     test_completed_at = models.DateTimeField(blank=True, null=True)
 
+    total_heartbeat_polls = models.IntegerField(default=0)
+    total_fullscreen_exits = models.IntegerField(default=0)
+    total_camera_failures = models.IntegerField(default=0)
+    total_screen_failures = models.IntegerField(default=0)
+
+    class Meta:
+        indexes = [models.Index(fields=["assignment", "attempt_number", "created_at"])]
 
     def update_face_capture(self, url, ok=True):
         self.last_face_photo_url = url
@@ -195,8 +221,67 @@ class ProctoringHeartbeat(models.Model):
         self.save(update_fields=["candidate_status", "test_started_at", "last_seen"])
 
     def mark_completed(self):
+        from .utils.state import mark_heartbeat_completed
         self.candidate_status = 'completed'
         self.test_completed_at = timezone.now()
-        self.save(update_fields=["candidate_status", "test_completed_at", "last_seen"])
+        mark_heartbeat_completed(self.assignment_id, self.attempt_number, self.test_completed_at)
+
+
+class LiveProctoringStatus(models.Model):
+    """
+    One row per assignment describing its current attempt, kept up to date by the
+    session start, heartbeat and violation write paths (proctoring/utils/live_status.py).
+    Violation counters cover the current attempt from its start until completion.
+    """
+    assignment = models.OneToOneField('test_engine.TestAssignment', on_delete=models.CASCADE, related_name='live_status')
+    attempt_number = models.IntegerField(default=1)
+    attempt_started_at = models.DateTimeField(blank=True, null=True)
+    test_completed_at = models.DateTimeField(blank=True, null=True)
+    candidate_status = models.CharField(max_length=20, default='in_progress')
+
+    violation_count = models.IntegerField(default=0)
+    severity_total = models.IntegerField(default=0)
+    fullscreen_ok = models.BooleanField(default=True)
+    fullscreen_exit_time = models.DateTimeField(blank=True, null=True)
+    screen_ok = models.BooleanField(default=True)
+    last_seen = models.DateTimeField(blank=True, null=True)
 
+    updated_at = models.DateTimeField(default=timezone.now)
 
+    def __str__(self):
+        return f"Live status: {self.assignment_id} (attempt {self.attempt_number})"
+
+
+class ProctoringRetentionPolicy(models.Model):
+    """
+    How long a test's proctoring media and raw events are kept, applied by
+    `manage.py apply_retention` (proctoring/utils/retention.py). Tests without a policy
+    use the field defaults.
+    """
+    test = models.OneToOneField(Test, on_delete=models.CASCADE, related_name='retention_policy')
+    downsample_after_days = models.PositiveIntegerField(default=7)
+    downsample_interval_minutes = models.PositiveIntegerField(default=10)
+    periodic_keep_days = models.PositiveIntegerField(default=90)  # initial and violation photos stay
+    violation_rollup_days = models.PositiveIntegerField(default=30)
+    archive_after_days = models.PositiveIntegerField(default=180)
+
+    def __str__(self):
+        return f"Retention policy for {self.test.name}"
+
+
+class ProctoringViolationSummary(models.Model):
+    """Raw violation events of one attempt and type, rolled up by the retention engine."""
+    assignment = models.ForeignKey(TestAssignment, on_delete=models.CASCADE)
+    attempt_number = models.IntegerField(default=1)
+    violation_type = models.CharField(max_length=64, choices=ProctoringViolation.VIOLATION_TYPES)
+    event_count = models.IntegerField(default=0)
+    severity_total = models.IntegerField(default=0)
+    max_severity = models.IntegerField(default=0)
+    first_at = models.DateTimeField()
+    last_at = models.DateTimeField()
+
+    class Meta:
+        unique_together = ('assignment', 'attempt_number', 'violation_type')
+
+    def __str__(self):
+        return f"{self.assignment_id} attempt {self.attempt_number}: {self.violation_type} x{self.event_count}"
@@ -0,0 +1,65 @@
+from rest_framework.test import APITestCase
+from django.utils import timezone
+from proctoring.models import ProctoringHeartbeat
+from proctoring.utils import heartbeats
+from test_engine.models import Candidate, Test, TestAssignment, CandidateTestSession
+
+
+class TestHeartbeatIngestion(APITestCase):
+    url = "/api/proctoring/update-heartbeat/"
+
+    def setUp(self):
+        heartbeats.flush_heartbeats()
+        self.test = Test.objects.create(name="Proctored", total_duration_minutes=30)
+        self.assignments = []
+        for i in range(3):
+            candidate = Candidate.objects.create(name=f"C{i}", email=f"c{i}@example.com")
+            assignment = TestAssignment.objects.create(candidate=candidate, test=self.test)
+            CandidateTestSession.objects.create(assignment=assignment, started_at=timezone.now())
+            self.assignments.append(assignment)
+            heartbeats.forget_attempt(assignment.id)  # ids are reused between tests
+
+    def beat(self, assignment, **data):
+        return self.client.post(self.url, {"assignment_id": assignment.id, "screen_ok": True, **data}, format="json")
+
+    def test_beats_do_not_write_until_flushed(self):
+        for assignment in self.assignments:
+            self.beat(assignment)  # warms the active-attempt lookup
+
+        with self.assertNumQueries(0):
+            for _ in range(5):
+                for assignment in self.assignments:
+                    self.assertEqual(self.beat(assignment).status_code, 200)
+        self.assertFalse(ProctoringHeartbeat.objects.exists())
+
+        self.beat(self.assignments[0], screen_ok=False, fullscreen_ok=False)
+        self.assertEqual(heartbeats.flush_heartbeats(), 3)
+
+        rows = {hb.assignment_id: hb for hb in ProctoringHeartbeat.objects.all()}
+        self.assertEqual(len(rows), 3)
+        self.assertEqual(rows[self.assignments[1].id].total_heartbeat_polls, 6)
+        self.assertEqual(rows[self.assignments[0].id].total_heartbeat_polls, 7)
+        self.assertFalse(rows[self.assignments[0].id].last_screen_ok)
+        self.assertFalse(rows[self.assignments[0].id].fullscreen_ok)
+        self.assertFalse(CandidateTestSession.objects.get(assignment=self.assignments[0]).screen_ok)
+
+        # second round lands on the same rows, with the counts added
+        self.beat(self.assignments[1])
+        heartbeats.flush_heartbeats()
+        self.assertEqual(ProctoringHeartbeat.objects.count(), 3)
+        self.assertEqual(ProctoringHeartbeat.objects.get(assignment=self.assignments[1]).total_heartbeat_polls, 7)
+
+    def test_flush_cost_is_constant(self):
+        for assignment in self.assignments:
+            self.beat(assignment)
+        heartbeats.flush_heartbeats()
+        for assignment in self.assignments:
+            self.beat(assignment)
+        # sessions, heartbeats, two bulk updates, live rows (none here) (+ savepoint pair)
+        with self.assertNumQueries(7):
+            heartbeats.flush_heartbeats()
+
+    def test_unknown_or_completed_session(self):
+        CandidateTestSession.objects.filter(assignment=self.assignments[2]).update(completed=True)
+        self.assertEqual(self.beat(self.assignments[2]).status_code, 404)
+        self.assertEqual(self.client.post(self.url, {"screen_ok": True}, format="json").status_code, 400)
@@ -0,0 +1,114 @@
+import asyncio
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from proctoring.utils import heartbeats, live_events
+from proctoring.utils.violations import record_violations
+from test_engine.models import Candidate, Test, TestAssignment, CandidateTestSession
+
+
+class TestLiveMonitor(TestCase):
+    def setUp(self):
+        heartbeats.flush_heartbeats()
+        self.test = Test.objects.create(name="Proctored", total_duration_minutes=30)
+        candidate = Candidate.objects.create(name="C", email="c@example.com")
+        self.assignment = TestAssignment.objects.create(candidate=candidate, test=self.test)
+        CandidateTestSession.objects.create(assignment=self.assignment, started_at=timezone.now())
+        heartbeats.forget_attempt(self.assignment.id)
+        self.loop = asyncio.new_event_loop()
+        self.addCleanup(self.loop.close)
+
+    def subscribe(self, test_id):
+        async def _subscribe():
+            return live_events.subscribe(test_id)
+        subscription = self.loop.run_until_complete(_subscribe())
+        self.addCleanup(live_events.unsubscribe, subscription)
+        return subscription
+
+    def next_event(self, subscription):
+        return self.loop.run_until_complete(asyncio.wait_for(subscription.queue.get(), timeout=1))
+
+    def test_events_reach_subscribers_of_the_test_after_commit(self):
+        subscription = self.subscribe(self.test.id)
+        other = self.subscribe(self.test.id + 1)
+
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            record_violations(self.assignment.id, [
+                {"type": "tab_switch", "severity": 2, "metadata": {}, "timestamp": timezone.now()},
+            ])
+            heartbeats.record_heartbeat(self.assignment.id, 1, screen_ok=True)
+            heartbeats.flush_heartbeats()
+        self.assertEqual(len(callbacks), 2)
+
+        violations = self.next_event(subscription)
+        self.assertEqual(violations["type"], "violations")
+        self.assertEqual(violations["data"]["assignment_id"], self.assignment.id)
+        self.assertEqual(violations["data"]["events"][0]["type"], "tab_switch")
+        beats = self.next_event(subscription)
+        self.assertEqual(beats["type"], "heartbeats")
+        self.assertEqual([row["assignment_id"] for row in beats["data"]], [self.assignment.id])
+        self.assertTrue(other.queue.empty())
+
+    def test_slow_subscriber_is_told_to_resync(self):
+        with self.settings(LIVE_MONITOR_QUEUE_SIZE=2):
+            subscription = self.subscribe(self.test.id)
+        with self.captureOnCommitCallbacks(execute=True):
+            for _ in range(3):
+                live_events.publish(self.test.id, "capture", {"assignment_id": self.assignment.id})
+        self.assertEqual(self.next_event(subscription)["type"], "resync")
+        self.assertTrue(subscription.queue.empty())
+
+    def test_nothing_is_published_without_subscribers(self):
+        with self.captureOnCommitCallbacks() as callbacks:
+            record_violations(self.assignment.id, [
+                {"type": "tab_switch", "severity": 2, "metadata": {}, "timestamp": timezone.now()},
+            ])
+        self.assertEqual(callbacks, [])
+
+    @mock.patch.object(live_events, "_uses_notify", return_value=True)
+    def test_postgres_publishes_only_while_a_monitor_listens(self, _):
+        live_events._presence = (float("-inf"), False)
+        with mock.patch.object(live_events, "_listener_present", return_value=False) as present:
+            self.assertFalse(live_events.publishing_enabled())
+            self.assertFalse(live_events.publishing_enabled())
+            self.assertEqual(present.call_count, 1)  # cached for the presence interval
+
+            with self.settings(LIVE_MONITOR_PRESENCE_SECONDS=0):
+                present.return_value = True
+                self.assertTrue(live_events.publishing_enabled())
+        live_events._presence = (float("-inf"), False)
+
+    def test_stream_is_staff_only(self):
+        url = reverse("live-monitor", args=[self.test.id])
+        self.assertEqual(self.client.get(url).status_code, 403)
+        admin = get_user_model().objects.create_superuser("admin", "admin@example.com", "pw")
+        self.client.force_login(admin)
+        self.assertEqual(self.client.get(url).status_code, 501)  # test client is WSGI
+
+    @override_settings(LIVE_MONITOR_URL="https://monitor.example.com")
+    def test_admin_page_hands_out_signed_stream_urls(self):
+        admin = get_user_model().objects.create_superuser("admin", "admin@example.com", "pw")
+        self.client.force_login(admin)
+        self.assertContains(
+            self.client.get(reverse("admin:proctoring-live-monitor", args=[self.test.id])), "EventSource"
+        )
+        stream = self.client.get(reverse("admin:proctoring-live-monitor-url", args=[self.test.id])).json()["url"]
+        self.assertTrue(stream.startswith(f"https://monitor.example.com/api/proctoring/live-monitor/{self.test.id}/?token="))
+
+        # the monitor host sees no session cookie: the token alone must identify staff
+        self.client.logout()
+        path = stream.removeprefix("https://monitor.example.com")
+        self.assertEqual(self.client.get(path).status_code, 501)  # authorized; test client is WSGI
+        other_test = reverse("live-monitor", args=[self.test.id + 1]) + "?" + path.split("?")[1]
+        self.assertEqual(self.client.get(other_test).status_code, 403)
+        self.assertEqual(self.client.get(path + "tampered").status_code, 403)
+        with self.settings(LIVE_MONITOR_TOKEN_SECONDS=-1):
+            self.assertEqual(self.client.get(path).status_code, 403)  # expired
+
+    @override_settings(ROOT_URLCONF="assessments.monitor_urls")
+    def test_monitor_process_serves_only_the_stream(self):
+        self.assertEqual(reverse("live-monitor", args=[self.test.id]), f"/api/proctoring/live-monitor/{self.test.id}/")
+        self.assertEqual(self.client.get("/api/report/").status_code, 404)
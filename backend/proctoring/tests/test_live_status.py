@@ -0,0 +1,73 @@
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APITestCase
+from proctoring.models import LiveProctoringStatus, ProctoringHeartbeat
+from proctoring.utils import heartbeats, live_status
+from proctoring.utils.violations import record_violations
+from test_engine.models import Candidate, Test, TestAssignment, CandidateTestSession
+
+
+class TestLiveStatus(APITestCase):
+    def setUp(self):
+        heartbeats.flush_heartbeats()
+        self.test = Test.objects.create(name="Proctored", total_duration_minutes=30)
+        self.admin = get_user_model().objects.create_superuser("admin", "admin@example.com", "pw")
+
+    def add_candidate(self, i):
+        candidate = Candidate.objects.create(name=f"C{i}", email=f"c{i}@example.com")
+        assignment = TestAssignment.objects.create(candidate=candidate, test=self.test)
+        CandidateTestSession.objects.create(assignment=assignment, started_at=timezone.now())
+        heartbeats.forget_attempt(assignment.id)
+        live_status.start_attempt(assignment.id, 1)
+        now = timezone.now()
+        record_violations(assignment.id, [
+            {"type": "tab_switch", "severity": 2, "metadata": {}, "timestamp": now},
+            {"type": "fullscreen_exit", "severity": 1, "metadata": {}, "timestamp": now},
+        ])
+        heartbeats.record_heartbeat(assignment.id, 1, screen_ok=False)
+        return assignment
+
+    def test_write_paths_keep_row_current(self):
+        assignment = self.add_candidate(0)
+        heartbeats.flush_heartbeats()
+
+        row = LiveProctoringStatus.objects.get(assignment=assignment)
+        self.assertEqual((row.violation_count, row.severity_total), (2, 3))
+        self.assertFalse(row.fullscreen_ok)
+        self.assertFalse(row.screen_ok)
+        self.assertIsNotNone(row.last_seen)
+
+        ProctoringHeartbeat.objects.get(assignment=assignment).mark_completed()
+        record_violations(assignment.id, [
+            {"type": "tab_switch", "severity": 5, "metadata": {}, "timestamp": timezone.now()}
+        ], attempt_number=1)
+        row.refresh_from_db()
+        self.assertEqual(row.candidate_status, "completed")
+        self.assertEqual(row.violation_count, 2)  # window closed at completion
+
+        LiveProctoringStatus.objects.all().delete()
+        live_status.rebuild_live_status()
+        self.assertEqual(LiveProctoringStatus.objects.get(assignment=assignment).violation_count, 3)
+
+    def test_changelist_queries_do_not_grow_with_rows(self):
+        self.client.force_login(self.admin)
+        counts = []
+        for batch in (range(0, 2), range(2, 12)):
+            for i in batch:
+                self.add_candidate(i)
+            heartbeats.flush_heartbeats()
+            with CaptureQueriesContext(connection) as ctx:
+                self.assertEqual(self.client.get("/admin/proctoring/proctoringheartbeat/").status_code, 200)
+            counts.append(len(ctx.captured_queries))
+        self.assertEqual(counts[0], counts[1])
+
+    def test_monitoring_api_is_staff_only(self):
+        self.add_candidate(0)
+        self.assertIn(self.client.get("/api/proctoring/live-status/").status_code, (401, 403))
+
+        self.client.force_authenticate(self.admin)
+        response = self.client.get("/api/proctoring/live-status/", {"test_id": self.test.id})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data[0]["severity_total"], 3)
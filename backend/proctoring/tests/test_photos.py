@@ -0,0 +1,123 @@
+import shutil
+import tempfile
+from datetime import timedelta
+from io import BytesIO
+
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import override_settings
+from django.utils import timezone
+from PIL import Image
+from rest_framework.test import APITestCase
+from proctoring.models import ProctoringPhoto, ProctoringHeartbeat, TestProctoringConfig
+from proctoring.utils import capture_store, photos, readiness
+from proctoring.utils.retention import apply_retention
+from test_engine.models import Candidate, Test, TestAssignment
+
+
+def png(width, height, stripe=None):
+    image = Image.new("RGB", (width, height), (200, 30, 30))
+    if stripe:
+        image.paste((20, 20, 220), stripe)
+    out = BytesIO()
+    image.save(out, "PNG")
+    return SimpleUploadedFile("capture.png", out.getvalue(), content_type="image/png")
+
+
+class TestPhotoUpload(APITestCase):
+    def setUp(self):
+        self.media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media, ignore_errors=True)
+        override = override_settings(MEDIA_ROOT=self.media)
+        override.enable()
+        self.addCleanup(override.disable)
+
+        readiness.invalidate_config()
+        self.test = Test.objects.create(name="Proctored", total_duration_minutes=30)
+        TestProctoringConfig.objects.create(
+            test=self.test, consent_text="ok", max_upload_size_mb=1, quality_profile="low"
+        )
+        self.candidate = Candidate.objects.create(name="C", email="c@example.com")
+        self.assignment = TestAssignment.objects.create(candidate=self.candidate, test=self.test)
+
+    def upload(self, image, photo_type="face"):
+        return self.client.post(f"/api/proctoring/upload-photo/?assignment_id={self.assignment.id}", {
+            "candidate_id": self.candidate.id,
+            "assignment_id": self.assignment.id,
+            "photo_type": photo_type,
+            "context": "periodic",
+            "image": image,
+        }, format="multipart")
+
+    def test_oversized_upload_is_rejected_while_streaming(self):
+        blob = SimpleUploadedFile("big.jpg", b"\xff" * (1024 * 1024 + 1), content_type="image/jpeg")
+        response = self.upload(blob)
+        self.assertEqual(response.status_code, 413)
+        self.assertFalse(ProctoringPhoto.objects.exists())
+
+    def test_capture_is_reencoded_and_thumbnailed(self):
+        with self.captureOnCommitCallbacks() as callbacks:
+            response = self.upload(png(3000, 2000))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(callbacks), 1)  # thumbnail queued, not made in the request
+
+        photo = ProctoringPhoto.objects.get()
+        self.assertFalse(photo.thumbnail)
+        with Image.open(photo.image.path) as stored:
+            self.assertEqual((stored.format, max(stored.size)), ("JPEG", photos.QUALITY_PROFILES["low"][0]))
+
+        photos.make_thumbnail(photo.id)
+        photo.refresh_from_db()
+        with Image.open(photo.thumbnail.path) as thumb:
+            self.assertLessEqual(max(thumb.size), max(photos.THUMBNAIL_SIZE))
+        heartbeat = ProctoringHeartbeat.objects.get(assignment=self.assignment)
+        self.assertEqual(heartbeat.last_face_thumbnail_url, photo.thumbnail.url)
+
+    def test_unreadable_image_is_rejected(self):
+        response = self.upload(SimpleUploadedFile("x.jpg", b"not an image", content_type="image/jpeg"))
+        self.assertEqual(response.status_code, 400)
+
+    def test_repeated_screen_captures_share_one_file(self):
+        self.upload(png(800, 600, stripe=(0, 0, 400, 600)), "screen")
+        self.upload(png(800, 600, stripe=(0, 0, 400, 600)), "screen")  # identical
+        self.upload(png(800, 600, stripe=(0, 0, 401, 600)), "screen")  # near-identical
+        self.upload(png(800, 600, stripe=(400, 0, 800, 600)), "screen")  # different screen
+
+        first, exact, near, changed = ProctoringPhoto.objects.order_by("id")
+        self.assertIsNone(first.duplicate_of_id)
+        self.assertEqual((exact.duplicate_of_id, exact.image.name), (first.id, first.image.name))
+        self.assertEqual((near.duplicate_of_id, near.image.name), (first.id, first.image.name))
+        self.assertIsNone(changed.duplicate_of_id)
+        self.assertNotEqual(changed.image.name, first.image.name)
+
+        stats = capture_store.savings()
+        self.assertEqual((stats["captures"], stats["stored_files"], stats["duplicates"]), (4, 2, 2))
+        self.assertEqual(stats["saved_bytes"], exact.size_bytes + near.size_bytes)
+
+    def test_near_duplicates_are_measured_against_the_stored_frame(self):
+        def row(phash, duplicate_of=None):
+            return ProctoringPhoto.objects.create(
+                candidate=self.candidate, test_assignment=self.assignment, photo_type="screen",
+                context="periodic", image="proctoring_photos/cas/00/frame.jpg", phash=phash,
+                duplicate_of=duplicate_of,
+            )
+
+        stored = row("0000000000000000")
+        row("000000000000000f", duplicate_of=stored)  # 4 bits from the stored frame
+        pending = ProctoringPhoto(test_assignment=self.assignment, photo_type="screen", context="periodic")
+        self.assertEqual(capture_store._near_duplicate(pending, "00000000000000f0"), stored)
+        # 4 bits from the last duplicate, but 8 from the frame it would be stored as
+        self.assertIsNone(capture_store._near_duplicate(pending, "00000000000000ff"))
+
+    def test_archived_capture_is_not_reused(self):
+        self.upload(png(64, 64))
+        ProctoringPhoto.objects.update(context="initial")  # kept long-term, so it gets archived
+        apply_retention(now=timezone.now() + timedelta(days=400))
+        archived = ProctoringPhoto.objects.get()
+        self.assertTrue(archived.archive_name)
+
+        self.upload(png(64, 64))
+        photo = ProctoringPhoto.objects.exclude(id=archived.id).get()
+        self.assertIsNone(photo.duplicate_of_id)
+        self.assertNotEqual(photo.image.name, archived.image.name)
+        self.assertTrue(default_storage.exists(photo.image.name))
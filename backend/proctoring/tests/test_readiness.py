@@ -0,0 +1,72 @@
+from django.contrib.auth import get_user_model
+from rest_framework.test import APITestCase
+from proctoring.models import CandidateConsent, IDDocumentType, ProctoringPhoto, TestProctoringConfig
+from proctoring.utils import readiness
+from test_engine.models import Candidate, Test, TestAssignment
+
+
+class TestCheckReady(APITestCase):
+    def setUp(self):
+        readiness.invalidate_config()
+        self.test = Test.objects.create(name="Proctored", total_duration_minutes=30)
+        self.config = TestProctoringConfig.objects.create(
+            test=self.test, consent_text="I agree", require_signature_photo=True
+        )
+        self.passport = IDDocumentType.objects.create(name="Passport")
+        self.config.allowed_id_documents.add(self.passport)
+        self.candidate = Candidate.objects.create(name="C", email="c@example.com")
+        self.assignment = TestAssignment.objects.create(candidate=self.candidate, test=self.test)
+
+    def check(self):
+        return self.client.get("/api/proctoring/check-ready/", {
+            "assignment_id": self.assignment.id, "candidate_id": self.candidate.id,
+        })
+
+    def add_photo(self, photo_type, context="initial"):
+        ProctoringPhoto.objects.create(
+            candidate=self.candidate, test_assignment=self.assignment,
+            photo_type=photo_type, context=context, image=f"proctoring_photos/{photo_type}.jpg",
+        )
+
+    def test_missing_requirements_in_one_query(self):
+        self.assertEqual(self.check().data["missing"], ["consent", "face", "signature", "id"])
+
+        CandidateConsent.objects.create(
+            candidate=self.candidate, test_assignment=self.assignment, consent_text="I agree", agreed=True
+        )
+        self.add_photo("face")
+        self.add_photo("signature", context="periodic")  # only initial photos count
+        with self.assertNumQueries(1):
+            response = self.check()
+        self.assertEqual(response.data["missing"], ["signature", "id"])
+        self.assertEqual(response.data["requirements"]["allowed_id_documents"], [{"id": self.passport.id, "name": "Passport"}])
+
+        self.add_photo("signature")
+        self.add_photo("id")
+        response = self.check()
+        self.assertTrue(response.data["ready"])
+        self.assertEqual(response.data["reason"], "proctoring_ready")
+
+    def test_unknown_candidate_and_unproctored_test(self):
+        response = self.client.get("/api/proctoring/check-ready/", {
+            "assignment_id": self.assignment.id, "candidate_id": self.candidate.id + 100,
+        })
+        self.assertEqual(response.status_code, 404)
+
+        self.config.delete()
+        readiness.invalidate_config(self.test.id)
+        self.assertEqual(self.check().data, {"ready": True, "enforce_proctoring": False, "requirements": {}})
+
+    def test_admin_edit_invalidates_cached_config(self):
+        self.check()
+        admin = get_user_model().objects.create_superuser("admin", "admin@example.com", "pw")
+        self.client.force_login(admin)
+        url = f"/admin/proctoring/testproctoringconfig/{self.config.id}/change/"
+        form = {
+            "test": self.test.id, "consent_required": "on", "consent_text": "I agree",
+            "max_upload_size_mb": 2, "periodic_face_capture_sec": 60, "periodic_screen_capture_sec": 60,
+            "violation_boost_factor": 1.0, "quality_profile": "medium",
+            "require_id_photo": "on", "allowed_id_documents": [self.passport.id],  # face and signature off
+        }
+        self.assertEqual(self.client.post(url, form).status_code, 302)
+        self.assertEqual(self.check().data["missing"], ["consent", "id"])
@@ -0,0 +1,98 @@
+import shutil
+import tempfile
+import zipfile
+from datetime import timedelta
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from proctoring.models import (
+    LiveProctoringStatus, ProctoringPhoto, ProctoringViolation, ProctoringViolationSummary,
+)
+from proctoring.utils.live_status import rebuild_live_status
+from proctoring.utils.retention import apply_retention
+from test_engine.models import Candidate, Test, TestAssignment, CandidateTestSession
+
+
+class TestRetention(TestCase):
+    def setUp(self):
+        self.media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media, ignore_errors=True)
+        override = override_settings(MEDIA_ROOT=self.media)
+        override.enable()
+        self.addCleanup(override.disable)
+
+        self.now = timezone.now()
+        self.test = Test.objects.create(name="Proctored", total_duration_minutes=30)
+        self.recent = self.assign("recent")
+        self.old = self.assign("old")
+
+    def assign(self, name):
+        candidate = Candidate.objects.create(name=name, email=f"{name}@example.com")
+        return TestAssignment.objects.create(candidate=candidate, test=self.test)
+
+    def photo(self, assignment, context, age, file_name=None, photo_type="screen"):
+        file_name = file_name or f"proctoring_photos/{assignment.id}_{context}_{age.total_seconds():.0f}.jpg"
+        if not default_storage.exists(file_name):
+            default_storage.save(file_name, ContentFile(b"jpeg bytes " + file_name.encode()))
+        photo = ProctoringPhoto.objects.create(
+            candidate=assignment.candidate, test_assignment=assignment,
+            photo_type=photo_type, context=context, image=file_name,
+        )
+        ProctoringPhoto.objects.filter(id=photo.id).update(created_at=self.now - age)
+        return photo
+
+    def test_periodic_captures_are_thinned_then_expired(self):
+        start = timedelta(days=20)
+        thinned = [self.photo(self.recent, "periodic", start - timedelta(minutes=2 * i)) for i in range(16)]
+        expired = self.photo(self.recent, "periodic", timedelta(days=100))
+        kept = self.photo(self.recent, "violation", timedelta(days=100))
+
+        stats = apply_retention(now=self.now)
+
+        remaining = set(ProctoringPhoto.objects.values_list("id", flat=True))
+        self.assertEqual(len(remaining & {p.id for p in thinned}), 4)  # one per 10 minutes over 30 minutes
+        self.assertNotIn(expired.id, remaining)
+        self.assertIn(kept.id, remaining)
+        self.assertEqual(stats["photos_deleted"], 13)
+        self.assertFalse(default_storage.exists(expired.image.name))
+
+    def test_old_media_is_archived_and_shared_files_survive(self):
+        shared = "proctoring_photos/shared.jpg"
+        self.photo(self.recent, "initial", timedelta(days=1), file_name=shared, photo_type="face")
+        archived = [
+            self.photo(self.old, "initial", timedelta(days=200), file_name=shared, photo_type="face"),
+            self.photo(self.old, "violation", timedelta(days=200)),
+        ]
+        own_file = archived[1].image.name
+
+        stats = apply_retention(now=self.now)
+        self.assertEqual((stats["archives_written"], stats["photos_archived"]), (1, 2))
+
+        rows = list(ProctoringPhoto.objects.filter(test_assignment=self.old))
+        archive_name = rows[0].archive_name
+        self.assertTrue(archive_name.endswith(f"assignment_{self.old.id}.zip"))
+        with default_storage.open(archive_name, "rb") as fh, zipfile.ZipFile(fh) as archive:
+            self.assertEqual(len(archive.namelist()), 3)  # two photos + manifest
+        self.assertFalse(default_storage.exists(own_file))
+        self.assertTrue(default_storage.exists(shared))  # still used by the recent assignment
+
+        self.assertEqual(apply_retention(now=self.now)["archives_written"], 0)
+
+    def test_old_violations_are_rolled_up_per_attempt(self):
+        CandidateTestSession.objects.create(assignment=self.recent, started_at=self.now - timedelta(days=41))
+        ProctoringViolation.objects.bulk_create([
+            ProctoringViolation(assignment=self.recent, violation_type="tab_switch", severity=s) for s in (1, 2, 3)
+        ] + [ProctoringViolation(assignment=self.recent, violation_type="no_face", severity=4)])
+        ProctoringViolation.objects.filter(violation_type="tab_switch").update(timestamp=self.now - timedelta(days=40))
+
+        stats = apply_retention(now=self.now)
+        self.assertEqual(stats["violations_rolled_up"], 3)
+        summary = ProctoringViolationSummary.objects.get()
+        self.assertEqual((summary.event_count, summary.severity_total, summary.max_severity), (3, 6, 3))
+        self.assertEqual(ProctoringViolation.objects.count(), 1)
+
+        rebuild_live_status()
+        live = LiveProctoringStatus.objects.get(assignment=self.recent)
+        self.assertEqual((live.violation_count, live.severity_total), (4, 10))
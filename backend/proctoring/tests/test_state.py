@@ -0,0 +1,75 @@
+from django.test import TestCase
+from proctoring.models import LiveProctoringStatus, ProctoringHeartbeat, ProctoringSession
+from proctoring.utils import heartbeats, state
+from test_engine.models import Candidate, Test, TestAssignment, CandidateTestSession
+
+
+class TestProctoringState(TestCase):
+    def setUp(self):
+        self.test = Test.objects.create(name="Stateful", total_duration_minutes=30)
+        self.candidate = Candidate.objects.create(name="C", email="c@example.com")
+        self.assignment = TestAssignment.objects.create(candidate=self.candidate, test=self.test)
+        heartbeats.forget_attempt(self.assignment.id)
+
+    def start(self, attempt_number):
+        session = CandidateTestSession.objects.create(assignment=self.assignment, attempt_number=attempt_number)
+        state.start_attempt(self.assignment.id, attempt_number)
+        return session
+
+    def test_completion_writes_each_row_once(self):
+        session = self.start(1)
+        # session, heartbeat and live status: one UPDATE each
+        with self.assertNumQueries(3):
+            self.assertTrue(state.complete_attempt(session, test_id=self.test.id))
+        completed_at = session.test_completed_at
+
+        with self.assertNumQueries(1):
+            self.assertFalse(state.complete_attempt(session, test_id=self.test.id))
+
+        session.refresh_from_db()
+        self.assertEqual(session.test_completed_at, completed_at)
+        heartbeat = ProctoringHeartbeat.objects.get(assignment=self.assignment, attempt_number=1)
+        self.assertEqual((heartbeat.candidate_status, heartbeat.test_completed_at), ("completed", completed_at))
+        self.assertEqual(LiveProctoringStatus.objects.get(assignment=self.assignment).candidate_status, "completed")
+
+    def test_heartbeats_are_scoped_to_the_attempt(self):
+        first = self.start(1)
+        state.complete_attempt(first, test_id=self.test.id)
+        self.start(2)
+        state.record_capture(self.assignment.id, "face", "/media/face.jpg", attempt_number=2)
+
+        rows = dict(ProctoringHeartbeat.objects.filter(assignment=self.assignment).values_list(
+            "attempt_number", "candidate_status"
+        ))
+        self.assertEqual(rows, {1: "completed", 2: "in_progress"})
+        second = ProctoringHeartbeat.objects.get(assignment=self.assignment, attempt_number=2)
+        self.assertEqual(second.last_face_photo_url, "/media/face.jpg")
+
+        second.mark_completed()
+        self.assertFalse(state.mark_heartbeat_completed(self.assignment.id, 2))
+
+    def test_capture_after_completion_goes_to_the_latest_attempt(self):
+        state.complete_attempt(self.start(1), test_id=self.test.id)
+        state.complete_attempt(self.start(2), test_id=self.test.id)
+        heartbeats.forget_attempt(self.assignment.id)
+
+        state.record_capture(self.assignment.id, "face", "/media/final.jpg")
+        urls = dict(ProctoringHeartbeat.objects.filter(assignment=self.assignment).values_list(
+            "attempt_number", "last_face_photo_url"
+        ))
+        self.assertNotEqual(urls[1], "/media/final.jpg")
+        self.assertEqual(urls[2], "/media/final.jpg")
+
+    def test_proctoring_session_updates_only_sent_flags(self):
+        session, created = state.resume_proctoring_session(self.candidate.id, self.assignment.id)
+        self.assertTrue(created)
+        ProctoringSession.objects.filter(id=session.id).update(is_active=False, camera_streaming_ok=True)
+
+        resumed, created = state.resume_proctoring_session(self.candidate.id, self.assignment.id)
+        self.assertFalse(created)
+        self.assertTrue(resumed.is_active)
+
+        self.assertIsNotNone(state.update_proctoring_session(session.session_token, screen_ok=True))
+        session.refresh_from_db()
+        self.assertTrue(session.is_active and session.camera_streaming_ok and session.screen_sharing_ok)
+        self.assertIsNone(state.update_proctoring_session("00000000-0000-0000-0000-000000000000"))
@@ -0,0 +1,64 @@
+from rest_framework.test import APITestCase
+from django.utils import timezone
+from proctoring.models import ProctoringHeartbeat, ProctoringViolation
+from proctoring.utils import heartbeats
+from test_engine.models import Candidate, Test, TestAssignment, CandidateTestSession
+
+
+class TestBatchedViolations(APITestCase):
+    url = "/api/proctoring/log-violations/"
+
+    def setUp(self):
+        test = Test.objects.create(name="Proctored", total_duration_minutes=30)
+        candidate = Candidate.objects.create(name="C", email="c@example.com")
+        self.assignment = TestAssignment.objects.create(candidate=candidate, test=test, max_attempts=2)
+        CandidateTestSession.objects.create(assignment=self.assignment, attempt_number=2, started_at=timezone.now())
+        heartbeats.forget_attempt(self.assignment.id)
+
+    def post(self, events):
+        return self.client.post(self.url, {"assignment_id": self.assignment.id, "events": events}, format="json")
+
+    def test_burst_is_merged_and_aggregated(self):
+        t0 = 1_700_000_000_000
+        events = [{"type": "tab_switch", "severity": 2, "timestamp": t0 + i * 500} for i in range(6)]
+        events += [
+            {"type": "tab_switch", "severity": 3, "timestamp": t0 + 10_000},  # outside the window
+            {"type": "fullscreen_exit", "severity": 1, "timestamp": t0 + 1_000},
+            {"type": "fullscreen_exit", "severity": 1, "timestamp": t0 + 1_500},
+            {"type": "screen_lost", "severity": 3, "timestamp": t0 + 2_000},
+        ]
+        response = self.post(events)
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual((response.data["received"], response.data["stored"]), (10, 4))
+
+        burst = ProctoringViolation.objects.get(violation_type="tab_switch", metadata__merged_count=6)
+        self.assertEqual(burst.attempt_number, 2)
+
+        heartbeat = ProctoringHeartbeat.objects.get(assignment=self.assignment, attempt_number=2)
+        self.assertEqual(heartbeat.severity_score, 2 + 3 + 3)
+        self.assertEqual(heartbeat.total_fullscreen_exits, 2)
+        self.assertEqual(heartbeat.total_screen_failures, 1)
+        self.assertFalse(heartbeat.fullscreen_ok)
+
+    def test_write_cost_does_not_grow_with_batch(self):
+        self.post([{"type": "right_click"}])  # creates the heartbeat row
+        events = [{"type": t, "severity": 1} for t in ["right_click", "tab_switch", "keyboard_activity"] * 20]
+        # assignment check, savepoint, bulk insert, heartbeat update, live status update, release
+        with self.assertNumQueries(6):
+            self.assertEqual(self.post(events).status_code, 201)
+        self.assertEqual(ProctoringHeartbeat.objects.get().severity_score, 1 + 3)
+
+    def test_single_event_endpoint_still_works(self):
+        response = self.client.post("/api/proctoring/log-violation/", {
+            "assignment_id": self.assignment.id, "type": "fullscreen_exit"
+        }, format="json")
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(ProctoringHeartbeat.objects.get().total_fullscreen_exits, 1)
+
+    def test_rejects_malformed_batches(self):
+        self.assertEqual(self.post([{"severity": 1}]).status_code, 400)
+        self.assertEqual(self.post([{"type": "tab_switch", "timestamp": "yesterday"}]).status_code, 400)
+        self.assertEqual(self.client.post(self.url, {"assignment_id": self.assignment.id}, format="json").status_code, 400)
+        for timestamp in (1e20, 10 ** 30):  # beyond what datetime can represent
+            self.assertEqual(self.post([{"type": "tab_switch", "timestamp": timestamp}]).status_code, 400)
+        self.assertEqual(self.client.post(self.url, {"assignment_id": "abc", "events": []}, format="json").status_code, 400)
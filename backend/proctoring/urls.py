@@ -1,11 +1,13 @@
 
 
 from django.urls import path
+from .live import live_monitor
 from .views import (
     get_consent, submit_consent, upload_photo, check_ready,
     start_proctoring_session,
     update_proctoring_status,
-    check_proctoring_status, log_violation, update_heartbeat,
+    check_proctoring_status, log_violation, log_violations, update_heartbeat,
+    live_status,
 )
 
 
@@ -18,6 +20,9 @@ urlpatterns = [
     path("update-session-status/", update_proctoring_status),
     path("check-session-status/", check_proctoring_status),
     path('log-violation/', log_violation),
+    path('log-violations/', log_violations, name="log-violations"),
     path("update-heartbeat/", update_heartbeat, name="update_heartbeat"),
+    path("live-status/", live_status, name="live-status"),
+    path("live-monitor/<int:test_id>/", live_monitor, name="live-monitor"),
 
 ]
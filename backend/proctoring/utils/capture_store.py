@@ -0,0 +1,131 @@
+"""
+Content-addressed storage for proctoring captures.
+
+Re-encoded captures are stored under `proctoring_photos/cas/<aa>/<sha256>.jpg`, so
+identical content is written once no matter how many rows point at it. Each row keeps
+the exact hash, a 64-bit difference hash (dHash) of the frame and its encoded size.
+
+Periodic screen captures are additionally compared with the frame stored for the
+candidate's previous screen capture: when the dHashes differ in at most
+SCREEN_CAPTURE_DEDUP_DISTANCE bits the new frame is not written at all and the row
+references that file. The comparison is always against the stored frame, never a later
+duplicate of it, so a slowly changing screen cannot drift away from what is kept. Either
+way `duplicate_of` points at the row that owns the stored file.
+
+Several rows can share one file, so files must only be removed once no row references
+their name (see `referenced_names`). Rows moved into an archive (proctoring/utils/retention.py)
+hold a zip member name instead of a storage path and are never reused.
+"""
+import hashlib
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db.models import Count, Q, Sum
+from PIL import Image
+
+from ..models import ProctoringPhoto
+
+
+CAS_PREFIX = "proctoring_photos/cas"
+
+
+def dhash(image, size=8):
+    """64-bit difference hash as 16 hex chars; robust to re-encoding and small changes."""
+    small = image.convert("L").resize((size + 1, size), Image.Resampling.BILINEAR)
+    pixels = list(small.getdata())
+    bits = 0
+    for row in range(size):
+        for col in range(size):
+            left = pixels[row * (size + 1) + col]
+            bits = (bits << 1) | (left > pixels[row * (size + 1) + col + 1])
+    return f"{bits:016x}"
+
+
+def hamming(a, b):
+    return bin(int(a, 16) ^ int(b, 16)).count("1")
+
+
+def cas_name(sha256):
+    return f"{CAS_PREFIX}/{sha256[:2]}/{sha256}.jpg"
+
+
+def _near_duplicate(photo, phash):
+    distance = getattr(settings, "SCREEN_CAPTURE_DEDUP_DISTANCE", 4)
+    if photo.photo_type != "screen" or photo.context != "periodic" or distance < 0:
+        return None
+    previous = ProctoringPhoto.objects.filter(
+        test_assignment_id=photo.test_assignment_id, photo_type="screen", context="periodic", archive_name=""
+    ).exclude(phash="").select_related("duplicate_of").only(
+        "id", "image", "phash", "duplicate_of__id", "duplicate_of__image", "duplicate_of__phash",
+        "duplicate_of__duplicate_of_id", "duplicate_of__archive_name",
+    ).order_by("-id").first()
+    if previous is None:
+        return None
+    stored = previous.duplicate_of or previous
+    if not stored.archive_name and stored.phash and hamming(stored.phash, phash) <= distance:
+        return stored
+    return None
+
+
+def assign(photo, content):
+    """
+    Point the unsaved `photo` at stored content for `content` (a re-encoded ContentFile),
+    writing the file only when nobody stored it before. Returns True for duplicates.
+    """
+    data = content.read()
+    sha256 = hashlib.sha256(data).hexdigest()
+    with Image.open(BytesIO(data)) as image:
+        phash = dhash(image)
+    photo.sha256, photo.phash, photo.size_bytes = sha256, phash, len(data)
+
+    original = (
+        _near_duplicate(photo, phash)
+        or ProctoringPhoto.objects.filter(sha256=sha256, archive_name="").only(
+            "id", "image", "duplicate_of_id"
+        ).order_by("id").first()
+    )
+    if original:
+        photo.image = original.image.name
+        photo.duplicate_of_id = original.duplicate_of_id or original.id
+        return True
+
+    name = cas_name(sha256)
+    if not default_storage.exists(name):
+        name = default_storage.save(name, ContentFile(data))
+    photo.image = name
+    return False
+
+
+def referenced_names(names):
+    """Subset of storage names still used by some photo (image or thumbnail) outside an archive."""
+    names = list(names)
+    live = ProctoringPhoto.objects.filter(archive_name="")
+    return set(
+        live.filter(image__in=names).values_list("image", flat=True)
+    ) | set(
+        live.filter(thumbnail__in=names).values_list("thumbnail", flat=True)
+    )
+
+
+def savings(queryset=None):
+    """Storage saved by deduplication (see the `capture_store_stats` command)."""
+    queryset = ProctoringPhoto.objects.all() if queryset is None else queryset
+    totals = queryset.exclude(sha256="").aggregate(
+        captures=Count("id"),
+        duplicates=Count("id", filter=Q(duplicate_of__isnull=False)),
+        logical_bytes=Sum("size_bytes"),
+        saved_bytes=Sum("size_bytes", filter=Q(duplicate_of__isnull=False)),
+    )
+    logical = totals["logical_bytes"] or 0
+    saved = totals["saved_bytes"] or 0
+    return {
+        "captures": totals["captures"],
+        "stored_files": totals["captures"] - totals["duplicates"],
+        "duplicates": totals["duplicates"],
+        "logical_bytes": logical,
+        "stored_bytes": logical - saved,
+        "saved_bytes": saved,
+        "saved_ratio": round(saved / logical, 4) if logical else 0.0,
+    }
@@ -0,0 +1,190 @@
+"""
+Coalesced heartbeat ingestion.
+
+`record_heartbeat()` only touches an in-process last-seen table keyed by
+(assignment, attempt); repeated beats from the same candidate collapse into one entry.
+A daemon thread writes the table out every `HEARTBEAT_FLUSH_INTERVAL_SECONDS` with one
+bulk_update each for the heartbeat rows, the sessions' `screen_ok` and the live
+monitoring rows, so a steady stream of beats costs no database writes per request.
+Poll counts are added with F() expressions, so several worker processes can flush side
+by side without losing beats.
+
+The active attempt of an assignment is looked up once and remembered for
+`HEARTBEAT_SESSION_TTL_SECONDS`; beats for a session that completed in the meantime are
+dropped at flush time.
+"""
+import atexit
+import threading
+import time
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Max
+from django.utils import timezone
+
+from test_engine.models import CandidateTestSession
+from test_engine.utils.background import PeriodicFlusher
+from ..models import ProctoringHeartbeat
+from . import live_events, live_status
+
+
+_seen = {}
+_seen_lock = threading.Lock()
+_flush_lock = threading.Lock()
+
+_active_attempts = {}
+_active_lock = threading.Lock()
+
+
+def active_attempt(assignment_id):
+    """Attempt number of the assignment's open session, or None. Cached for a short while."""
+    assignment_id = int(assignment_id)
+    now = time.monotonic()
+    with _active_lock:
+        cached = _active_attempts.get(assignment_id)
+        if cached and cached[1] > now:
+            return cached[0]
+
+    attempt_number = CandidateTestSession.objects.filter(
+        assignment_id=assignment_id, completed=False
+    ).order_by("-attempt_number").values_list("attempt_number", flat=True).first()
+
+    if attempt_number is not None:
+        with _active_lock:
+            _active_attempts[assignment_id] = (
+                attempt_number, now + getattr(settings, "HEARTBEAT_SESSION_TTL_SECONDS", 60)
+            )
+    return attempt_number
+
+
+def latest_attempt(assignment_id):
+    """Highest attempt number of the assignment, open or completed; 1 before the first start."""
+    return CandidateTestSession.objects.filter(assignment_id=assignment_id).aggregate(
+        latest=Max("attempt_number")
+    )["latest"] or 1
+
+
+def forget_attempt(assignment_id):
+    with _active_lock:
+        _active_attempts.pop(int(assignment_id), None)
+
+
+def record_heartbeat(assignment_id, attempt_number, screen_ok, fullscreen_ok=None):
+    key = (int(assignment_id), int(attempt_number))
+    with _seen_lock:
+        entry = _seen.setdefault(key, {"polls": 0, "fullscreen_ok": None})
+        entry["last_seen"] = timezone.now()
+        entry["screen_ok"] = bool(screen_ok)
+        if fullscreen_ok is not None:
+            entry["fullscreen_ok"] = bool(fullscreen_ok)
+        entry["polls"] += 1
+    _flusher.start()
+
+
+def pending_count():
+    with _seen_lock:
+        return len(_seen)
+
+
+def _latest_heartbeats(keys):
+    """{(assignment_id, attempt_number): latest heartbeat row}, creating missing rows in bulk."""
+    rows = {}
+    for heartbeat in ProctoringHeartbeat.objects.filter(
+        assignment_id__in={assignment_id for assignment_id, _ in keys}
+    ).order_by("created_at", "id"):
+        key = (heartbeat.assignment_id, heartbeat.attempt_number)
+        if key in keys:
+            rows[key] = heartbeat  # later rows win → latest per key
+
+    missing = [key for key in keys if key not in rows]
+    if missing:
+        ProctoringHeartbeat.objects.bulk_create([
+            ProctoringHeartbeat(assignment_id=assignment_id, attempt_number=attempt_number)
+            for assignment_id, attempt_number in missing
+        ])
+        for heartbeat in ProctoringHeartbeat.objects.filter(
+            assignment_id__in={assignment_id for assignment_id, _ in missing}
+        ).order_by("created_at", "id"):
+            key = (heartbeat.assignment_id, heartbeat.attempt_number)
+            if key in missing:
+                rows[key] = heartbeat
+    return rows
+
+
+def _persist(batch):
+    sessions = {
+        (session.assignment_id, session.attempt_number): session
+        for session in CandidateTestSession.objects.filter(
+            assignment_id__in={assignment_id for assignment_id, _ in batch}, completed=False
+        ).only("id", "assignment_id", "attempt_number", "screen_ok").annotate(test_id=F("assignment__test_id"))
+    }
+    batch = {key: entry for key, entry in batch.items() if key in sessions}
+    if not batch:
+        return 0
+
+    with transaction.atomic():
+        heartbeats = _latest_heartbeats(set(batch))
+        for key, entry in batch.items():
+            heartbeat = heartbeats[key]
+            heartbeat.last_seen = entry["last_seen"]
+            heartbeat.last_screen_ok = entry["screen_ok"]
+            if entry["fullscreen_ok"] is not None:
+                heartbeat.fullscreen_ok = entry["fullscreen_ok"]
+            heartbeat.total_heartbeat_polls = F("total_heartbeat_polls") + entry["polls"]
+            sessions[key].screen_ok = entry["screen_ok"]
+
+        ProctoringHeartbeat.objects.bulk_update(
+            heartbeats.values(), ["last_seen", "last_screen_ok", "fullscreen_ok", "total_heartbeat_polls"]
+        )
+        CandidateTestSession.objects.bulk_update([sessions[key] for key in batch], ["screen_ok"])
+        live_status.apply_heartbeats(batch)
+        _publish(batch, sessions)
+    return len(batch)
+
+
+def _publish(batch, sessions):
+    if not live_events.publishing_enabled():
+        return
+    by_test = {}
+    for key, entry in batch.items():
+        by_test.setdefault(sessions[key].test_id, []).append({
+            "assignment_id": key[0],
+            "attempt_number": key[1],
+            "last_seen": entry["last_seen"],
+            "screen_ok": entry["screen_ok"],
+            "fullscreen_ok": entry["fullscreen_ok"],
+        })
+    for test_id, rows in by_test.items():
+        live_events.publish(test_id, "heartbeats", rows)
+
+
+def flush_heartbeats():
+    """Write every pending beat; returns the number of heartbeat rows updated."""
+    with _flush_lock:
+        with _seen_lock:
+            batch = dict(_seen)
+            _seen.clear()
+        if not batch:
+            return 0
+        try:
+            return _persist(batch)
+        except Exception:
+            # Merge back so the next flush retries; beats received since then are newer.
+            with _seen_lock:
+                for key, entry in batch.items():
+                    newer = _seen.get(key)
+                    if newer:
+                        newer["polls"] += entry["polls"]
+                        if newer["fullscreen_ok"] is None:
+                            newer["fullscreen_ok"] = entry["fullscreen_ok"]
+                    else:
+                        _seen[key] = entry
+            raise
+
+
+_flusher = PeriodicFlusher(
+    "heartbeat-flusher",
+    getattr(settings, "HEARTBEAT_FLUSH_INTERVAL_SECONDS", 5),
+    flush_heartbeats,
+)
+atexit.register(flush_heartbeats)
@@ -0,0 +1,220 @@
+"""
+Pub/sub fan-out for the live proctoring monitor (proctoring/live.py).
+
+Write paths call `publish(test_id, type, data)`; every monitor streaming that test
+receives the event. On PostgreSQL events travel through NOTIFY on one channel: the WSGI
+web processes send them when the publishing transaction commits, and every monitor
+process keeps a single LISTEN connection that fans them out to its local subscribers, so
+it does not matter which process a candidate's request or an invigilator's stream landed
+on. On other databases (SQLite in development) events are dispatched in-process after
+commit, which needs the whole app served by one ASGI process.
+
+Publishing is skipped while nobody can receive it. The listener connection only stays open
+while its process has subscribers and carries a fixed application_name, so publishers
+check pg_stat_activity for it (cached LIVE_MONITOR_PRESENCE_SECONDS per process) instead of
+sending a pg_notify on every heartbeat flush. A stream that starts listening within that
+window gets a `resync` once publishers have noticed it.
+
+Subscribers are asyncio queues owned by the streaming response. A subscriber that falls
+too far behind has its queue replaced by a single `resync` event and reloads a snapshot.
+"""
+import asyncio
+import json
+import select
+import threading
+import time
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connection, connections, transaction
+from django.utils import timezone
+
+
+CHANNEL = "proctoring_live"
+LISTENER_NAME = "proctoring_live_listener"
+# NOTIFY payloads are capped at 8000 bytes; list events are split to stay well below.
+MAX_ITEMS_PER_EVENT = 40
+
+_subscribers = {}
+_subscribers_lock = threading.Lock()
+_listener = None
+_listener_started = float("-inf")
+_listener_lock = threading.Lock()
+_presence = (float("-inf"), False)  # (checked at, listening) for publishers
+
+
+class Subscription:
+    def __init__(self, test_id, loop, maxsize):
+        self.test_id = test_id
+        self.loop = loop
+        self.queue = asyncio.Queue(maxsize=maxsize)
+
+    def _put(self, event):
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait({"type": "resync", "test_id": self.test_id})
+
+    def deliver(self, event):
+        """Thread-safe: called from request threads, the flusher or the listener."""
+        try:
+            self.loop.call_soon_threadsafe(self._put, event)
+        except RuntimeError:
+            pass  # loop already closed; the stream is going away
+
+
+def _uses_notify():
+    return connection.vendor == "postgresql"
+
+
+def _presence_seconds():
+    return getattr(settings, "LIVE_MONITOR_PRESENCE_SECONDS", 5)
+
+
+def subscribe(test_id):
+    """Register the running event loop's stream for `test_id`. Call from async code."""
+    subscription = Subscription(
+        int(test_id), asyncio.get_running_loop(), getattr(settings, "LIVE_MONITOR_QUEUE_SIZE", 500)
+    )
+    with _subscribers_lock:
+        _subscribers.setdefault(subscription.test_id, set()).add(subscription)
+    if _uses_notify():
+        warmup = _start_listener() + _presence_seconds() - time.monotonic()
+        if warmup > 0:
+            # publishers may still hold a cached "nobody listening" until then
+            subscription.loop.call_later(
+                warmup + 1, subscription._put, {"type": "resync", "test_id": subscription.test_id}
+            )
+    return subscription
+
+
+def unsubscribe(subscription):
+    with _subscribers_lock:
+        subscribers = _subscribers.get(subscription.test_id)
+        if subscribers:
+            subscribers.discard(subscription)
+            if not subscribers:
+                del _subscribers[subscription.test_id]
+
+
+def subscriber_count(test_id=None):
+    with _subscribers_lock:
+        if test_id is None:
+            return sum(len(subs) for subs in _subscribers.values())
+        return len(_subscribers.get(int(test_id), ()))
+
+
+def _listener_present():
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT EXISTS (SELECT 1 FROM pg_stat_activity WHERE application_name = %s)", [LISTENER_NAME]
+        )
+        return cursor.fetchone()[0]
+
+
+def monitor_listening():
+    """Whether some monitor process holds the LISTEN connection, looked up once per interval."""
+    global _presence
+    checked_at, listening = _presence
+    now = time.monotonic()
+    if now - checked_at >= _presence_seconds():
+        listening = _listener_present()
+        _presence = (now, listening)
+    return listening
+
+
+def publishing_enabled():
+    """Whether publishers should bother building events: somebody here or elsewhere is streaming."""
+    if subscriber_count() > 0:
+        return True
+    return _uses_notify() and monitor_listening()
+
+
+def dispatch(event):
+    with _subscribers_lock:
+        subscribers = list(_subscribers.get(event["test_id"], ()))
+    for subscription in subscribers:
+        subscription.deliver(event)
+
+
+def publish(test_id, event_type, data):
+    if test_id is None or data == [] or not publishing_enabled():
+        return
+    items = data if isinstance(data, list) else [data]
+    for start in range(0, max(len(items), 1), MAX_ITEMS_PER_EVENT):
+        chunk = items[start:start + MAX_ITEMS_PER_EVENT]
+        event = {
+            "test_id": int(test_id),
+            "type": event_type,
+            "data": chunk if isinstance(data, list) else data,
+            "at": timezone.now(),
+        }
+        # JSON round trip: both transports hand subscribers the same plain values
+        payload = json.dumps(event, cls=DjangoJSONEncoder)
+        if _uses_notify():
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT pg_notify(%s, %s)", [CHANNEL, payload])
+        else:
+            transaction.on_commit(lambda payload=payload: dispatch(json.loads(payload)))
+
+
+def assignment_test_id(assignment_id):
+    """Test of an assignment, only looked up when somebody may be listening."""
+    if not publishing_enabled():
+        return None
+    from test_engine.models import TestAssignment
+    return TestAssignment.objects.filter(id=assignment_id).values_list("test_id", flat=True).first()
+
+
+def _receive(raw, timeout):
+    """Yield NOTIFY payloads from a raw psycopg (3) or psycopg2 connection."""
+    if hasattr(raw, "poll"):  # psycopg2
+        if select.select([raw], [], [], timeout) != ([], [], []):
+            raw.poll()
+            while raw.notifies:
+                yield raw.notifies.pop(0).payload
+    else:
+        for notify in raw.notifies(timeout=timeout, stop_after=100):
+            yield notify.payload
+
+
+def _listen():
+    global _listener
+    while True:
+        db = connections.create_connection("default")
+        try:
+            db.ensure_connection()
+            db.connection.autocommit = True
+            with db.connection.cursor() as cursor:
+                cursor.execute(f"SET application_name = '{LISTENER_NAME}'")
+                cursor.execute(f"LISTEN {CHANNEL}")
+            while True:
+                for payload in _receive(db.connection, 5):
+                    dispatch(json.loads(payload))
+                with _listener_lock:
+                    if not subscriber_count():
+                        # last stream closed: disconnect, so publishers stop notifying
+                        _listener = None
+                        return
+        except Exception as e:
+            print("⚠️ Live monitor listener lost its connection:", e)
+            time.sleep(2)
+        finally:
+            try:
+                db.close()
+            except Exception:
+                pass
+
+
+def _start_listener():
+    """Start this process's listener unless it is running; returns when it started."""
+    global _listener, _listener_started
+    with _listener_lock:
+        if _listener and _listener.is_alive():
+            return _listener_started
+        _listener = threading.Thread(target=_listen, name="live-monitor-listener", daemon=True)
+        _listener_started = time.monotonic()
+        _listener.start()
+        return _listener_started
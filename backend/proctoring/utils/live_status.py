@@ -0,0 +1,121 @@
+"""
+Live proctoring projection (LiveProctoringStatus, one row per assignment).
+
+Write paths keep the row current instead of the admin aggregating on every page view:
+- StartSession resets it for the new attempt (`start_attempt`)
+- batched violations add their counts with one F() UPDATE (`apply_violations`)
+- the heartbeat flusher copies last-seen / screen / fullscreen state (`apply_heartbeats`)
+- ProctoringHeartbeat.mark_completed closes the window
+
+`rebuild_live_status` recomputes rows from the source tables, for backfills and repairs.
+"""
+from django.db.models import F, Max, Sum, Count
+from django.utils import timezone
+
+from test_engine.models import CandidateTestSession
+from ..models import LiveProctoringStatus, ProctoringViolation, ProctoringViolationSummary, ProctoringHeartbeat
+
+
+def start_attempt(assignment_id, attempt_number, started_at=None):
+    LiveProctoringStatus.objects.update_or_create(
+        assignment_id=assignment_id,
+        defaults={
+            "attempt_number": attempt_number,
+            "attempt_started_at": started_at or timezone.now(),
+            "test_completed_at": None,
+            "candidate_status": "in_progress",
+            "violation_count": 0,
+            "severity_total": 0,
+            "fullscreen_ok": True,
+            "fullscreen_exit_time": None,
+            "screen_ok": True,
+            "updated_at": timezone.now(),
+        },
+    )
+
+
+def apply_violations(assignment_id, attempt_number, groups):
+    """`groups` as returned by violations.merge_events (one stored row per group)."""
+    changes = {
+        "violation_count": F("violation_count") + len(groups),
+        "severity_total": F("severity_total") + sum(g["severity"] for g in groups),
+        "updated_at": timezone.now(),
+    }
+    exits = [g for g in groups if g["type"] == "fullscreen_exit"]
+    if exits:
+        changes["fullscreen_ok"] = False
+        changes["fullscreen_exit_time"] = exits[-1]["last_at"]
+
+    LiveProctoringStatus.objects.filter(
+        assignment_id=assignment_id, attempt_number=attempt_number, candidate_status="in_progress"
+    ).update(**changes)
+
+
+def apply_heartbeats(batch):
+    """`batch`: {(assignment_id, attempt_number): {"last_seen", "screen_ok", "fullscreen_ok"}}."""
+    rows = [
+        row for row in LiveProctoringStatus.objects.filter(
+            assignment_id__in={assignment_id for assignment_id, _ in batch}
+        ).only("id", "assignment_id", "attempt_number", "last_seen", "screen_ok", "fullscreen_ok")
+        if (row.assignment_id, row.attempt_number) in batch
+    ]
+    now = timezone.now()
+    for row in rows:
+        entry = batch[(row.assignment_id, row.attempt_number)]
+        row.last_seen = entry["last_seen"]
+        row.screen_ok = entry["screen_ok"]
+        if entry["fullscreen_ok"] is not None:
+            row.fullscreen_ok = entry["fullscreen_ok"]
+        row.updated_at = now
+    LiveProctoringStatus.objects.bulk_update(rows, ["last_seen", "screen_ok", "fullscreen_ok", "updated_at"])
+
+
+def rebuild_live_status(assignment_ids=None):
+    """Recompute rows from sessions, violations and heartbeats. Returns the number written."""
+    sessions = CandidateTestSession.objects.order_by("assignment_id", "-attempt_number")
+    if assignment_ids is not None:
+        sessions = sessions.filter(assignment_id__in=list(assignment_ids))
+
+    written = 0
+    seen = set()
+    for session in sessions.iterator():
+        if session.assignment_id in seen:
+            continue  # only the latest attempt
+        seen.add(session.assignment_id)
+
+        end_time = session.sectionstatus_set.aggregate(max_end=Max("submitted_at"))["max_end"] if session.completed else None
+        violations = ProctoringViolation.objects.filter(
+            assignment_id=session.assignment_id,
+            attempt_number=session.attempt_number,
+            timestamp__gte=session.started_at,
+        )
+        if end_time:
+            violations = violations.filter(timestamp__lte=end_time)
+        totals = violations.aggregate(count=Count("id"), severity=Sum("severity"))
+        # Events the retention engine already folded into summaries
+        rolled_up = ProctoringViolationSummary.objects.filter(
+            assignment_id=session.assignment_id, attempt_number=session.attempt_number
+        ).aggregate(count=Sum("event_count"), severity=Sum("severity_total"))
+
+        heartbeat = ProctoringHeartbeat.objects.filter(
+            assignment_id=session.assignment_id, attempt_number=session.attempt_number
+        ).order_by("-last_seen").first()
+
+        LiveProctoringStatus.objects.update_or_create(
+            assignment_id=session.assignment_id,
+            defaults={
+                "attempt_number": session.attempt_number,
+                "attempt_started_at": session.started_at,
+                "test_completed_at": session.test_completed_at,
+                "candidate_status": "completed" if session.completed else "in_progress",
+                "violation_count": (totals["count"] or 0) + (rolled_up["count"] or 0),
+                "severity_total": (totals["severity"] or 0) + (rolled_up["severity"] or 0),
+                "fullscreen_ok": heartbeat.fullscreen_ok if heartbeat else True,
+                "fullscreen_exit_time": heartbeat.fullscreen_exit_time if heartbeat else None,
+                "screen_ok": session.screen_ok,
+                "last_seen": heartbeat.last_seen if heartbeat else None,
+                "updated_at": timezone.now(),
+            },
+        )
+        written += 1
+    return written
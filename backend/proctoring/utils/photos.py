@@ -0,0 +1,176 @@
+"""
+Proctoring photo pipeline.
+
+Uploads are capped while the multipart body streams in: `SizeLimitedUploadHandler` counts
+bytes as chunks arrive and drops the file once it passes the test's
+`TestProctoringConfig.max_upload_size_mb` (or PROCTORING_UPLOAD_MAX_MB when the test is
+not known before parsing), so an oversized capture is never buffered whole.
+
+Face and screen captures are re-encoded to the test's `quality_profile` before they are
+stored. Thumbnails are made after commit on a small thread pool
+(PHOTO_THUMBNAIL_WORKERS) and stored next to the image, so the heartbeat admin and the
+live monitor load a few kilobytes per candidate instead of full frames.
+"""
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+from pathlib import PurePath
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.uploadhandler import FileUploadHandler, SkipFile
+from django.db import close_old_connections, transaction
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+from ..models import ProctoringPhoto, ProctoringHeartbeat, TestProctoringConfig
+from . import live_events, readiness
+
+
+# quality_profile → (longest side in px, JPEG quality)
+QUALITY_PROFILES = {
+    "low": (640, 60),
+    "medium": (1280, 75),
+    "high": (1920, 85),
+}
+REENCODED_TYPES = {"face", "screen"}
+THUMBNAIL_SIZE = (160, 160)
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+class SizeLimitedUploadHandler(FileUploadHandler):
+    """Goes first in `request.upload_handlers`; later handlers never see oversized files."""
+
+    def __init__(self, max_bytes, request=None):
+        super().__init__(request)
+        self.max_bytes = max_bytes
+        self.exceeded = False
+        self.received = 0
+
+    def handle_raw_input(self, input_data, META, content_length, boundary, encoding=None):
+        # Whole body larger than the limit plus form-field slack: no need to read it
+        if content_length and content_length > self.max_bytes + 64 * 1024:
+            self.exceeded = True
+
+    def new_file(self, *args, **kwargs):
+        super().new_file(*args, **kwargs)
+        self.received = 0
+        if self.exceeded:
+            raise SkipFile()
+
+    def receive_data_chunk(self, raw_data, start):
+        self.received += len(raw_data)
+        if self.received > self.max_bytes:
+            self.exceeded = True
+            raise SkipFile()
+        return raw_data
+
+    def file_complete(self, file_size):
+        return None
+
+
+def upload_limit_bytes(assignment_id=None):
+    if assignment_id:
+        max_mb = TestProctoringConfig.objects.filter(
+            test__testassignment__id=assignment_id
+        ).values_list("max_upload_size_mb", flat=True).first()
+        if max_mb:
+            return max_mb * 1024 * 1024
+    return getattr(settings, "PROCTORING_UPLOAD_MAX_MB", 10) * 1024 * 1024
+
+
+def quality_profile(test_id):
+    config = readiness.proctoring_config(test_id)
+    profile = config["quality_profile"] if config else None
+    return profile if profile in QUALITY_PROFILES else "medium"
+
+
+def _open(fileobj):
+    image = Image.open(fileobj)
+    image.verify()  # cheap structural check before decoding pixels
+    fileobj.seek(0)
+    return Image.open(fileobj)
+
+
+def _jpeg(image, max_side, quality):
+    if image.format == "JPEG":
+        image.draft("RGB", (max_side, max_side))  # decode at reduced scale when possible
+    image = ImageOps.exif_transpose(image)
+    image.thumbnail((max_side, max_side))
+    if image.mode != "RGB":
+        image = image.convert("RGB")
+    out = BytesIO()
+    image.save(out, "JPEG", quality=quality, optimize=True)
+    return out.getvalue()
+
+
+def reencode(upload, profile):
+    """Re-encoded capture as a ContentFile; raises ValueError for unreadable images."""
+    max_side, quality = QUALITY_PROFILES[profile]
+    try:
+        data = _jpeg(_open(upload), max_side, quality)
+    except (UnidentifiedImageError, OSError, SyntaxError) as e:
+        raise ValueError(f"Unreadable image: {e}")
+    return ContentFile(data, name=f"{PurePath(upload.name).stem or 'capture'}.jpg")
+
+
+def validate_image(upload):
+    try:
+        _open(upload)
+    except (UnidentifiedImageError, OSError, SyntaxError) as e:
+        raise ValueError(f"Unreadable image: {e}")
+    upload.seek(0)
+
+
+def make_thumbnail(photo_id):
+    """Write the thumbnail of one photo and point the latest heartbeat capture at it."""
+    photo = ProctoringPhoto.objects.select_related("test_assignment", "duplicate_of").get(id=photo_id)
+    if not photo.thumbnail:
+        if photo.duplicate_of and photo.duplicate_of.thumbnail:
+            photo.thumbnail.name = photo.duplicate_of.thumbnail.name  # shared file, shared thumbnail
+        else:
+            with photo.image.open("rb") as source:
+                data = _jpeg(Image.open(source), max(THUMBNAIL_SIZE), 70)
+            photo.thumbnail.save(f"{PurePath(photo.image.name).stem}_thumb.jpg", ContentFile(data), save=False)
+        photo.save(update_fields=["thumbnail"])
+
+    url_field = {"face": "last_face_photo_url", "screen": "last_screen_photo_url"}.get(photo.photo_type)
+    if url_field:
+        ProctoringHeartbeat.objects.filter(
+            assignment_id=photo.test_assignment_id, **{url_field: photo.image.url}
+        ).update(**{url_field.replace("photo_url", "thumbnail_url"): photo.thumbnail.url})
+
+    live_events.publish(photo.test_assignment.test_id, "capture", {
+        "assignment_id": photo.test_assignment_id,
+        "photo_type": photo.photo_type,
+        "context": photo.context,
+        "url": photo.image.url,
+        "thumbnail_url": photo.thumbnail.url,
+    })
+    return photo.thumbnail.name
+
+
+def _thumbnail_job(photo_id):
+    try:
+        make_thumbnail(photo_id)
+    except Exception as e:
+        print(f"⚠️ Thumbnail failed for photo {photo_id}:", e)
+    finally:
+        close_old_connections()
+
+
+def _get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=getattr(settings, "PHOTO_THUMBNAIL_WORKERS", 2),
+                thread_name_prefix="photo-thumbnails",
+            )
+        return _executor
+
+
+def schedule_thumbnail(photo_id):
+    """Queue the thumbnail once the photo row is committed."""
+    transaction.on_commit(lambda: _get_executor().submit(_thumbnail_job, photo_id))
@@ -0,0 +1,100 @@
+"""
+Proctoring readiness (check_ready) in one query.
+
+The static side, meaning a test's TestProctoringConfig and the requirements block sent to
+the setup page, is cached in-process per test for PROCTORING_CONFIG_CACHE_SECONDS. The
+admin invalidates it on save and delete; other processes pick up edits when the TTL runs
+out. The per-candidate side (assignment, candidate, consent, initial photos) is a
+single TestAssignment query with one Exists() annotation per requirement, so the setup
+page can poll cheaply.
+"""
+import threading
+import time
+
+from django.conf import settings
+from django.db.models import Exists, OuterRef
+
+from test_engine.models import Candidate, TestAssignment
+from ..models import CandidateConsent, ProctoringPhoto, TestProctoringConfig
+
+
+INITIAL_PHOTOS = ("face", "signature", "id")
+
+_configs = {}
+_configs_lock = threading.Lock()
+
+
+def _load(test_id):
+    config = TestProctoringConfig.objects.filter(test_id=test_id).first()
+    if config is None:
+        return None
+    allowed_id_documents = list(config.allowed_id_documents.values("id", "name"))
+    return {
+        "consent_required": config.consent_required,
+        "required_photos": [
+            photo_type for photo_type, required in (
+                ("face", config.require_face_photo),
+                ("signature", config.require_signature_photo),
+                ("id", config.require_id_photo and bool(allowed_id_documents)),
+            ) if required
+        ],
+        "max_upload_size_mb": config.max_upload_size_mb,
+        "quality_profile": config.quality_profile,
+        "requirements": {
+            "consent_required": config.consent_required,
+            "consent_text": config.consent_text if config.consent_required else "",
+            "require_face_photo_initial": config.require_face_photo,
+            "require_id_photo_initial": config.require_id_photo,
+            "require_signature_photo_initial": config.require_signature_photo,
+            "allow_file_upload": config.allow_file_upload_fallback,
+            "require_final_photo": config.require_final_photo,
+            "require_face_photo_periodic": config.require_face_photo_periodic,
+            "require_screen_capture_periodic": config.require_screen_capture_periodic,
+            "periodic_face_capture_sec": config.periodic_face_capture_sec,
+            "periodic_screen_capture_sec": config.periodic_screen_capture_sec,
+            "violation_boost_factor": config.violation_boost_factor,
+            "max_upload_size_mb": config.max_upload_size_mb,
+            "quality_profile": config.quality_profile,
+            "allow_file_upload_fallback": config.allow_file_upload_fallback,
+            "live_admin_override": config.live_admin_override,
+            "allowed_id_documents": allowed_id_documents,
+        },
+    }
+
+
+def proctoring_config(test_id):
+    """Cached summary of a test's proctoring config, or None when the test is not proctored."""
+    test_id = int(test_id)
+    now = time.monotonic()
+    with _configs_lock:
+        cached = _configs.get(test_id)
+        if cached and cached[1] > now:
+            return cached[0]
+
+    config = _load(test_id)
+    with _configs_lock:
+        _configs[test_id] = (config, now + getattr(settings, "PROCTORING_CONFIG_CACHE_SECONDS", 60))
+    return config
+
+
+def invalidate_config(test_id=None):
+    """Drop one test's cached config, or all of them (e.g. an ID document type was renamed)."""
+    with _configs_lock:
+        if test_id is None:
+            _configs.clear()
+        else:
+            _configs.pop(int(test_id), None)
+
+
+def readiness_row(assignment_id, candidate_id):
+    """{"test_id", "candidate_exists", "has_consent", "has_face", "has_signature", "has_id"} or None."""
+    photos = ProctoringPhoto.objects.filter(
+        candidate_id=candidate_id, test_assignment=OuterRef("pk"), context="initial"
+    )
+    return TestAssignment.objects.filter(id=assignment_id).annotate(
+        candidate_exists=Exists(Candidate.objects.filter(id=candidate_id)),
+        has_consent=Exists(CandidateConsent.objects.filter(
+            candidate_id=candidate_id, test_assignment=OuterRef("pk"), agreed=True
+        )),
+        **{f"has_{photo_type}": Exists(photos.filter(photo_type=photo_type)) for photo_type in INITIAL_PHOTOS},
+    ).values("test_id", "candidate_exists", "has_consent", *(f"has_{t}" for t in INITIAL_PHOTOS)).first()
@@ -0,0 +1,191 @@
+"""
+Tiered retention for proctoring media and events (`manage.py apply_retention`).
+
+Per test, using its ProctoringRetentionPolicy (or the model defaults):
+1. periodic captures older than `downsample_after_days` are thinned to one per
+   `downsample_interval_minutes` per assignment and photo type;
+2. photos older than `periodic_keep_days` are dropped unless they are initial or
+   violation captures, which are kept long-term;
+3. raw violation events older than `violation_rollup_days` are folded into
+   ProctoringViolationSummary rows (one per attempt and type) and deleted;
+4. once an assignment's newest photo is older than `archive_after_days`, its remaining
+   photos are packed into one zip per assignment under `proctoring_archives/` and the
+   rows point at the archive.
+
+Files can be shared between rows (proctoring/utils/capture_store.py), so a file is only
+deleted once no live row references it. Each step works in batches and can be re-run.
+"""
+import json
+import tempfile
+import zipfile
+from collections import Counter
+from datetime import timedelta
+
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.db.models import Count, Max, Min, Sum, F
+from django.utils import timezone
+
+from test_engine.models import Test
+from ..models import ProctoringPhoto, ProctoringRetentionPolicy, ProctoringViolation, ProctoringViolationSummary
+from .capture_store import referenced_names
+
+
+LONG_TERM_CONTEXTS = ("initial", "violation")
+BATCH_SIZE = 500
+ARCHIVE_PREFIX = "proctoring_archives"
+
+
+def _chunks(items, size=BATCH_SIZE):
+    items = list(items)
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def _delete_photos(ids, stats):
+    """Delete photo rows, then whichever of their files nothing else references."""
+    for chunk in _chunks(ids):
+        names = set()
+        for image, thumbnail in ProctoringPhoto.objects.filter(id__in=chunk).values_list("image", "thumbnail"):
+            names.update(name for name in (image, thumbnail) if name)
+        stats["photos_deleted"] += ProctoringPhoto.objects.filter(id__in=chunk).delete()[1].get(
+            ProctoringPhoto._meta.label, 0
+        )
+        _delete_unreferenced(names, stats)
+
+
+def _delete_unreferenced(names, stats):
+    for name in set(names) - referenced_names(names):
+        if default_storage.exists(name):
+            default_storage.delete(name)
+            stats["files_deleted"] += 1
+
+
+def downsample_periodic(test_id, policy, now, stats):
+    cutoff = now - timedelta(days=policy.downsample_after_days)
+    interval = timedelta(minutes=policy.downsample_interval_minutes)
+    drop = []
+    last_kept = {}
+    rows = ProctoringPhoto.objects.filter(
+        test_assignment__test_id=test_id, context="periodic", archive_name="", created_at__lt=cutoff
+    ).order_by("test_assignment_id", "photo_type", "created_at").values_list(
+        "id", "test_assignment_id", "photo_type", "created_at"
+    )
+    for photo_id, assignment_id, photo_type, created_at in rows.iterator(chunk_size=2000):
+        key = (assignment_id, photo_type)
+        if key in last_kept and created_at - last_kept[key] < interval:
+            drop.append(photo_id)
+        else:
+            last_kept[key] = created_at
+    _delete_photos(drop, stats)
+
+
+def expire_short_term(test_id, policy, now, stats):
+    cutoff = now - timedelta(days=policy.periodic_keep_days)
+    ids = ProctoringPhoto.objects.filter(
+        test_assignment__test_id=test_id, archive_name="", created_at__lt=cutoff
+    ).exclude(context__in=LONG_TERM_CONTEXTS).values_list("id", flat=True)
+    _delete_photos(ids, stats)
+
+
+def rollup_violations(test_id, policy, now, stats):
+    cutoff = now - timedelta(days=policy.violation_rollup_days)
+    raw = ProctoringViolation.objects.filter(assignment__test_id=test_id, timestamp__lt=cutoff)
+    with transaction.atomic():
+        groups = list(raw.values("assignment_id", "attempt_number", "violation_type").annotate(
+            events=Count("id"), total=Sum("severity"), worst=Max("severity"),
+            first=Min("timestamp"), last=Max("timestamp"),
+        ))
+        if not groups:
+            return
+        existing = {
+            (s.assignment_id, s.attempt_number, s.violation_type): s
+            for s in ProctoringViolationSummary.objects.select_for_update().filter(
+                assignment_id__in={g["assignment_id"] for g in groups}
+            )
+        }
+        created, updated = [], []
+        for g in groups:
+            key = (g["assignment_id"], g["attempt_number"], g["violation_type"])
+            summary = existing.get(key)
+            if summary is None:
+                created.append(ProctoringViolationSummary(
+                    assignment_id=key[0], attempt_number=key[1], violation_type=key[2],
+                    event_count=g["events"], severity_total=g["total"] or 0, max_severity=g["worst"] or 0,
+                    first_at=g["first"], last_at=g["last"],
+                ))
+                continue
+            summary.event_count = F("event_count") + g["events"]
+            summary.severity_total = F("severity_total") + (g["total"] or 0)
+            summary.max_severity = max(summary.max_severity, g["worst"] or 0)
+            summary.first_at = min(summary.first_at, g["first"])
+            summary.last_at = max(summary.last_at, g["last"])
+            updated.append(summary)
+        ProctoringViolationSummary.objects.bulk_create(created)
+        ProctoringViolationSummary.objects.bulk_update(
+            updated, ["event_count", "severity_total", "max_severity", "first_at", "last_at"]
+        )
+        stats["violations_rolled_up"] += raw.delete()[0]
+        stats["violation_summaries"] += len(created)
+
+
+def _archive_assignment(test_id, assignment_id, stats):
+    photos = list(ProctoringPhoto.objects.filter(test_assignment_id=assignment_id, archive_name="").order_by("id"))
+    if not photos:
+        return
+    members, manifest, names = {}, [], set()
+    with tempfile.TemporaryFile() as tmp:
+        with zipfile.ZipFile(tmp, "w", compression=zipfile.ZIP_DEFLATED) as archive:
+            for photo in photos:
+                names.update(name for name in (photo.image.name, photo.thumbnail.name if photo.thumbnail else "") if name)
+                member = members.get(photo.image.name)
+                if member is None and default_storage.exists(photo.image.name):
+                    member = f"{photo.id}_{photo.photo_type}_{photo.context}.jpg"
+                    with default_storage.open(photo.image.name, "rb") as source:
+                        archive.writestr(member, source.read())
+                    members[photo.image.name] = member
+                manifest.append({
+                    "id": photo.id, "photo_type": photo.photo_type, "context": photo.context,
+                    "created_at": photo.created_at.isoformat(), "member": member, "sha256": photo.sha256,
+                })
+            archive.writestr("manifest.json", json.dumps(manifest, indent=2))
+        tmp.seek(0)
+        archive_name = default_storage.save(
+            f"{ARCHIVE_PREFIX}/test_{test_id}/assignment_{assignment_id}.zip", File(tmp)
+        )
+
+    for photo in photos:
+        photo.archive_name = archive_name
+        photo.image = members.get(photo.image.name, "")
+        photo.thumbnail = None
+    ProctoringPhoto.objects.bulk_update(photos, ["archive_name", "image", "thumbnail"])
+    stats["photos_archived"] += len(photos)
+    stats["archives_written"] += 1
+    _delete_unreferenced(names, stats)
+
+
+def archive_media(test_id, policy, now, stats):
+    cutoff = now - timedelta(days=policy.archive_after_days)
+    assignment_ids = ProctoringPhoto.objects.filter(
+        test_assignment__test_id=test_id, archive_name=""
+    ).values("test_assignment_id").annotate(newest=Max("created_at")).filter(
+        newest__lt=cutoff
+    ).values_list("test_assignment_id", flat=True)
+    for assignment_id in list(assignment_ids):
+        _archive_assignment(test_id, assignment_id, stats)
+
+
+def apply_retention(test_ids=None, now=None):
+    """Run every step for each test (or only `test_ids`); returns counters."""
+    now = now or timezone.now()
+    tests = Test.objects.all() if test_ids is None else Test.objects.filter(id__in=list(test_ids))
+    policies = {p.test_id: p for p in ProctoringRetentionPolicy.objects.filter(test__in=tests)}
+    stats = Counter()
+    for test_id in tests.values_list("id", flat=True):
+        policy = policies.get(test_id) or ProctoringRetentionPolicy(test_id=test_id)
+        downsample_periodic(test_id, policy, now, stats)
+        expire_short_term(test_id, policy, now, stats)
+        rollup_violations(test_id, policy, now, stats)
+        archive_media(test_id, policy, now, stats)
+    return stats
@@ -0,0 +1,123 @@
+"""
+Proctoring state transitions for one candidate attempt.
+
+An attempt's state lives in three rows: CandidateTestSession (completed flag), the
+attempt's ProctoringHeartbeat (candidate_status, capture URLs) and the assignment's
+LiveProctoringStatus. The views go through these functions instead of loading and
+saving the rows themselves. Each transition is one conditional UPDATE per row, carrying
+only the fields it changes and guarded on the current state, so a repeated or concurrent
+submit is a no-op instead of another round of writes. Heartbeats are always addressed by
+(assignment, attempt_number).
+
+The browser's ProctoringSession token row is updated the same way.
+"""
+from django.db.models import F, Q
+from django.utils import timezone
+
+from test_engine.models import CandidateTestSession
+from ..models import LiveProctoringStatus, ProctoringHeartbeat, ProctoringSession
+from . import heartbeats, live_events, live_status
+
+
+CAPTURE_FIELDS = {
+    "face": ("last_face_photo_url", "last_face_timestamp", "last_face_capture_ok"),
+    "screen": ("last_screen_photo_url", "last_screen_timestamp", "last_screen_ok"),
+}
+
+
+def _update_heartbeat(assignment_id, attempt_number, changes, guard=None):
+    """UPDATE the attempt's heartbeat, creating it when missing. Returns rows changed."""
+    rows = ProctoringHeartbeat.objects.filter(assignment_id=assignment_id, attempt_number=attempt_number)
+    updated = (rows.filter(guard) if guard is not None else rows).update(**changes)
+    if updated or (guard is not None and rows.exists()):
+        return updated
+    ProctoringHeartbeat.objects.create(assignment_id=assignment_id, attempt_number=attempt_number, **changes)
+    return 1
+
+
+def start_attempt(assignment_id, attempt_number, started_at=None):
+    started_at = started_at or timezone.now()
+    heartbeats.forget_attempt(assignment_id)
+    _update_heartbeat(assignment_id, attempt_number, {
+        "candidate_status": "in_progress", "test_started_at": started_at, "last_seen": started_at,
+    })
+    live_status.start_attempt(assignment_id, attempt_number, started_at)
+
+
+def mark_heartbeat_completed(assignment_id, attempt_number, completed_at=None, test_id=None):
+    """Close the attempt's proctoring window. Returns False when it was already closed."""
+    completed_at = completed_at or timezone.now()
+    if not _update_heartbeat(
+        assignment_id, attempt_number,
+        {"candidate_status": "completed", "test_completed_at": completed_at, "last_seen": completed_at},
+        guard=~Q(candidate_status="completed"),
+    ):
+        return False
+    LiveProctoringStatus.objects.filter(assignment_id=assignment_id, attempt_number=attempt_number).update(
+        candidate_status="completed", test_completed_at=completed_at, updated_at=timezone.now()
+    )
+    if live_events.publishing_enabled():
+        live_events.publish(test_id or live_events.assignment_test_id(assignment_id), "test_completed", {
+            "assignment_id": assignment_id,
+            "attempt_number": attempt_number,
+            "test_completed_at": completed_at,
+        })
+    heartbeats.forget_attempt(assignment_id)
+    return True
+
+
+def complete_attempt(session, completed_at=None, test_id=None):
+    """
+    Mark the session completed and close its proctoring window. Returns False (and writes
+    nothing else) when the session was already completed.
+
+    Completion is terminal, so it is guarded on `completed` rather than on the session's
+    version: it wins over any transition still in flight, and its version bump makes those lose.
+    """
+    completed_at = completed_at or timezone.now()
+    if not CandidateTestSession.objects.filter(id=session.id, completed=False).update(
+        completed=True, test_completed_at=completed_at, version=F("version") + 1
+    ):
+        return False
+    session.completed, session.test_completed_at = True, completed_at
+    mark_heartbeat_completed(session.assignment_id, session.attempt_number, completed_at, test_id)
+    return True
+
+
+def record_capture(assignment_id, photo_type, url, ok=True, attempt_number=None):
+    """Point the attempt's heartbeat at the latest face/screen capture."""
+    if photo_type not in CAPTURE_FIELDS:
+        return
+    if attempt_number is None:
+        # no open session (e.g. the final photo after completion): the latest attempt's row
+        attempt_number = heartbeats.active_attempt(assignment_id) or heartbeats.latest_attempt(assignment_id)
+    now = timezone.now()
+    url_field, timestamp_field, ok_field = CAPTURE_FIELDS[photo_type]
+    _update_heartbeat(assignment_id, attempt_number, {
+        url_field: url, timestamp_field: now, ok_field: ok, "last_seen": now,
+    })
+
+
+def resume_proctoring_session(candidate_id, assignment_id):
+    """(ProctoringSession, created); reactivates an existing session in one UPDATE."""
+    session, created = ProctoringSession.objects.get_or_create(
+        candidate_id=candidate_id, test_assignment_id=assignment_id,
+    )
+    if not created and (not session.is_active or session.ended_at):
+        ProctoringSession.objects.filter(id=session.id).update(is_active=True, ended_at=None)
+        session.is_active, session.ended_at = True, None
+    return session, created
+
+
+def update_proctoring_session(session_token, camera_ok=None, screen_ok=None, fullscreen=None):
+    """Apply the flags that were sent; returns the heartbeat time, or None for an unknown token."""
+    now = timezone.now()
+    changes = {"last_heartbeat": now}
+    for field, value in (
+        ("camera_streaming_ok", camera_ok), ("screen_sharing_ok", screen_ok), ("fullscreen_mode", fullscreen)
+    ):
+        if value is not None:
+            changes[field] = value
+    if not ProctoringSession.objects.filter(session_token=session_token).update(**changes):
+        return None
+    return now
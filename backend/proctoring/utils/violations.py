@@ -0,0 +1,136 @@
+"""
+Batched violation ingestion.
+
+`record_violations()` takes a list of timestamped events for one assignment, merges
+repeats of the same type that arrive within `VIOLATION_MERGE_WINDOW_SECONDS` of each
+other (the same window the frontend queue uses), inserts the merged events with one
+bulk_create and applies every counter change to the attempt's heartbeat with a single
+F() UPDATE (plus one for the live monitoring row).
+
+Each merged group adds its highest severity once, so a burst of tab switches is not
+scored as dozens of separate violations; the raw event count is kept in the event's
+metadata and in the heartbeat's failure/exit counters.
+"""
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from ..models import ProctoringViolation, ProctoringHeartbeat
+from . import live_events, live_status
+from .heartbeats import active_attempt
+
+
+CAMERA_FAILURES = {"camera_lost", "camera_capture_failed"}
+SCREEN_FAILURES = {"screen_lost", "screen_capture_failed"}
+
+
+def merge_window():
+    return timedelta(seconds=getattr(settings, "VIOLATION_MERGE_WINDOW_SECONDS", 2))
+
+
+def parse_event_time(value, default):
+    """ISO-8601 string or epoch milliseconds (Date.now()); falls back to `default`."""
+    if value in (None, ""):
+        return default
+    if isinstance(value, (int, float)):
+        try:
+            return datetime.fromtimestamp(value / 1000, tz=dt_timezone.utc)
+        except (OverflowError, OSError, ValueError):
+            raise ValueError(f"Timestamp out of range: {value}")
+    parsed = parse_datetime(str(value))
+    if parsed is None:
+        raise ValueError(f"Invalid timestamp: {value}")
+    if timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed, dt_timezone.utc)
+    return parsed
+
+
+def merge_events(events, window=None):
+    """
+    `events`: dicts with type, severity, metadata, timestamp (datetime).
+    Returns groups ordered by first occurrence; a repeat of the same type joins its group
+    when it happens within `window` of that group's latest event.
+    """
+    window = merge_window() if window is None else window
+    groups = []
+    open_groups = {}
+    for event in sorted(events, key=lambda e: e["timestamp"]):
+        group = open_groups.get(event["type"])
+        if group and event["timestamp"] - group["last_at"] <= window:
+            group["count"] += 1
+            group["severity"] = max(group["severity"], event["severity"])
+            group["last_at"] = event["timestamp"]
+            continue
+        group = {
+            "type": event["type"],
+            "severity": event["severity"],
+            "metadata": event["metadata"],
+            "first_at": event["timestamp"],
+            "last_at": event["timestamp"],
+            "count": 1,
+        }
+        groups.append(group)
+        open_groups[event["type"]] = group
+    return groups
+
+
+def record_violations(assignment_id, events, attempt_number=None, test_id=None):
+    """Persist a batch of events for one assignment. Returns the merged groups."""
+    groups = merge_events(events)
+    if not groups:
+        return groups
+    if attempt_number is None:
+        attempt_number = active_attempt(assignment_id) or 1
+
+    violations = []
+    for group in groups:
+        metadata = dict(group["metadata"] or {})
+        metadata["client_timestamp"] = group["first_at"].isoformat()
+        if group["count"] > 1:
+            metadata["merged_count"] = group["count"]
+            metadata["last_timestamp"] = group["last_at"].isoformat()
+        violations.append(ProctoringViolation(
+            assignment_id=assignment_id,
+            attempt_number=attempt_number,
+            violation_type=group["type"],
+            severity=group["severity"],
+            metadata=metadata,
+        ))
+
+    fullscreen_exits = [g for g in groups if g["type"] == "fullscreen_exit"]
+    severity = sum(g["severity"] for g in groups if g["type"] != "fullscreen_exit")
+    camera_failures = sum(g["count"] for g in groups if g["type"] in CAMERA_FAILURES)
+    screen_failures = sum(g["count"] for g in groups if g["type"] in SCREEN_FAILURES)
+
+    changes = {"last_seen": timezone.now()}
+    if severity:
+        changes["severity_score"] = F("severity_score") + severity
+    if fullscreen_exits:
+        changes["fullscreen_ok"] = False
+        changes["fullscreen_exit_time"] = fullscreen_exits[-1]["last_at"]
+        changes["total_fullscreen_exits"] = F("total_fullscreen_exits") + sum(g["count"] for g in fullscreen_exits)
+    if camera_failures:
+        changes["total_camera_failures"] = F("total_camera_failures") + camera_failures
+    if screen_failures:
+        changes["total_screen_failures"] = F("total_screen_failures") + screen_failures
+
+    with transaction.atomic():
+        ProctoringViolation.objects.bulk_create(violations)
+        heartbeats = ProctoringHeartbeat.objects.filter(assignment_id=assignment_id, attempt_number=attempt_number)
+        if not heartbeats.update(**changes):
+            ProctoringHeartbeat.objects.create(assignment_id=assignment_id, attempt_number=attempt_number)
+            heartbeats.update(**changes)
+        live_status.apply_violations(assignment_id, attempt_number, groups)
+        live_events.publish(test_id or live_events.assignment_test_id(assignment_id), "violations", {
+            "assignment_id": int(assignment_id),
+            "attempt_number": attempt_number,
+            "events": [
+                {"type": g["type"], "severity": g["severity"], "count": g["count"], "at": g["first_at"]}
+                for g in groups
+            ],
+        })
+    return groups
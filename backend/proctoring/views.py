@@ -1,4 +1,5 @@
-from rest_framework.decorators import api_view
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.permissions import IsAdminUser
 
 from rest_framework.response import Response
 from rest_framework import status
@@ -6,11 +7,15 @@ from proctoring.models import (
     TestProctoringConfig,
     IDDocumentType,
     CandidateConsent,
-    ProctoringPhoto, ProctoringViolation, ProctoringSession, ProctoringHeartbeat
+    ProctoringPhoto, ProctoringViolation, ProctoringSession, LiveProctoringStatus
 )
 from test_engine.models import Candidate, TestAssignment, CandidateTestSession, TestAssignment, SectionStatus
 
 from django.utils import timezone
+from proctoring.utils import capture_store, heartbeats, photos, readiness, state, violations
+
+
+MAX_VIOLATION_BATCH = 500
 
 
 @api_view(["GET"])
@@ -83,6 +88,14 @@ def submit_consent(request):
 
 @api_view(["POST"])
 def upload_photo(request):
+    # Cap the upload before the body is parsed. Clients put assignment_id in the query
+    # string so the test's own limit applies while streaming.
+    query_assignment = request.query_params.get("assignment_id", "")
+    limiter = photos.SizeLimitedUploadHandler(
+        photos.upload_limit_bytes(int(query_assignment) if query_assignment.isdigit() else None)
+    )
+    request.upload_handlers.insert(0, limiter)
+
     candidate_id = request.POST.get("candidate_id")
     assignment_id = request.POST.get("assignment_id")
     photo_type = request.POST.get("photo_type")
@@ -90,6 +103,10 @@ def upload_photo(request):
     image = request.FILES.get("image")
     context = request.POST.get("context", "initial")
 
+    if limiter.exceeded:
+        return Response({"error": f"Image larger than {limiter.max_bytes // (1024 * 1024)} MB"},
+                        status=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE)
+
     if not all([candidate_id, assignment_id, photo_type, image]):
         return Response({"error": "Missing required fields"}, status=status.HTTP_400_BAD_REQUEST)
 
@@ -113,7 +130,20 @@ def upload_photo(request):
         except IDDocumentType.DoesNotExist:
             return Response({"error": "Invalid ID document type"}, status=status.HTTP_404_NOT_FOUND)
 
-    photo_obj = ProctoringPhoto.objects.create(
+    max_bytes = photos.upload_limit_bytes(assignment.id)
+    if image.size > max_bytes:
+        return Response({"error": f"Image larger than {max_bytes // (1024 * 1024)} MB"},
+                        status=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE)
+
+    try:
+        if photo_type in photos.REENCODED_TYPES:
+            image = photos.reencode(image, photos.quality_profile(assignment.test_id))
+        else:
+            photos.validate_image(image)
+    except ValueError as e:
+        return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+    photo_obj = ProctoringPhoto(
         candidate=candidate,
         test_assignment=assignment,
         photo_type=photo_type,
@@ -122,15 +152,15 @@ def upload_photo(request):
         context=context,
         quality_self_declared=True
     )
+    if photo_type in photos.REENCODED_TYPES:
+        capture_store.assign(photo_obj, image)  # stores unique content once
+    photo_obj.save()
 
-    # 🟢 Update heartbeat
-    heartbeat, _ = ProctoringHeartbeat.objects.get_or_create(assignment=assignment)
-    photo_url = photo_obj.image.url
+    # 🟢 Update the attempt's heartbeat
+    state.record_capture(assignment.id, photo_type, photo_obj.image.url)
 
-    if photo_type == "face":
-        heartbeat.update_face_capture(photo_url, ok=True)
-    elif photo_type == "screen":
-        heartbeat.update_screen_capture(photo_url, ok=True)
+    # Thumbnail off the request; the live monitor hears about the capture once it exists
+    photos.schedule_thumbnail(photo_obj.id)
 
     return Response({"status": "photo_uploaded"})
 
@@ -143,15 +173,13 @@ def check_ready(request):
     if not assignment_id or not candidate_id:
         return Response({"error": "assignment_id and candidate_id are required"}, status=status.HTTP_400_BAD_REQUEST)
 
-    try:
-        assignment = TestAssignment.objects.select_related("test").get(id=assignment_id)
-        candidate = Candidate.objects.get(id=candidate_id)
-    except (TestAssignment.DoesNotExist, Candidate.DoesNotExist):
+    # One query for the candidate's side; the config is cached per test
+    row = readiness.readiness_row(assignment_id, candidate_id)
+    if row is None or not row["candidate_exists"]:
         return Response({"error": "Invalid assignment_id or candidate_id"}, status=status.HTTP_404_NOT_FOUND)
 
-    try:
-        config = TestProctoringConfig.objects.get(test=assignment.test)
-    except TestProctoringConfig.DoesNotExist:
+    config = readiness.proctoring_config(row["test_id"])
+    if config is None:
         # Proctoring not required
         return Response({
             "ready": True,
@@ -160,21 +188,9 @@ def check_ready(request):
         })
 
     missing = []
-    photos = ProctoringPhoto.objects.filter(candidate=candidate, test_assignment=assignment)
-
-    # Consent check
-    if config.consent_required and not CandidateConsent.objects.filter(candidate=candidate, test_assignment=assignment, agreed=True).exists():
+    if config["consent_required"] and not row["has_consent"]:
         missing.append("consent")
-
-    # Required photos check
-    if config.require_face_photo and not photos.filter(photo_type="face", context="initial").exists():
-        missing.append("face")
-
-    if config.require_signature_photo and not photos.filter(photo_type="signature", context="initial").exists():
-        missing.append("signature")
-
-    if config.require_id_photo and config.allowed_id_documents.exists() and not photos.filter(photo_type="id", context="initial").exists():
-        missing.append("id")
+    missing += [photo_type for photo_type in config["required_photos"] if not row[f"has_{photo_type}"]]
 
     reason = "initial_proctoring_not_completed" if missing else "proctoring_ready"
     return Response({
@@ -182,25 +198,7 @@ def check_ready(request):
         "enforce_proctoring": True,
         "missing": missing,
         "reason": reason,
-        "requirements": {
-            "consent_required": config.consent_required,
-            "consent_text": config.consent_text if config.consent_required else "",
-            "require_face_photo_initial": config.require_face_photo,
-            "require_id_photo_initial": config.require_id_photo,
-            "require_signature_photo_initial": config.require_signature_photo,
-            "allow_file_upload": config.allow_file_upload_fallback,
-            "require_final_photo": config.require_final_photo,
-            "require_face_photo_periodic": config.require_face_photo_periodic,
-            "require_screen_capture_periodic": config.require_screen_capture_periodic,
-            "periodic_face_capture_sec": config.periodic_face_capture_sec,
-            "periodic_screen_capture_sec": config.periodic_screen_capture_sec,
-            "violation_boost_factor": config.violation_boost_factor,
-            "max_upload_size_mb": config.max_upload_size_mb,
-            "quality_profile": config.quality_profile,
-            "allow_file_upload_fallback": config.allow_file_upload_fallback,
-            "live_admin_override": config.live_admin_override,
-            "allowed_id_documents": list(config.allowed_id_documents.values("id", "name")),
-        }
+        "requirements": config["requirements"],
     })
 
 
@@ -218,16 +216,7 @@ def start_proctoring_session(request):
     except (Candidate.DoesNotExist, TestAssignment.DoesNotExist):
         return Response({"error": "Invalid candidate or assignment_id"}, status=status.HTTP_404_NOT_FOUND)
 
-    session, created = ProctoringSession.objects.get_or_create(
-        candidate=candidate,
-        test_assignment=assignment,
-        defaults={"started_at": timezone.now()}
-    )
-
-    if not created:
-        session.is_active = True
-        session.ended_at = None
-        session.save()
+    session, created = state.resume_proctoring_session(candidate.id, assignment.id)
 
     return Response({
         "status": "started" if created else "resumed",
@@ -246,18 +235,11 @@ def update_proctoring_status(request):
     if not session_token:
         return Response({"error": "Missing session_token"}, status=status.HTTP_400_BAD_REQUEST)
 
-    try:
-        session = ProctoringSession.objects.get(session_token=session_token)
-    except ProctoringSession.DoesNotExist:
+    last_heartbeat = state.update_proctoring_session(session_token, camera_ok, screen_ok, fullscreen)
+    if last_heartbeat is None:
         return Response({"error": "Invalid session_token"}, status=status.HTTP_404_NOT_FOUND)
 
-    session.camera_streaming_ok = camera_ok if camera_ok is not None else session.camera_streaming_ok
-    session.screen_sharing_ok = screen_ok if screen_ok is not None else session.screen_sharing_ok
-    session.fullscreen_mode = fullscreen if fullscreen is not None else session.fullscreen_mode
-    session.last_heartbeat = timezone.now()
-    session.save()
-
-    return Response({"status": "updated", "last_heartbeat": session.last_heartbeat})
+    return Response({"status": "updated", "last_heartbeat": last_heartbeat})
 
 
 
@@ -285,85 +267,131 @@ def check_proctoring_status(request):
         "ended_at": session.ended_at
     })
 
+def _parse_violation_event(data, now):
+    violation_type = data.get("type")
+    if not violation_type:
+        raise ValueError("Missing violation type")
+    return {
+        "type": violation_type,
+        "severity": int(data.get("severity", 1)),
+        "metadata": data.get("metadata") or {},
+        "timestamp": violations.parse_event_time(data.get("timestamp"), now),
+    }
+
+
 @api_view(["POST"])
 def log_violation(request):
     try:
         assignment_id = request.data.get("assignment_id")
         violation_type = request.data.get("type")
-        metadata = request.data.get("metadata", {})
-        severity = int(request.data.get("severity", 1))
 
         if not all([assignment_id, violation_type]):
             return Response({"error": "Missing assignment_id or violation type"}, status=status.HTTP_400_BAD_REQUEST)
 
-        # Create violation record
-        violation = ProctoringViolation.objects.create(
-            assignment_id=assignment_id,
-            violation_type=violation_type,
-            severity=severity,
-            metadata=metadata
-        )
-
-        # Update heartbeat
-        heartbeat, _ = ProctoringHeartbeat.objects.get_or_create(assignment_id=assignment_id)
-        heartbeat.last_seen = violation.timestamp  # Optional: or use timezone.now()
-
-        # Handle specific violation effects
-        if violation_type == "fullscreen_exit":
-            heartbeat.mark_fullscreen_exit()
-        else:
-            heartbeat.increment_severity(severity)
+        violations.record_violations(assignment_id, [_parse_violation_event(request.data, timezone.now())])
 
         return Response({"status": "logged"}, status=status.HTTP_201_CREATED)
 
     except Exception as e:
         return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
+
+@api_view(["POST"])
+def log_violations(request):
+    """
+    Accepts JSON: {
+        "assignment_id": int,
+        "events": [{"type": str, "severity": int, "metadata": {}, "timestamp": ISO-8601 or epoch ms}, ...]
+    }
+    Repeats of the same type within the merge window are stored as one event.
+    """
+    assignment_id = request.data.get("assignment_id")
+    events = request.data.get("events")
+
+    if not assignment_id or not isinstance(events, list):
+        return Response({"error": "Missing assignment_id or events"}, status=status.HTTP_400_BAD_REQUEST)
+    try:
+        assignment_id = int(assignment_id)
+    except (TypeError, ValueError):
+        return Response({"error": "Invalid assignment_id"}, status=status.HTTP_400_BAD_REQUEST)
+    if len(events) > MAX_VIOLATION_BATCH:
+        return Response({"error": f"At most {MAX_VIOLATION_BATCH} events per batch"}, status=status.HTTP_400_BAD_REQUEST)
+
+    now = timezone.now()
+    try:
+        parsed = [_parse_violation_event(event, now) for event in events]
+    except (AttributeError, TypeError, ValueError) as e:
+        return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+    test_id = TestAssignment.objects.filter(id=assignment_id).values_list("test_id", flat=True).first()
+    if test_id is None:
+        return Response({"error": "Invalid assignment_id"}, status=status.HTTP_404_NOT_FOUND)
+
+    groups = violations.record_violations(assignment_id, parsed, test_id=test_id)
+    return Response({"status": "logged", "received": len(parsed), "stored": len(groups)}, status=status.HTTP_201_CREATED)
+
 @api_view(["POST"])
 def update_heartbeat(request):
     """
     Accepts JSON: {
         "assignment_id": int,
-        "session_token": str,
+        "session_token": str (ignored, kept for older clients),
         "screen_ok": bool,
         "fullscreen_ok": bool (optional),
         "reason": str (optional)
     }
+    Beats are coalesced in memory and written out periodically (proctoring/utils/heartbeats.py).
     """
     assignment_id = request.data.get("assignment_id")
-    session_token = request.data.get("session_token")
     screen_ok = request.data.get("screen_ok")
     fullscreen_ok = request.data.get("fullscreen_ok")
-    reason = request.data.get("reason", "heartbeat update")
 
     if not assignment_id or screen_ok is None:
         return Response({"error": "Missing required fields"}, status=400)
 
     try:
-        session = CandidateTestSession.objects.get(
-            assignment_id=assignment_id,
-            session_token=session_token,
-            completed=False,
-        )
-    except CandidateTestSession.DoesNotExist:
+        attempt_number = heartbeats.active_attempt(assignment_id)
+    except (TypeError, ValueError):
+        return Response({"error": "Invalid assignment_id"}, status=400)
+    if attempt_number is None:
         return Response({"error": "Active session not found"}, status=404)
 
-    # Save heartbeat update on session
-    session.last_seen = timezone.now()
-    session.screen_ok = bool(screen_ok)
-    session.save(update_fields=["last_seen", "screen_ok"])
+    heartbeats.record_heartbeat(assignment_id, attempt_number, screen_ok, fullscreen_ok)
 
-    # Update fullscreen status on latest heartbeat or create new one
-    try:
-        heartbeat = ProctoringHeartbeat.objects.filter(
-            assignment=session.assignment,
-            attempt_number=session.attempt_number
-        ).latest("created_at")
-    except ProctoringHeartbeat.DoesNotExist:
-        heartbeat = ProctoringHeartbeat.objects.create(
-            assignment=session.assignment,
-            attempt_number=session.attempt_number
-        )
+    return Response({"status": "heartbeat updated", "screen_ok": screen_ok, "fullscreen_ok": fullscreen_ok})
 
 
-    return Response({"status": "heartbeat updated", "screen_ok": screen_ok, "fullscreen_ok": fullscreen_ok})
+@api_view(["GET"])
+@permission_classes([IsAdminUser])
+def live_status(request):
+    """
+    Staff monitoring feed: one row per assignment from the live status projection.
+    Optional filters: test_id, status (in_progress / completed).
+    """
+    rows = LiveProctoringStatus.objects.select_related("assignment__candidate", "assignment__test")
+    test_id = request.query_params.get("test_id")
+    if test_id:
+        rows = rows.filter(assignment__test_id=test_id)
+    candidate_status = request.query_params.get("status")
+    if candidate_status:
+        rows = rows.filter(candidate_status=candidate_status)
+
+    return Response([
+        {
+            "assignment_id": row.assignment_id,
+            "candidate": row.assignment.candidate.name,
+            "email": row.assignment.candidate.email,
+            "test": row.assignment.test.name,
+            "attempt_number": row.attempt_number,
+            "candidate_status": row.candidate_status,
+            "violation_count": row.violation_count,
+            "severity_total": row.severity_total,
+            "fullscreen_ok": row.fullscreen_ok,
+            "fullscreen_exit_time": row.fullscreen_exit_time,
+            "screen_ok": row.screen_ok,
+            "last_seen": row.last_seen,
+            "attempt_started_at": row.attempt_started_at,
+            "test_completed_at": row.test_completed_at,
+        }
+        for row in rows.order_by("-severity_total", "assignment_id")
+    ])
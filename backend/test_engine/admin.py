@@ -6,8 +6,8 @@ from django.utils.html import format_html
 from django.utils.text import slugify
 from django import forms
 from django.contrib import messages
-import csv, io, random, os, openpyxl, zipfile
-from django.http import HttpResponse
+import csv, io, random, os, openpyxl, zipfile, tempfile
+from django.http import HttpResponse, FileResponse, StreamingHttpResponse
 from openpyxl.styles import Font
 from decimal import Decimal
 import re
@@ -15,13 +15,19 @@ import ast  # safer for parsing literal Python-style lists
 import json
 
 from django.conf import settings
+from assessments.db_routers import reporting_reads, replica_iter
 from test_engine.utils.scoring import calculate_score_for_candidate, serialize_score_report, generate_score_report_excel
+from test_engine.utils.exports import write_score_export_xlsx, iter_score_export_csv
+from test_engine.utils.answer_sheets import build_answer_sheet_zip, iter_answer_sheet_payloads, render_answer_sheet
+from test_engine.utils.compiled_test import (
+    get_compiled_test, invalidate_compiled_test, invalidate_tests_for_questions, invalidate_tests_for_categories
+)
 
 
 from .models import (
     Test, Question, Candidate, Response, ScoreReport,
     TestSectionConfig, TestQuestionSet, QuestionCategory, ScoreReport,
-    TestAssignment, CandidateTestSession, SectionStatus, ArchivedResponse
+    TestAssignment, CandidateTestSession, SectionStatus, ArchivedResponse, ReportJob
 )
 
 from django.utils.html import format_html
@@ -38,6 +44,11 @@ class QuestionCategoryAdmin(admin.ModelAdmin):
     list_display = ['id', 'name', 'import_questions_link']
     search_fields = ['name']
 
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        if change:
+            invalidate_tests_for_categories([obj.id])
+
     def import_questions_link(self, obj):
         return format_html(
             '<a href="/admin/test_engine/questioncategory/import-csv/">Import CSV</a>'
@@ -195,6 +206,7 @@ class TestAdmin(admin.ModelAdmin):
                     order_counter += 1
 
         TestQuestionSet.objects.bulk_create(question_set)
+        invalidate_compiled_test(test.id)
         messages.success(request, f"Generated {len(question_set)} questions for test: {test.name}")
         return redirect(f'/admin/test_engine/test/{test_id}/change/')
 
@@ -237,6 +249,16 @@ class QuestionAdmin(admin.ModelAdmin):
                     f"⚠️ Invalid options format.\nMust be a valid JSON list of strings, like: [\"A\", \"B\", \"C\"]\n\nGot: {obj.options}"
                 )
         super().save_model(request, obj, form, change)
+        if change:
+            invalidate_tests_for_questions([obj.id])
+
+    def delete_model(self, request, obj):
+        invalidate_tests_for_questions([obj.id])
+        super().delete_model(request, obj)
+
+    def delete_queryset(self, request, queryset):
+        invalidate_tests_for_questions(queryset.values_list('id', flat=True))
+        super().delete_queryset(request, queryset)
 
 
 from django.db.models import Count, Q
@@ -272,6 +294,20 @@ class TestSectionConfigAdmin(admin.ModelAdmin):
 
     total_questions_display.short_description = "Total Questions"
 
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        invalidate_compiled_test(obj.test_id)
+
+    def delete_model(self, request, obj):
+        super().delete_model(request, obj)
+        invalidate_compiled_test(obj.test_id)
+
+    def delete_queryset(self, request, queryset):
+        test_ids = set(queryset.values_list('test_id', flat=True))
+        super().delete_queryset(request, queryset)
+        for test_id in test_ids:
+            invalidate_compiled_test(test_id)
+
 
 @admin.register(TestQuestionSet)
 class TestQuestionSetAdmin(admin.ModelAdmin):
@@ -279,6 +315,20 @@ class TestQuestionSetAdmin(admin.ModelAdmin):
     list_filter = ['test']
     search_fields = ['question__text']
 
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        invalidate_compiled_test(obj.test_id)
+
+    def delete_model(self, request, obj):
+        super().delete_model(request, obj)
+        invalidate_compiled_test(obj.test_id)
+
+    def delete_queryset(self, request, queryset):
+        test_ids = set(queryset.values_list('test_id', flat=True))
+        super().delete_queryset(request, queryset)
+        for test_id in test_ids:
+            invalidate_compiled_test(test_id)
+
 
 @admin.register(Candidate)
 class CandidateAdmin(admin.ModelAdmin):
@@ -299,350 +349,67 @@ class ResponseAdmin(admin.ModelAdmin):
 # ---- Export Score Report ---- #
 
 @admin.action(description="Export selected scores to Excel")
+@reporting_reads()
 def export_scores_to_excel(modeladmin, request, queryset):
-    import openpyxl
-    from django.http import HttpResponse
-    from openpyxl.styles import Font
-    from .models import Response
-
-    wb = openpyxl.Workbook()
-    ws = wb.active
-    ws.title = "Scores"
-
-    # First, collect all unique categories used in the test set
-    all_categories = set()
-    for report in queryset:
-        cat_ids = report.test.sections.values_list("category__name", flat=True)
-        all_categories.update(cat_ids)
-
-    sorted_categories = sorted(all_categories)  # So columns remain consistent
-
-    # Build header row
-    base_headers = [
-        "Candidate Name", "Email", "Phone", "Test",
-        "Score", "Max Possible", "Percentage",
-        "Total Correct", "Total Wrong", "Unattempted"
-    ]
+    output = write_score_export_xlsx(queryset)
+    return FileResponse(
+        output,
+        as_attachment=True,
+        filename="score_export_detailed.xlsx",
+        content_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+    )
 
-    category_headers = []
-    for cat in sorted_categories:
-        prefix = f"{cat}"
-        category_headers.extend([
-            f"{prefix} _ Score",
-            f"{prefix} _ Max Possible",
-            f"{prefix} _ Percentage",
-            f"{prefix} _ Total Correct",
-            f"{prefix} _ Total Wrong",
-            f"{prefix} _ Unattempted"
-        ])
-
-    headers = base_headers + category_headers + ["Created At"]
-    ws.append(headers)
-
-    # Bold header row
-    bold_font = Font(bold=True)
-    for col in ws.iter_cols(min_row=1, max_row=1, min_col=1, max_col=len(headers)):
-        for cell in col:
-            cell.font = bold_font
-
-    # For each report
-    for report in queryset.select_related("candidate", "test"):
-        base_data = [
-            report.candidate.name,
-            report.candidate.email,
-            report.candidate.phone,
-            report.test.name,
-            float(report.score),
-            float(report.total_positive + report.total_negative),
-            round((report.score / (report.total_positive + report.total_negative) * 100) if (report.total_positive + report.total_negative) else 0, 2),
-            report.total_correct,
-            report.total_wrong,
-            report.total_unattempted,
-        ]
 
-        # Prepare per-category data
-        responses = Response.objects.filter(
-            candidate=report.candidate,
-            question__category__in=report.test.sections.values_list('category', flat=True)
-        ).select_related('question__category')
-
-        by_category = {}
-
-        for r in responses:
-            cat = r.question.category.name
-            if cat not in by_category:
-                by_category[cat] = {
-                    'score': 0,
-                    'max': 0,
-                    'correct': 0,
-                    'wrong': 0,
-                    'unattempted': 0
-                }
-
-            submitted = (r.answer or "").strip().lower()
-            correct = (r.question.correct_answer or "").strip().lower()
-
-            by_category[cat]['max'] += r.question.positive_marks
-
-            if not submitted:
-                by_category[cat]['unattempted'] += 1
-            elif submitted == correct:
-                by_category[cat]['correct'] += 1
-                by_category[cat]['score'] += r.question.positive_marks
-            else:
-                by_category[cat]['wrong'] += 1
-                by_category[cat]['score'] -= r.question.negative_marks
-                by_category[cat]['max'] += r.question.negative_marks
-
-        # Add values in sorted order
-        category_data = []
-        for cat in sorted_categories:
-            cat_data = by_category.get(cat, {
-                'score': 0,
-                'max': 0,
-                'correct': 0,
-                'wrong': 0,
-                'unattempted': 0
-            })
-
-            percent = (cat_data['score'] / cat_data['max'] * 100) if cat_data['max'] else 0
-            category_data.extend([
-                round(cat_data['score'], 2),
-                round(cat_data['max'], 2),
-                round(percent, 2),
-                cat_data['correct'],
-                cat_data['wrong'],
-                cat_data['unattempted']
-            ])
-
-        ws.append(base_data + category_data + [report.created_at.strftime("%Y-%m-%d %H:%M:%S")])
-
-    response = HttpResponse(
-        content_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
-    )
-    response["Content-Disposition"] = "attachment; filename=score_export_detailed.xlsx"
-    wb.save(response)
+@admin.action(description="Export selected scores to CSV")
+def export_scores_to_csv(modeladmin, request, queryset):
+    response = StreamingHttpResponse(replica_iter(iter_score_export_csv(queryset)), content_type="text/csv")
+    response["Content-Disposition"] = "attachment; filename=score_export_detailed.csv"
     return response
 
 
 # ---- Export Evaluated Answers ---- #
 @admin.action(description="Export evaluated answer sheets (Excel)")
+@reporting_reads()
 def export_evaluated_answers(modeladmin, request, queryset):
-    import io
-    import zipfile
-    import openpyxl
-    from django.http import HttpResponse
-    from openpyxl.styles import Font
-    from django.utils.text import slugify
-    from django.utils import timezone
-    from datetime import timedelta
-    from .models import Response, Question, TestQuestionSet, TestSectionConfig, CandidateTestSession
-
-    files = []
-
-    for report in queryset.select_related('candidate', 'test'):
-        wb = openpyxl.Workbook()
-        main_ws = wb.active
-        main_ws.title = "Answer Sheet"
-        summary_ws = wb.create_sheet(title="Category Summary")
-
-        # === SHEET 1 HEADERS ===
-        headers = [
-            "#", "Category", "Difficulty", "Question",
-            "Your Answer (Choice)", "Your Answer (Raw)",
-            "Correct Answer (Choice)", "Correct Answer (Raw)",
-            "Status", "+Marks", "-Marks", "Score Awarded", "Time Taken (s)", "Answered At", "Within Time?"
-        ]
-        main_ws.append(headers)
-        for cell in main_ws[1]:
-            cell.font = Font(bold=True)
-
-        tq_ids = TestQuestionSet.objects.filter(test=report.test).values_list('question_id', flat=True)
-        questions = Question.objects.filter(id__in=tq_ids).select_related('category')
-
-        responses = {
-            r.question_id: r for r in Response.objects.filter(
-                candidate=report.candidate,
-                question_id__in=[q.id for q in questions]
-            )
-        }
-
-        # Pull section time info
-        session = CandidateTestSession.objects.filter(candidate=report.candidate, test=report.test).first()
-        section_map = {
-            s.category_id: (s.section_duration_minutes, session.section_started_at if session and session.section_started_at else None)
-            for s in TestSectionConfig.objects.filter(test=report.test)
-        }
-
-        category_summary = {}
-
-        def get_choice_letter(val, options):
-            try:
-                return chr(options.index(val) + ord('A'))
-            except:
-                return ""
-
-        for i, q in enumerate(questions, start=1):
-            r = responses.get(q.id)
-            raw_submitted = (r.answer or "").strip() if r else ""
-            raw_correct = (q.correct_answer or "").strip()
-
-            try:
-                opts = eval(q.options)
-            except:
-                opts = []
-
-            def label_all(raw):
-                return ",".join(get_choice_letter(val, opts) for val in raw.split(",") if get_choice_letter(val, opts))
-
-            submitted_choice = label_all(raw_submitted)
-            correct_choice = label_all(raw_correct)
-
-            status = "Unattempted"
-            awarded = 0
-            if raw_submitted:
-                if sorted(raw_submitted.split(",")) == sorted(raw_correct.split(",")):
-                    status = "Correct"
-                    awarded = q.positive_marks
-                else:
-                    status = "Wrong"
-                    awarded = -q.negative_marks
-
-            cat = q.category.name
-            if cat not in category_summary:
-                category_summary[cat] = {
-                    "total_qs": 0, "correct": 0, "wrong": 0,
-                    "unattempted": 0, "positive": 0, "negative": 0,
-                    "max_marks": 0, "section_start": None, "duration": None
-                }
-            stats = category_summary[cat]
-            stats["total_qs"] += 1
-            stats["max_marks"] += q.positive_marks
-            if status == "Correct":
-                stats["correct"] += 1
-                stats["positive"] += q.positive_marks
-            elif status == "Wrong":
-                stats["wrong"] += 1
-                stats["negative"] += q.negative_marks
-            else:
-                stats["unattempted"] += 1
-
-            # Determine if answered within time
-            within_time = ""
-            deadline = None
-            answered_at_str = ""
-            if r and hasattr(r, 'answered_at') and r.answered_at:
-                answered_at_str = r.answered_at.strftime("%Y-%m-%d %H:%M:%S")
-                sec = section_map.get(q.category_id)
-                if sec and sec[1]:
-                    try:
-                        deadline = sec[1] + timedelta(minutes=sec[0])
-                        within_time = "Yes" if r.answered_at <= deadline else "No"
-                    except:
-                        within_time = ""
-
-            main_ws.append([
-                i,
-                cat,
-                q.difficulty,
-                q.text[:200].replace("\n", " "),
-                submitted_choice,
-                raw_submitted,
-                correct_choice,
-                raw_correct,
-                status,
-                q.positive_marks,
-                q.negative_marks,
-                awarded,
-                r.time_spent if r else "",
-                answered_at_str,
-                within_time
-            ])
-
-        summary_headers = [
-            "Category", "Total", "Correct", "Wrong", "Unattempted",
-            "Total +Marks", "Total -Marks", "Net Score", "Max Score", "Percentage",
-            "Section Start", "Allotted Duration (min)", "Should End Time"
-        ]
-        summary_ws.append(summary_headers)
-        for cell in summary_ws[1]:
-            cell.font = Font(bold=True)
-
-        # Fill category summary
-        grand = {
-            "total_qs": 0, "correct": 0, "wrong": 0, "unattempted": 0,
-            "positive": 0, "negative": 0, "max_marks": 0
-        }
-
-        for cat, s in category_summary.items():
-            net_score = s["positive"] - s["negative"]
-            percent = ((s["positive"] - s["negative"]) / s["max_marks"] * 100) if s["max_marks"] else 0
-
-            section = TestSectionConfig.objects.filter(test=report.test, category__name=cat).first()
-            duration = section.section_duration_minutes if section else None
-            section_start = session.section_started_at.strftime("%Y-%m-%d %H:%M:%S") if session and session.section_started_at else ""
-            end_time = (session.section_started_at + timedelta(minutes=duration)).strftime("%Y-%m-%d %H:%M:%S") if session and session.section_started_at and duration else ""
-
-            summary_ws.append([
-                cat, s["total_qs"], s["correct"], s["wrong"], s["unattempted"],
-                s["positive"], s["negative"], net_score, s["max_marks"], round(percent, 2),
-                section_start, duration if duration is not None else "", end_time
-            ])
-
-            # Add to grand total
-            for key in grand:
-                grand[key] += s[key]
-
-        # Append grand total row
-        grand_net = grand["positive"] - grand["negative"]
-        grand_percent = ((grand["positive"] - grand["negative"]) / grand["max_marks"] * 100) if grand["max_marks"] else 0
-        summary_ws.append([
-            "Grand Total", grand["total_qs"], grand["correct"], grand["wrong"], grand["unattempted"],
-            grand["positive"], grand["negative"], grand_net, grand["max_marks"], round(grand_percent, 2),
-            "", "", ""
-        ])
-
-        memfile = io.BytesIO()
-        wb.save(memfile)
-        memfile.seek(0)
-        fname = f"{slugify(report.test.name)}_{slugify(report.candidate.name)}.xlsx"
-        files.append((fname, memfile.read()))
-
-    if len(files) == 1:
-        name, content = files[0]
+    if queryset.count() == 1:
+        name, content = render_answer_sheet(next(iter_answer_sheet_payloads(queryset)))
         response = HttpResponse(
             content,
             content_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
         )
         response["Content-Disposition"] = f"attachment; filename={name}"
         return response
-    else:
-        zip_buffer = io.BytesIO()
-        with zipfile.ZipFile(zip_buffer, "w") as zf:
-            for name, content in files:
-                zf.writestr(name, content)
-        zip_buffer.seek(0)
-        response = HttpResponse(zip_buffer.read(), content_type="application/zip")
-        response["Content-Disposition"] = "attachment; filename=evaluated_answer_sheets.zip"
-        return response
-
-
-
-
 
+    # The zip is written to disk one workbook at a time, rendered inline: forking a process
+    # pool from a threaded web worker can deadlock the children. Large cohorts are better
+    # served by `python manage.py export_answer_sheets`, which renders in parallel.
+    output = tempfile.TemporaryFile()
+    build_answer_sheet_zip(queryset, output, workers=1)
+    output.seek(0)
+    return FileResponse(
+        output, as_attachment=True, filename="evaluated_answer_sheets.zip", content_type="application/zip"
+    )
 
 
 # ---- Recalculate Score ---- #
 
 
 from .models import ScoreReport
-from test_engine.utils.scoring import calculate_score_for_candidate
+from test_engine.utils.cohort_scoring import score_cohort
 
 @admin.action(description="Recalculate score for selected reports")
 def recalculate_scores(modeladmin, request, queryset):
-    for report in queryset.select_related('candidate', 'test'):
-        calculate_score_for_candidate(report.test, report.candidate)
-    modeladmin.message_user(request, f"Recalculated score for {queryset.count()} report(s).")
+    # One vectorized pass per (test, attempt) instead of one scoring call per report; scoped
+    # to the selected candidates so no other attempt's report is created or rewritten
+    candidates = {}
+    for test_id, attempt_number, candidate_id in queryset.values_list('test_id', 'attempt_number', 'candidate_id'):
+        candidates.setdefault((test_id, attempt_number), set()).add(candidate_id)
+
+    tests = Test.objects.in_bulk({test_id for test_id, _ in candidates})
+    scored = 0
+    for (test_id, attempt_number), candidate_ids in candidates.items():
+        scored += score_cohort(tests[test_id], attempt_number=attempt_number, candidate_ids=candidate_ids)["scored"]
+    modeladmin.message_user(request, f"Recalculated score for {scored} report(s).")
 
 @admin.register(ScoreReport)
 class ScoreReportAdmin(admin.ModelAdmin):
@@ -657,29 +424,23 @@ class ScoreReportAdmin(admin.ModelAdmin):
     readonly_fields = ['score_breakdown_by_category']
     actions = [
         export_scores_to_excel,
+        export_scores_to_csv,
         export_evaluated_answers,
         recalculate_scores,
         'export_score_excel'
     ]
 
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related('candidate', 'test')
+
     def max_possible(self, obj):
-        from .models import TestQuestionSet
-        question_ids = TestQuestionSet.objects.filter(test=obj.test).values_list('question_id', flat=True)
-        from test_engine.models import Question
-        questions = Question.objects.filter(id__in=question_ids)
-        total_positive = sum(q.positive_marks for q in questions)
-        return round(total_positive, 2)
+        return round(get_compiled_test(obj.test).max_score, 2)
 
     max_possible.short_description = 'Max Possible'
 
 
     def percentage(self, obj):
-        from .models import TestQuestionSet, Question
-
-        question_ids = TestQuestionSet.objects.filter(test=obj.test).values_list('question_id', flat=True)
-        questions = Question.objects.filter(id__in=question_ids)
-
-        max_score = sum(Decimal(str(q.positive_marks)) for q in questions)
+        max_score = get_compiled_test(obj.test).max_score
 
         return round((obj.score / max_score * 100), 2) if max_score > 0 else 0.0
 
@@ -754,3 +515,21 @@ class SectionStatusAdmin(admin.ModelAdmin):
     search_fields = ["session__assignment__candidate__name"]
 
 
+@admin.register(ReportJob)
+class ReportJobAdmin(admin.ModelAdmin):
+    list_display = ["candidate", "test", "attempt_number", "status", "attempts", "run_after", "updated_at"]
+    list_filter = ["status", "test"]
+    search_fields = ["candidate__name", "candidate__email"]
+    readonly_fields = ["last_error", "report_path", "created_at", "updated_at"]
+    actions = ["retry_jobs"]
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related("candidate", "test")
+
+    @admin.action(description="Retry selected report jobs")
+    def retry_jobs(self, request, queryset):
+        from django.utils import timezone
+        count = queryset.exclude(status="running").update(
+            status="pending", attempts=0, run_after=timezone.now(), last_error=""
+        )
+        self.message_user(request, f"Re-queued {count} report job(s).")
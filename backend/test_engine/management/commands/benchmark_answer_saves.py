@@ -0,0 +1,116 @@
+import statistics
+import threading
+import time
+import uuid
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connections
+from rest_framework.test import APIRequestFactory
+
+from assessments.db import describe
+from test_engine.models import (
+    Candidate, Test, Question, QuestionCategory, TestSectionConfig, TestQuestionSet, TestAssignment
+)
+from test_engine.utils.sessions import start_session
+from test_engine.views import SavePerQuestionResponseAPIView, SaveBulkResponsesAPIView
+
+
+ENDPOINTS = {
+    "save-response": SavePerQuestionResponseAPIView.as_view(),
+    "save-responses": SaveBulkResponsesAPIView.as_view(),
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "Load benchmark of the answer-save endpoints against the configured database. "
+        "Run it once per profile (e.g. SQLite, DATABASE_URL=postgres://..., DATABASE_POOL=1) and compare."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--concurrency", default="1,4,8", help="Comma-separated numbers of concurrent candidates")
+        parser.add_argument("--requests", type=int, default=50, help="Requests per candidate per endpoint")
+        parser.add_argument("--questions", type=int, default=20, help="Questions in the benchmark test")
+        parser.add_argument("--keep", action="store_true", help="Keep the benchmark test and candidates")
+
+    def handle(self, *args, **options):
+        levels = [int(n) for n in options["concurrency"].split(",")]
+        self.stdout.write(f"🗄️ {describe(settings.DATABASES['default'])}")
+
+        fixture = self._create_fixture(max(levels), options["questions"])
+        try:
+            self.stdout.write(f"{'endpoint':<16}{'workers':>8}{'req/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'errors':>8}")
+            for level in levels:
+                for endpoint in ENDPOINTS:
+                    latencies, errors, elapsed = self._run(endpoint, fixture, level, options["requests"])
+                    latencies.sort()
+                    p95 = latencies[int(len(latencies) * 0.95) - 1] if latencies else 0
+                    self.stdout.write(
+                        f"{endpoint:<16}{level:>8}{len(latencies) / elapsed:>10.1f}"
+                        f"{statistics.median(latencies) if latencies else 0:>10.1f}{p95:>10.1f}{errors:>8}"
+                    )
+        finally:
+            if not options["keep"]:
+                self._delete_fixture(fixture)
+
+    def _create_fixture(self, candidates, questions):
+        tag = uuid.uuid4().hex[:8]
+        category = QuestionCategory.objects.create(name=f"Benchmark {tag}")
+        test = Test.objects.create(name=f"Benchmark {tag}", total_duration_minutes=600)
+        TestSectionConfig.objects.create(test=test, category=category, section_duration_minutes=600)
+        question_ids = []
+        for i in range(questions):
+            q = Question.objects.create(
+                text=f"Benchmark {i}", correct_answer="a", options='["a", "b"]', difficulty="easy", category=category
+            )
+            TestQuestionSet.objects.create(test=test, question=q, order=i)
+            question_ids.append(q.id)
+
+        sessions = []
+        for i in range(candidates):
+            candidate = Candidate.objects.create(name=f"Benchmark {i}", email=f"bench-{tag}-{i}@example.invalid")
+            assignment = TestAssignment.objects.create(candidate=candidate, test=test)
+            session = start_session(assignment.id)[0]
+            sessions.append((candidate.id, session.attempt_number))
+        return {"test": test, "category": category, "question_ids": question_ids, "sessions": sessions}
+
+    def _delete_fixture(self, fixture):
+        Candidate.objects.filter(id__in=[candidate_id for candidate_id, _ in fixture["sessions"]]).delete()
+        fixture["test"].delete()
+        fixture["category"].delete()
+
+    def _run(self, endpoint, fixture, workers, requests):
+        view = ENDPOINTS[endpoint]
+        factory = APIRequestFactory()
+        latencies, errors = [], [0]
+        lock = threading.Lock()
+        question_ids = fixture["question_ids"]
+
+        def candidate(candidate_id, attempt_number):
+            mine = []
+            try:
+                for n in range(requests):
+                    base = {"candidate": candidate_id, "test": fixture["test"].id, "attempt_number": attempt_number}
+                    if endpoint == "save-response":
+                        base.update(question=question_ids[n % len(question_ids)], answer="ab"[n % 2])
+                    else:
+                        base["responses"] = [{"question": q, "answer": "ab"[n % 2]} for q in question_ids]
+                    started = time.perf_counter()
+                    response = view(factory.post("/", base, format="json"))
+                    mine.append((time.perf_counter() - started) * 1000)
+                    if response.status_code >= 400:
+                        with lock:
+                            errors[0] += 1
+            finally:
+                connections.close_all()
+                with lock:
+                    latencies.extend(mine)
+
+        threads = [threading.Thread(target=candidate, args=session) for session in fixture["sessions"][:workers]]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return latencies, errors[0], time.perf_counter() - started
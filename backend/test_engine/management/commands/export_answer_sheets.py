@@ -0,0 +1,40 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from test_engine.models import Test, ScoreReport
+from test_engine.utils.answer_sheets import build_answer_sheet_zip
+
+
+class Command(BaseCommand):
+    help = "Write the evaluated answer sheets of a test's score reports into a zip file"
+
+    def add_arguments(self, parser):
+        parser.add_argument("test_id", type=int)
+        parser.add_argument("output", help="Path of the zip file to write")
+        parser.add_argument("--attempt", type=int, default=None, help="Only export this attempt number")
+        parser.add_argument("--workers", type=int, default=None, help="Render processes (1 = render inline)")
+
+    def handle(self, *args, **options):
+        try:
+            test = Test.objects.get(id=options["test_id"])
+        except Test.DoesNotExist:
+            raise CommandError(f"Test {options['test_id']} does not exist")
+
+        reports = ScoreReport.objects.filter(test=test)
+        if options["attempt"] is not None:
+            reports = reports.filter(attempt_number=options["attempt"])
+
+        started = time.monotonic()
+        step = 1
+
+        def progress(done, total):
+            nonlocal step
+            if done == total or done >= step:
+                step = done + max(1, total // 20)
+                self.stdout.write(f"📦 {done}/{total} answer sheets ({time.monotonic() - started:.1f}s)")
+
+        written = build_answer_sheet_zip(reports, options["output"], workers=options["workers"], progress=progress)
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ Wrote {written} answer sheet(s) for '{test.name}' to {options['output']}"
+        ))
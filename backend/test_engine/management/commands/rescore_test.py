@@ -0,0 +1,29 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from test_engine.models import Test
+from test_engine.utils.cohort_scoring import score_cohort
+
+
+class Command(BaseCommand):
+    help = "Re-score every candidate of a test in one vectorized pass"
+
+    def add_arguments(self, parser):
+        parser.add_argument("test_id", type=int)
+        parser.add_argument("--attempt", type=int, default=None, help="Only re-score this attempt number")
+
+    def handle(self, *args, **options):
+        try:
+            test = Test.objects.get(id=options["test_id"])
+        except Test.DoesNotExist:
+            raise CommandError(f"Test {options['test_id']} does not exist")
+
+        started = time.monotonic()
+        result = score_cohort(test, attempt_number=options["attempt"])
+        elapsed = time.monotonic() - started
+
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ Re-scored {result['scored']} report(s) from {result['responses']} response(s) "
+            f"for '{test.name}' in {elapsed:.2f}s"
+        ))
@@ -0,0 +1,32 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from test_engine.utils.report_jobs import run_pending_jobs, requeue_stale_jobs
+
+
+class Command(BaseCommand):
+    help = "Worker that generates queued score reports (no external broker required)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--once", action="store_true", help="Drain the queue once and exit")
+        parser.add_argument("--batch", type=int, default=50, help="Jobs claimed per poll")
+        parser.add_argument("--sleep", type=float, default=2.0, help="Seconds to wait when the queue is empty")
+
+    def handle(self, *args, **options):
+        self.stdout.write("🛠️ Report job worker started")
+        while True:
+            requeued = requeue_stale_jobs()
+            if requeued:
+                self.stdout.write(f"♻️ Re-queued {requeued} stale job(s)")
+
+            processed = run_pending_jobs(limit=options["batch"])
+            if processed:
+                self.stdout.write(f"📄 Processed {processed} report job(s)")
+
+            if options["once"] and not processed:
+                return
+            if not processed:
+                close_old_connections()
+                time.sleep(options["sleep"])
@@ -0,0 +1,41 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+from django.utils import timezone
+
+from test_engine.utils.section_timer import DeadlineHeap, expire_due, grace
+
+
+class Command(BaseCommand):
+    help = "Worker that auto-submits sections whose time is up, even when the candidate's browser is gone"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--once", action="store_true", help="Expire everything already due and exit")
+        parser.add_argument("--batch", type=int, default=100, help="Sessions advanced per batch")
+        parser.add_argument("--refresh", type=float, default=15.0, help="Seconds between scans for new sections")
+
+    def handle(self, *args, **options):
+        heap = DeadlineHeap()
+        loaded = heap.refresh()
+        self.stdout.write(f"⏱️ Section timer started with {loaded} open section(s)")
+        next_refresh = time.monotonic() + options["refresh"]
+        while True:
+            advanced, completed = expire_due(heap, limit=options["batch"])
+            if advanced or completed:
+                self.stdout.write(f"⏳ Advanced {advanced} session(s), completed {completed}")
+                continue  # more may be due
+
+            if options["once"]:
+                return
+            if time.monotonic() >= next_refresh:
+                heap.refresh()
+                next_refresh = time.monotonic() + options["refresh"]
+                continue
+
+            close_old_connections()
+            wait = next_refresh - time.monotonic()
+            deadline = heap.next_deadline()
+            if deadline is not None:
+                wait = min(wait, (deadline + grace() - timezone.now()).total_seconds())
+            time.sleep(max(0.5, wait))
@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand
+
+from test_engine.models import CandidateTestSession
+from test_engine.utils.score_state import verify_score_state
+
+
+class Command(BaseCommand):
+    help = "Compare running score state with a full rescore and report (or repair) drift"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--test", type=int, default=None, help="Only check sessions of this test")
+        parser.add_argument("--repair", action="store_true", help="Rewrite drifted state from the full rescore")
+
+    def handle(self, *args, **options):
+        sessions = CandidateTestSession.objects.select_related("assignment__test", "assignment__candidate")
+        if options["test"]:
+            sessions = sessions.filter(assignment__test_id=options["test"])
+
+        checked = drifted = 0
+        for session in sessions.iterator():
+            checked += 1
+            drift = verify_score_state(session, repair=options["repair"])
+            if drift:
+                drifted += 1
+                self.stdout.write(self.style.WARNING(f"⚠️ {session}: {drift}"))
+
+        action = "repaired" if options["repair"] else "found"
+        self.stdout.write(self.style.SUCCESS(f"✅ Checked {checked} session(s), {action} drift in {drifted}"))
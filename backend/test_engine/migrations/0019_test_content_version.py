@@ -0,0 +1,18 @@
+# Generated by Django 5.1.7 on 2026-10-17 22:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('test_engine', '0018_candidatetestsession_test_completed_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='test',
+            name='content_version',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 5.1.7 on 2026-10-17 22:19
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('test_engine', '0020_reportjob'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='candidatetestsession',
+            name='score_state_version',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.CreateModel(
+            name='SessionScoreState',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('correct', models.IntegerField(default=0)),
+                ('wrong', models.IntegerField(default=0)),
+                ('unattempted', models.IntegerField(default=0)),
+                ('positive', models.DecimalField(decimal_places=4, default=0, max_digits=10)),
+                ('negative', models.DecimalField(decimal_places=4, default=0, max_digits=10)),
+                ('category', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='test_engine.questioncategory')),
+                ('session', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='score_state', to='test_engine.candidatetestsession')),
+            ],
+            options={
+                'unique_together': {('session', 'category')},
+            },
+        ),
+    ]
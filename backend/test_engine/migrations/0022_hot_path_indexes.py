@@ -0,0 +1,21 @@
+# Generated by Django 5.1.7 on 2026-10-17 22:36
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('test_engine', '0021_sessionscorestate'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='candidatetestsession',
+            index=models.Index(fields=['assignment', 'completed', 'attempt_number'], name='test_engine_assignm_ad76a9_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='response',
+            index=models.Index(fields=['candidate', 'test', 'attempt_number'], name='test_engine_candida_51b8a1_idx'),
+        ),
+    ]
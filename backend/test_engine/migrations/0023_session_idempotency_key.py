@@ -0,0 +1,22 @@
+# Generated by Django 5.1.7 on 2026-10-17 22:42
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('test_engine', '0022_hot_path_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='candidatetestsession',
+            name='idempotency_key',
+            field=models.CharField(blank=True, editable=False, max_length=64, null=True),
+        ),
+        migrations.AddConstraint(
+            model_name='candidatetestsession',
+            constraint=models.UniqueConstraint(fields=('assignment', 'idempotency_key'), name='unique_session_start_key'),
+        ),
+    ]
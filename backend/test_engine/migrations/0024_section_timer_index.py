@@ -0,0 +1,17 @@
+# Generated by Django 5.1.7 on 2026-10-17 22:46
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('test_engine', '0023_session_idempotency_key'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='candidatetestsession',
+            index=models.Index(condition=models.Q(('completed', False)), fields=['section_started_at'], name='open_session_section_idx'),
+        ),
+    ]
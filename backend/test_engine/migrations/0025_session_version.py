@@ -0,0 +1,18 @@
+# Generated by Django 5.1.7 on 2026-10-17 22:47
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('test_engine', '0024_section_timer_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='candidatetestsession',
+            name='version',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+    ]
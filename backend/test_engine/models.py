@@ -23,6 +23,7 @@ class Test(models.Model):
     enforce_section_time = models.BooleanField(default=False)
     show_section_time_guidance = models.BooleanField(default=False)
     created_at = models.DateTimeField(auto_now_add=True)
+    content_version = models.PositiveIntegerField(default=0, editable=False)  # bumped when questions/sections change
 
     def total_section_time(self):
         return sum(section.section_duration_minutes for section in self.sections.all())
@@ -142,6 +143,8 @@ class Response(models.Model):
 
     class Meta:
         unique_together = ("candidate", "question", "test", "attempt_number")
+        # Per-attempt reads (scoring, resume, answer sheets) don't know the question
+        indexes = [models.Index(fields=["candidate", "test", "attempt_number"])]
 
 class ArchivedResponse(models.Model):
     candidate = models.ForeignKey("Candidate", on_delete=models.CASCADE)
@@ -202,12 +205,44 @@ class CandidateTestSession(models.Model):
     section_started_at = models.DateTimeField(null=True, blank=True)
     screen_ok = models.BooleanField(default=True)  # Add this if missing
     test_completed_at = models.DateTimeField(null=True, blank=True)
+    # Test.content_version the running score state was seeded against; None = not tracked
+    score_state_version = models.PositiveIntegerField(null=True, blank=True, editable=False)
+    # Client-supplied key of the start request; a retried start returns this session
+    idempotency_key = models.CharField(max_length=64, null=True, blank=True, editable=False)
+    # Bumped by every state transition (see transition())
+    version = models.PositiveIntegerField(default=0, editable=False)
 
     def __str__(self):
         return f"Session {self.assignment} - Attempt {self.attempt_number}"
 
+    def transition(self, **changes):
+        """
+        Apply `changes` with UPDATE ... WHERE version = <the version this instance was read at>,
+        bumping the version. Returns False, writing nothing, when another request changed the
+        session since it was read; the caller reloads and retries, or treats it as a no-op.
+        """
+        won = CandidateTestSession.objects.filter(pk=self.pk, version=self.version).update(
+            version=models.F("version") + 1, **changes
+        )
+        if won:
+            self.version += 1
+            for field, value in changes.items():
+                setattr(self, field, value)
+        return bool(won)
+
     class Meta:
         unique_together = ("assignment", "attempt_number")
+        # "open session of this assignment, latest attempt first"
+        indexes = [
+            models.Index(fields=["assignment", "completed", "attempt_number"]),
+            # section timer: open sessions by section start
+            models.Index(
+                fields=["section_started_at"], condition=models.Q(completed=False), name="open_session_section_idx"
+            ),
+        ]
+        constraints = [
+            models.UniqueConstraint(fields=["assignment", "idempotency_key"], name="unique_session_start_key"),
+        ]
 
 
 class SectionStatus(models.Model):
@@ -223,3 +258,56 @@ class SectionStatus(models.Model):
 
     class Meta:
         unique_together = ("session", "section")
+
+
+class SessionScoreState(models.Model):
+    """Running per-category totals for a session, updated with deltas on every answer write."""
+    session = models.ForeignKey(CandidateTestSession, on_delete=models.CASCADE, related_name="score_state")
+    category = models.ForeignKey("QuestionCategory", on_delete=models.CASCADE)
+    correct = models.IntegerField(default=0)
+    wrong = models.IntegerField(default=0)
+    unattempted = models.IntegerField(default=0)
+    positive = models.DecimalField(max_digits=10, decimal_places=4, default=0)
+    negative = models.DecimalField(max_digits=10, decimal_places=4, default=0)
+
+    def __str__(self):
+        return f"{self.session} - {self.category}"
+
+    class Meta:
+        unique_together = ("session", "category")
+
+
+# ===================
+# Background Report Jobs
+# ===================
+
+class ReportJob(models.Model):
+    """One row per (candidate, test, attempt): re-enqueueing collapses into the same job."""
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('running', 'Running'),
+        ('done', 'Done'),
+        ('failed', 'Failed'),
+    ]
+
+    candidate = models.ForeignKey("Candidate", on_delete=models.CASCADE)
+    test = models.ForeignKey("Test", on_delete=models.CASCADE)
+    attempt_number = models.PositiveIntegerField(default=1)
+
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='pending')
+    rerun = models.BooleanField(default=False)  # enqueued again while running
+    attempts = models.PositiveIntegerField(default=0)
+    max_attempts = models.PositiveIntegerField(default=3)
+    run_after = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True)
+    report_path = models.CharField(max_length=500, blank=True)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"ReportJob {self.candidate} - {self.test} - Attempt {self.attempt_number} ({self.status})"
+
+    class Meta:
+        unique_together = ("candidate", "test", "attempt_number")
+        indexes = [models.Index(fields=["status", "run_after"])]
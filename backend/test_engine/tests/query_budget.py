@@ -0,0 +1,63 @@
+"""
+Query-count and query-plan budgets for the hot API paths (used by test_query_budgets.py).
+
+`assertQueryBudget(budget, tables)` captures every query run inside the block, fails when
+there are more than `budget`, and EXPLAINs each SELECT: a plan that reads one of `tables`
+without an index fails with the offending SQL. Only the hot tables are checked; small
+lookup tables (tests, categories, configs) are fine to scan.
+
+SQLite plans come from EXPLAIN QUERY PLAN ("SCAN <table>" without an index). On
+PostgreSQL sequential scans are disabled for the EXPLAIN, so a Seq Scan in the plan
+means no usable index exists rather than the planner preferring one on a tiny table.
+"""
+import json
+import re
+from contextlib import contextmanager
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+
+def full_scans(sql, tables):
+    """Tables from `tables` that `sql` reads without an index."""
+    with connection.cursor() as cursor:
+        if connection.vendor == "sqlite":
+            cursor.execute(f"EXPLAIN QUERY PLAN {sql}")
+            scanned = set()
+            for row in cursor.fetchall():
+                match = re.match(r"SCAN (\w+)(?: AS \w+)?$", row[-1])
+                if match:
+                    scanned.add(match.group(1))
+            return scanned & set(tables)
+        if connection.vendor == "postgresql":
+            cursor.execute("SET LOCAL enable_seqscan = off")
+            cursor.execute(f"EXPLAIN (FORMAT JSON) {sql}")
+            plan = cursor.fetchone()[0]
+            plan = json.loads(plan) if isinstance(plan, str) else plan
+            cursor.execute("SET LOCAL enable_seqscan = on")
+            scanned = set()
+            nodes = [plan[0]["Plan"]]
+            while nodes:
+                node = nodes.pop()
+                if node.get("Node Type") == "Seq Scan":
+                    scanned.add(node.get("Relation Name"))
+                nodes.extend(node.get("Plans", []))
+            return scanned & set(tables)
+    return set()
+
+
+class QueryBudgetMixin:
+    @contextmanager
+    def assertQueryBudget(self, budget, tables=()):
+        with CaptureQueriesContext(connection) as ctx:
+            yield ctx
+        queries = [q["sql"] for q in ctx.captured_queries]
+        self.assertLessEqual(
+            len(queries), budget,
+            f"{len(queries)} queries, budget {budget}:\n" + "\n".join(queries),
+        )
+        for sql in queries:
+            if not sql.lstrip().upper().startswith("SELECT"):
+                continue
+            scans = full_scans(sql, tables)
+            self.assertFalse(scans, f"Full scan of {', '.join(sorted(scans))}:\n{sql}")
@@ -0,0 +1,60 @@
+import io
+import zipfile
+
+import openpyxl
+from django.test import TestCase
+from test_engine.models import (
+    Candidate, Test, Question, QuestionCategory, TestSectionConfig, TestQuestionSet, TestAssignment,
+    CandidateTestSession, Response, ScoreReport
+)
+from test_engine.utils.answer_sheets import build_answer_sheet_zip
+from test_engine.utils.scoring import calculate_score_for_candidate
+
+
+class TestAnswerSheetExport(TestCase):
+    def setUp(self):
+        self.test = Test.objects.create(name="Sheet Test", total_duration_minutes=30)
+        category = QuestionCategory.objects.create(name="Verbal")
+        TestSectionConfig.objects.create(test=self.test, category=category, section_duration_minutes=10)
+        questions = []
+        for i in range(4):
+            q = Question.objects.create(
+                text=f"Q{i}", correct_answer="right", options='["right", "wrong"]',
+                difficulty="easy", category=category, positive_marks=1.0, negative_marks=0.25,
+            )
+            TestQuestionSet.objects.create(test=self.test, question=q, order=i)
+            questions.append(q)
+
+        for c in range(3):
+            candidate = Candidate.objects.create(name=f"C{c}", email=f"c{c}@example.com")
+            assignment = TestAssignment.objects.create(candidate=candidate, test=self.test)
+            CandidateTestSession.objects.create(assignment=assignment)
+            for i, q in enumerate(questions[:c + 1]):
+                Response.objects.create(
+                    candidate=candidate, test=self.test, question=q, answer="right" if i % 2 == 0 else "wrong"
+                )
+            calculate_score_for_candidate(self.test, candidate, 1)
+
+    def _export(self, workers):
+        output = io.BytesIO()
+        progress = []
+        written = build_answer_sheet_zip(
+            ScoreReport.objects.all(), output, workers=workers, progress=lambda done, total: progress.append(done)
+        )
+        self.assertEqual(written, 3)
+        self.assertEqual(progress, [1, 2, 3])
+        return zipfile.ZipFile(output)
+
+    def test_zip_contains_one_evaluated_sheet_per_report(self):
+        archive = self._export(workers=1)
+        self.assertEqual(len(archive.namelist()), 3)
+
+        sheet = openpyxl.load_workbook(io.BytesIO(archive.read("sheet-test_c2.xlsx")))["Answer Sheet"]
+        statuses = [row[8] for row in sheet.iter_rows(min_row=2, values_only=True)]
+        self.assertEqual(statuses, ["Correct", "Wrong", "Correct", "Unattempted"])
+        self.assertEqual(sheet.cell(row=2, column=5).value, "A")
+
+    def test_process_pool_matches_inline(self):
+        inline = self._export(workers=1)
+        pooled = self._export(workers=2)
+        self.assertEqual(sorted(inline.namelist()), sorted(pooled.namelist()))
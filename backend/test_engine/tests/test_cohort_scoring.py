@@ -0,0 +1,91 @@
+import random
+from unittest import mock
+
+from django.test import TestCase
+from test_engine.models import (
+    Candidate, Test, Question, QuestionCategory, TestSectionConfig, TestQuestionSet, Response, ScoreReport
+)
+from test_engine.admin import recalculate_scores
+from test_engine.utils.cohort_scoring import score_cohort
+from test_engine.utils.scoring import calculate_score_for_candidate
+
+
+class TestCohortScoring(TestCase):
+    def setUp(self):
+        rng = random.Random(7)
+        self.test = Test.objects.create(name="Cohort Test", total_duration_minutes=30)
+
+        questions = []
+        for name in ["Verbal", "Quant"]:
+            category = QuestionCategory.objects.create(name=name)
+            TestSectionConfig.objects.create(test=self.test, category=category)
+            for i in range(5):
+                questions.append(Question.objects.create(
+                    text=f"{name} {i}",
+                    correct_answer=" Right ",
+                    options='["right", "wrong"]',
+                    difficulty="easy",
+                    category=category,
+                    positive_marks=2.0 if name == "Quant" else 1.0,
+                    negative_marks=0.5,
+                ))
+        for i, q in enumerate(questions):
+            TestQuestionSet.objects.create(test=self.test, question=q, order=i)
+
+        self.candidates = []
+        for c in range(6):
+            candidate = Candidate.objects.create(name=f"C{c}", email=f"c{c}@example.com")
+            self.candidates.append(candidate)
+            for q in questions:
+                Response.objects.create(
+                    candidate=candidate, test=self.test, question=q,
+                    answer=rng.choice(["right", "RIGHT ", "wrong", ""]),
+                )
+
+    def test_matches_per_candidate_scoring(self):
+        expected = {}
+        for candidate in self.candidates:
+            report = calculate_score_for_candidate(self.test, candidate, 1)["report"]
+            expected[candidate.id] = (
+                report.score, report.total_positive, report.total_negative,
+                report.total_correct, report.total_wrong, report.total_unattempted,
+            )
+        ScoreReport.objects.all().delete()
+
+        with self.assertNumQueries(5):
+            result = score_cohort(self.test)
+
+        self.assertEqual(result["scored"], len(self.candidates))
+        for report in ScoreReport.objects.filter(test=self.test):
+            self.assertEqual((
+                report.score, report.total_positive, report.total_negative,
+                report.total_correct, report.total_wrong, report.total_unattempted,
+            ), expected[report.candidate_id])
+
+    def test_attempt_without_responses_is_zeroed(self):
+        score_cohort(self.test)
+        candidate = self.candidates[0]
+        Response.objects.filter(candidate=candidate).delete()
+
+        result = score_cohort(self.test, candidate_ids=[candidate.id])
+        self.assertEqual(result["scored"], 1)
+        report = ScoreReport.objects.get(test=self.test, candidate=candidate)
+        self.assertEqual((report.score, report.total_correct, report.total_wrong), (0, 0, 0))
+
+    def test_test_without_questions(self):
+        empty = Test.objects.create(name="Empty", total_duration_minutes=30)
+        Response.objects.create(candidate=self.candidates[0], test=empty, question=Question.objects.first(), answer="right")
+        self.assertEqual(score_cohort(empty)["scored"], 0)
+
+    def test_admin_rescore_touches_only_the_selected_reports(self):
+        candidate = self.candidates[0]
+        score_cohort(self.test, candidate_ids=[candidate.id])
+        for response in Response.objects.filter(candidate=candidate):
+            Response.objects.create(
+                candidate=candidate, test=self.test, question=response.question, answer="right", attempt_number=2
+            )
+
+        modeladmin = mock.Mock()
+        recalculate_scores(modeladmin, None, ScoreReport.objects.filter(candidate=candidate))
+        self.assertEqual(list(ScoreReport.objects.filter(candidate=candidate).values_list("attempt_number", flat=True)), [1])
+        modeladmin.message_user.assert_called_once_with(None, "Recalculated score for 1 report(s).")
@@ -0,0 +1,67 @@
+import csv
+import io
+
+import openpyxl
+from django.test import TestCase
+from test_engine.models import (
+    Candidate, Test, Question, QuestionCategory, TestSectionConfig, TestQuestionSet, Response, ScoreReport
+)
+from test_engine.utils.exports import iter_score_export_csv, iter_score_export_rows, write_score_export_xlsx
+from test_engine.utils.scoring import calculate_score_for_candidate
+
+
+class TestScoreExport(TestCase):
+    def setUp(self):
+        self.test = Test.objects.create(name="Export Test", total_duration_minutes=30)
+        other_test = Test.objects.create(name="Other Test", total_duration_minutes=30)
+
+        self.questions = []
+        for name in ["Verbal", "Quant"]:
+            category = QuestionCategory.objects.create(name=name)
+            TestSectionConfig.objects.create(test=self.test, category=category)
+            for i in range(3):
+                q = Question.objects.create(
+                    text=f"{name} {i}", correct_answer="right", options='["right", "wrong"]',
+                    difficulty="easy", category=category, positive_marks=2.0, negative_marks=0.5,
+                )
+                TestQuestionSet.objects.create(test=self.test, question=q, order=len(self.questions))
+                self.questions.append(q)
+
+        for c in range(5):
+            candidate = Candidate.objects.create(name=f"C{c}", email=f"c{c}@example.com")
+            for i, q in enumerate(self.questions):
+                answer = ["right", "wrong", ""][(i + c) % 3]
+                Response.objects.create(candidate=candidate, test=self.test, question=q, answer=answer)
+                # same questions answered under another test / attempt must not leak into the export
+                Response.objects.create(candidate=candidate, test=other_test, question=q, answer="right")
+                Response.objects.create(
+                    candidate=candidate, test=self.test, question=q, answer="right", attempt_number=2
+                )
+            calculate_score_for_candidate(self.test, candidate, 1)
+
+    def test_rows_are_scoped_to_test_and_attempt(self):
+        rows = list(csv.reader(io.StringIO("".join(iter_score_export_csv(ScoreReport.objects.all())))))
+        header, body = rows[0], rows[1:]
+        self.assertEqual(header[10:13], ["Quant _ Score", "Quant _ Max Possible", "Quant _ Percentage"])
+        self.assertEqual(len(body), 5)
+
+        for row in body:
+            report = ScoreReport.objects.get(candidate__email=row[1])
+            quant_correct, quant_wrong, quant_unattempted = map(int, row[13:16])
+            verbal_correct, verbal_wrong, verbal_unattempted = map(int, row[19:22])
+            self.assertEqual(quant_correct + verbal_correct, report.total_correct)
+            self.assertEqual(quant_wrong + verbal_wrong, report.total_wrong)
+            self.assertEqual(quant_unattempted + verbal_unattempted, report.total_unattempted)
+
+    def test_query_count_is_per_chunk(self):
+        queryset = ScoreReport.objects.all()
+        # ids + headers + (reports, responses) per chunk
+        with self.assertNumQueries(2 + 2 * 3):
+            rows = list(iter_score_export_rows(queryset, chunk_size=2))
+        self.assertEqual(len(rows), 6)
+
+    def test_excel_export(self):
+        workbook = openpyxl.load_workbook(write_score_export_xlsx(ScoreReport.objects.all()))
+        sheet = workbook["Scores"]
+        self.assertEqual(sheet.max_row, 6)
+        self.assertTrue(sheet.cell(row=1, column=1).font.bold)
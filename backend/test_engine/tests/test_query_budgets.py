@@ -0,0 +1,131 @@
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APITestCase
+from proctoring.models import ProctoringPhoto, ProctoringHeartbeat, TestProctoringConfig, CandidateConsent
+from proctoring.utils import heartbeats, live_status, readiness
+from test_engine.models import (
+    Candidate, Test, Question, QuestionCategory, TestSectionConfig, TestQuestionSet,
+    TestAssignment, CandidateTestSession, Response
+)
+from test_engine.utils.compiled_test import get_compiled_test
+from test_engine.utils.question_order import materialize_question_order
+from .query_budget import QueryBudgetMixin
+
+
+# Tables written or read on every candidate request; these must never be scanned.
+HOT_TABLES = [
+    "test_engine_response",
+    "test_engine_candidatetestsession",
+    "test_engine_sectionstatus",
+    "test_engine_candidatesectionquestionorder",
+    "test_engine_sessionscorestate",
+    "proctoring_proctoringviolation",
+    "proctoring_proctoringheartbeat",
+    "proctoring_proctoringphoto",
+    "proctoring_liveproctoringstatus",
+]
+
+
+class TestQueryBudgets(QueryBudgetMixin, APITestCase):
+    def setUp(self):
+        heartbeats.flush_heartbeats()
+        readiness.invalidate_config()
+        category = QuestionCategory.objects.create(name="General")
+        self.test = Test.objects.create(name="Budget Test", total_duration_minutes=30)
+        self.section = TestSectionConfig.objects.create(
+            test=self.test, category=category, easy_questions=20, section_duration_minutes=20
+        )
+        self.questions = []
+        for i in range(20):
+            q = Question.objects.create(
+                text=f"Question {i}", correct_answer="a", options='["a", "b"]', difficulty="easy", category=category
+            )
+            TestQuestionSet.objects.create(test=self.test, question=q, order=i)
+            self.questions.append(q)
+
+        self.candidate = Candidate.objects.create(name="Candidate", email="c@example.com")
+        self.assignment = TestAssignment.objects.create(candidate=self.candidate, test=self.test)
+        self.session = CandidateTestSession.objects.create(
+            assignment=self.assignment, attempt_number=1, current_section=self.section,
+            section_started_at=timezone.now(),
+        )
+        heartbeats.forget_attempt(self.assignment.id)
+        live_status.start_attempt(self.assignment.id, 1)
+        ProctoringHeartbeat.objects.create(assignment=self.assignment, attempt_number=1)
+        get_compiled_test(self.test)
+        materialize_question_order(self.session)
+
+    def test_save_responses(self):
+        payload = {
+            "candidate": self.candidate.id, "test": self.test.id, "attempt_number": 1,
+            "responses": [{"question": q.id, "answer": "A"} for q in self.questions],
+        }
+        self.client.post(reverse("save-responses"), payload, format="json")  # first save creates rows
+        with self.assertQueryBudget(8, HOT_TABLES):
+            response = self.client.post(reverse("save-responses"), payload, format="json")
+        self.assertEqual(response.status_code, 200)
+
+    def test_start_session(self):
+        candidate = Candidate.objects.create(name="Second", email="s@example.com")
+        TestAssignment.objects.create(candidate=candidate, test=self.test)
+        payload = {"candidate": candidate.id, "test": self.test.id, "idempotency_key": "k"}
+        # fixed whatever the test's size: one INSERT per seeded table, savepoints included
+        with self.assertQueryBudget(19, HOT_TABLES):
+            response = self.client.post(reverse("start-session"), payload, format="json")
+        self.assertEqual(response.status_code, 200)
+        with self.assertQueryBudget(2, HOT_TABLES):  # assignment, then the keyed session
+            retry = self.client.post(reverse("start-session"), payload, format="json")
+        self.assertEqual(retry.data["session_id"], response.data["session_id"])
+
+    def test_resume_section(self):
+        payload = {"candidate": self.candidate.id, "test": self.test.id, "attempt_number": 1}
+        self.client.post(reverse("resume-section"), payload, format="json")
+        with self.assertQueryBudget(4, HOT_TABLES):
+            response = self.client.post(reverse("resume-section"), payload, format="json")
+        self.assertEqual(response.status_code, 200)
+
+    def test_check_ready(self):
+        TestProctoringConfig.objects.create(test=self.test, consent_text="ok", require_id_photo=False)
+        CandidateConsent.objects.create(
+            candidate=self.candidate, test_assignment=self.assignment, consent_text="ok", agreed=True
+        )
+        ProctoringPhoto.objects.create(
+            candidate=self.candidate, test_assignment=self.assignment, photo_type="face",
+            context="initial", image="proctoring_photos/face.jpg",
+        )
+        params = {"assignment_id": self.assignment.id, "candidate_id": self.candidate.id}
+        self.client.get("/api/proctoring/check-ready/", params)  # caches the test's config
+        with self.assertQueryBudget(1, HOT_TABLES):
+            response = self.client.get("/api/proctoring/check-ready/", params)
+        self.assertTrue(response.data["ready"])
+
+    def test_log_violations(self):
+        events = [{"type": "tab_switch", "severity": 2, "timestamp": 1700000000000 + i * 5000} for i in range(10)]
+        # test id, active attempt, then savepoint + insert + two counter UPDATEs + release
+        with self.assertQueryBudget(7, HOT_TABLES):
+            response = self.client.post(reverse("log-violations"), {
+                "assignment_id": self.assignment.id, "events": events,
+            }, format="json")
+        self.assertEqual(response.status_code, 201)
+
+    def test_heartbeat_ingest_and_flush(self):
+        for _ in range(3):
+            self.client.post(reverse("update_heartbeat"), {
+                "assignment_id": self.assignment.id, "screen_ok": True,
+            }, format="json")
+        # sessions, then savepoint + heartbeat read/update + session update + live read/update + release
+        with self.assertQueryBudget(8, HOT_TABLES):
+            heartbeats.flush_heartbeats()
+
+    def test_live_status(self):
+        admin = get_user_model().objects.create_superuser("admin", "admin@example.com", "pw")
+        self.client.force_authenticate(admin)
+        with self.assertQueryBudget(3, HOT_TABLES):
+            response = self.client.get(reverse("live-status"), {"test_id": self.test.id})
+        self.assertEqual(response.status_code, 200)
+
+    def test_harness_flags_unindexed_reads(self):
+        with self.assertRaisesRegex(AssertionError, "Full scan of test_engine_response"):
+            with self.assertQueryBudget(1, HOT_TABLES):
+                list(Response.objects.filter(answer="a"))
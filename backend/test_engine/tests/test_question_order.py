@@ -0,0 +1,89 @@
+from rest_framework.test import APITestCase
+from django.urls import reverse
+from django.utils import timezone
+from test_engine.models import (
+    Candidate, Test, Question, QuestionCategory, TestSectionConfig, TestQuestionSet,
+    TestAssignment, CandidateTestSession, CandidateSectionQuestionOrder
+)
+from test_engine.serializers import QuestionSerializer
+from test_engine.utils.compiled_test import get_compiled_test, invalidate_tests_for_questions
+from test_engine.utils.question_order import materialize_question_order
+
+
+class TestQuestionOrder(APITestCase):
+    def setUp(self):
+        self.test = Test.objects.create(name="Order Test", total_duration_minutes=60)
+        self.sections = []
+        for name, size in [("Small", 3), ("Large", 30)]:
+            category = QuestionCategory.objects.create(name=name)
+            self.sections.append(TestSectionConfig.objects.create(
+                test=self.test, category=category, section_duration_minutes=20
+            ))
+            for i in range(size):
+                q = Question.objects.create(
+                    text=f"{name} {i}", correct_answer="a", options='["a", "b"]', difficulty="easy", category=category
+                )
+                TestQuestionSet.objects.create(test=self.test, question=q, order=i)
+
+        self.candidate = Candidate.objects.create(name="Candidate", email="c@example.com")
+        self.assignment = TestAssignment.objects.create(candidate=self.candidate, test=self.test)
+
+    def start_session(self, section):
+        return CandidateTestSession.objects.create(
+            assignment=self.assignment,
+            attempt_number=CandidateTestSession.objects.count() + 1,
+            current_section=section,
+            section_started_at=timezone.now(),
+        )
+
+    def resume(self, session):
+        return self.client.post(reverse("resume-section"), {
+            "candidate": self.candidate.id, "test": self.test.id, "attempt_number": session.attempt_number,
+        }, format="json")
+
+    def test_whole_order_is_written_in_one_insert(self):
+        session = self.start_session(self.sections[0])
+        compiled = get_compiled_test(self.test)
+        with self.assertNumQueries(1):
+            materialize_question_order(session, compiled)
+        self.assertEqual(CandidateSectionQuestionOrder.objects.filter(session=session).count(), 33)
+
+    def test_resume_query_count_does_not_depend_on_section_size(self):
+        counts = []
+        for section in self.sections:
+            session = self.start_session(section)
+            materialize_question_order(session)
+            # session, section status get_or_create (4 on first visit), ordered question ids
+            with self.assertNumQueries(6) as ctx:
+                response = self.resume(session)
+            self.assertEqual(response.status_code, 200)
+            expected = list(
+                CandidateSectionQuestionOrder.objects.filter(session=session, section=section)
+                .values_list("question_id", flat=True)
+            )
+            self.assertEqual(
+                response.data["questions"],
+                [QuestionSerializer(Question.objects.get(id=qid)).data for qid in expected],
+            )
+            counts.append(len(ctx.captured_queries))
+        self.assertEqual(counts[0], counts[1])
+
+    def test_resume_materializes_order_for_older_sessions(self):
+        session = self.start_session(self.sections[1])
+        first = self.resume(session).data["questions"]
+        again = self.resume(session).data["questions"]
+        self.assertEqual(len(first), 30)
+        self.assertEqual(first, again)
+
+    def test_question_edit_refreshes_payload(self):
+        session = self.start_session(self.sections[0])
+        materialize_question_order(session)
+        self.resume(session)
+
+        question = self.sections[0].category.question_set.first()
+        question.text = "Edited"
+        question.save()
+        invalidate_tests_for_questions([question.id])  # what QuestionAdmin.save_model does
+
+        texts = [q["text"] for q in self.resume(session).data["questions"]]
+        self.assertIn("Edited", texts)
@@ -0,0 +1,100 @@
+import contextvars
+import unittest
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase
+from assessments import db_routers
+from assessments.db_routers import ReplicaRouter, ReplicaRoutingMiddleware, reporting_reads, replica_iter
+from test_engine.models import Candidate, Test, ScoreReport, Response
+
+
+def in_fresh_context(test):
+    """Run the test body in an empty context, so no pin from earlier writes leaks in."""
+    def wrapper(self, *args):
+        return contextvars.Context().run(test, self, *args)
+    return wrapper
+
+
+@mock.patch.object(db_routers, "replica_configured", return_value=True)
+class TestReplicaRouter(SimpleTestCase):
+    router = ReplicaRouter()
+
+    @in_fresh_context
+    def test_only_reporting_reads_use_the_replica(self, _):
+        self.assertEqual(self.router.db_for_read(Response), "default")
+        with reporting_reads():
+            self.assertEqual(self.router.db_for_read(Response), "replica")
+            self.assertEqual(self.router.db_for_read(get_user_model()), "default")
+        self.assertEqual(self.router.db_for_write(Response), "default")
+
+    @in_fresh_context
+    def test_a_write_pins_later_reads_to_the_primary(self, _):
+        with reporting_reads():
+            self.router.db_for_write(ScoreReport)
+            self.assertEqual(self.router.db_for_read(ScoreReport), "default")
+
+    @in_fresh_context
+    def test_streaming_keeps_reporting_reads(self, _):
+        def rows():
+            for _ in range(2):
+                yield self.router.db_for_read(Response)
+        self.assertEqual(list(replica_iter(rows())), ["replica", "replica"])
+
+    @in_fresh_context
+    def test_admin_write_sets_sticky_cookie(self, _):
+        def view(request):
+            self.assertFalse(db_routers._reporting.get())  # POST: not a reporting request
+            self.router.db_for_write(ScoreReport)
+            return HttpResponse()
+
+        response = ReplicaRoutingMiddleware(view)(RequestFactory().post("/admin/test_engine/scorereport/1/change/"))
+        self.assertIn(db_routers.PIN_COOKIE, response.cookies)
+
+        def next_view(request):
+            with reporting_reads():
+                return HttpResponse(self.router.db_for_read(ScoreReport))
+
+        request = RequestFactory().get("/admin/test_engine/scorereport/")
+        request.COOKIES[db_routers.PIN_COOKIE] = "1"
+        self.assertEqual(ReplicaRoutingMiddleware(next_view)(request).content, b"default")
+        self.assertEqual(
+            ReplicaRoutingMiddleware(next_view)(RequestFactory().get("/admin/test_engine/scorereport/")).content,
+            b"replica",
+        )
+
+
+# DATABASE_REPLICA_URL=sqlite:////tmp/replica.sqlite3 python manage.py test test_engine.tests.test_replica_routing
+@unittest.skipUnless("replica" in settings.DATABASES, "DATABASE_REPLICA_URL not set")
+class TestReplicaAliases(TestCase):
+    databases = {"default", "replica"} if "replica" in settings.DATABASES else {"default"}
+
+    def report(self, using, score):
+        candidate = Candidate.objects.using(using).create(name="C", email="c@example.com")
+        test = Test.objects.using(using).create(name="Reported", total_duration_minutes=30)
+        return ScoreReport.objects.using(using).create(
+            candidate=candidate, test=test, score=score, total_positive=score, total_negative=0,
+            total_correct=1, total_wrong=0, total_unattempted=0,
+        )
+
+    def test_score_report_reads_replica_then_falls_back_to_primary(self):
+        primary = self.report("default", 5)
+        params = {"email": "c@example.com", "test_id": primary.test_id}
+
+        # not replicated yet: served from the primary
+        response = self.client.get("/api/report/", params)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["report"]["score"], "5.00")
+
+        self.report("replica", 7)
+        response = self.client.get("/api/report/", params)
+        self.assertEqual(response.data["report"]["score"], "7.00")
+
+    def test_admin_changelist_reads_replica(self):
+        self.report("replica", 7)
+        admin = get_user_model().objects.create_superuser("admin", "admin@example.com", "pw")
+        self.client.force_login(admin)
+        response = self.client.get("/admin/test_engine/scorereport/")
+        self.assertContains(response, "Reported")
@@ -0,0 +1,91 @@
+import tempfile
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from django.urls import reverse
+from rest_framework.test import APIClient
+from test_engine.models import (
+    Candidate, Test, Question, QuestionCategory, TestSectionConfig, TestQuestionSet, Response, ReportJob, ScoreReport
+)
+from test_engine.utils import report_jobs
+from test_engine.utils.report_jobs import enqueue_report_job, run_pending_jobs
+
+
+class TestReportJobs(TestCase):
+    def setUp(self):
+        self.media = tempfile.TemporaryDirectory()
+        self.addCleanup(self.media.cleanup)
+        self.settings_override = override_settings(MEDIA_ROOT=self.media.name)
+        self.settings_override.enable()
+        self.addCleanup(self.settings_override.disable)
+
+        category = QuestionCategory.objects.create(name="General")
+        self.test = Test.objects.create(name="Queued Test", total_duration_minutes=30)
+        TestSectionConfig.objects.create(test=self.test, category=category)
+        q = Question.objects.create(
+            text="2 + 2", correct_answer="4", options='["4", "5"]', difficulty="easy", category=category
+        )
+        TestQuestionSet.objects.create(test=self.test, question=q)
+        self.candidate = Candidate.objects.create(name="Queued", email="q@example.com")
+        Response.objects.create(candidate=self.candidate, test=self.test, question=q, answer="4")
+
+    def test_enqueue_is_deduplicated_and_worker_builds_report(self):
+        for _ in range(3):
+            enqueue_report_job(self.candidate.id, self.test.id, 1)
+        self.assertEqual(ReportJob.objects.count(), 1)
+
+        self.assertEqual(run_pending_jobs(), 1)
+        job = ReportJob.objects.get()
+        self.assertEqual(job.status, "done")
+        self.assertTrue(job.report_path.endswith(".xlsx"))
+        self.assertEqual(float(ScoreReport.objects.get(candidate=self.candidate).score), 1.0)
+
+        # A finished job is re-armed by the next enqueue
+        enqueue_report_job(self.candidate.id, self.test.id, 1)
+        self.assertEqual(ReportJob.objects.get().status, "pending")
+
+    def test_failures_are_retried_then_marked_failed(self):
+        job = enqueue_report_job(self.candidate.id, self.test.id, 1)
+        with mock.patch.object(report_jobs, "generate_score_report_excel", side_effect=OSError("disk full")):
+            for _ in range(job.max_attempts):
+                ReportJob.objects.filter(pk=job.pk).update(run_after=job.created_at)
+                run_pending_jobs()
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, "failed")
+        self.assertEqual(job.attempts, job.max_attempts)
+        self.assertIn("disk full", job.last_error)
+
+    def test_stale_jobs_are_requeued_until_out_of_tries(self):
+        job = enqueue_report_job(self.candidate.id, self.test.id, 1)
+        other = Candidate.objects.create(name="Crashed", email="x@example.com")
+        crashed = enqueue_report_job(other.id, self.test.id, 1)
+        long_ago = timezone.now() - report_jobs.STALE_RUNNING_AFTER * 2
+        ReportJob.objects.filter(pk=job.pk).update(status="running", attempts=1, updated_at=long_ago)
+        ReportJob.objects.filter(pk=crashed.pk).update(
+            status="running", attempts=crashed.max_attempts, updated_at=long_ago
+        )
+
+        self.assertEqual(report_jobs.requeue_stale_jobs(), 1)
+        job.refresh_from_db()
+        crashed.refresh_from_db()
+        self.assertEqual(job.status, "pending")
+        self.assertEqual(crashed.status, "failed")
+        self.assertTrue(crashed.last_error)
+
+    def test_status_needs_the_candidates_email_or_staff(self):
+        enqueue_report_job(self.candidate.id, self.test.id, 1)
+        url = reverse("report-status")
+        params = {"candidate": self.candidate.id, "test": self.test.id}
+        client = APIClient()
+
+        self.assertEqual(client.get(url, params).status_code, 400)
+        self.assertEqual(client.get(url, {**params, "email": "other@example.com"}).status_code, 404)
+        response = client.get(url, {**params, "email": self.candidate.email})
+        self.assertEqual(response.data["status"], "pending")
+
+        admin = get_user_model().objects.create_superuser("admin", "admin@example.com", "pw")
+        client.force_authenticate(admin)
+        self.assertEqual(client.get(url, params).status_code, 200)
@@ -0,0 +1,111 @@
+from rest_framework.test import APITestCase
+from django.test import override_settings
+from django.urls import reverse
+from django.utils import timezone
+from test_engine.models import (
+    Candidate, Test, Question, QuestionCategory, TestSectionConfig, TestQuestionSet,
+    TestAssignment, CandidateTestSession, Response, ArchivedResponse
+)
+from test_engine.utils import answer_buffer
+from test_engine.utils.score_state import seed_score_state, score_from_state, verify_score_state
+from test_engine.utils.scoring import calculate_score_for_candidate
+
+
+class TestBulkSaveResponses(APITestCase):
+    def setUp(self):
+        self.category = QuestionCategory.objects.create(name="General")
+        self.test = Test.objects.create(name="Mock Test", total_duration_minutes=30)
+        self.section = TestSectionConfig.objects.create(test=self.test, category=self.category, easy_questions=20)
+
+        self.questions = []
+        for i in range(20):
+            q = Question.objects.create(
+                text=f"Question {i}",
+                correct_answer="89",
+                options='["89", "102", "97", "91"]',
+                difficulty="easy",
+                category=self.category,
+            )
+            TestQuestionSet.objects.create(test=self.test, question=q, order=i)
+            self.questions.append(q)
+
+        self.candidate = Candidate.objects.create(name="Candidate", email="c@example.com")
+        self.assignment = TestAssignment.objects.create(candidate=self.candidate, test=self.test)
+        self.session = CandidateTestSession.objects.create(
+            assignment=self.assignment, attempt_number=1, current_section=self.section,
+            section_started_at=timezone.now()
+        )
+
+    def post_answers(self, questions, answer):
+        return self.client.post(reverse("save-responses"), {
+            "candidate": self.candidate.id,
+            "test": self.test.id,
+            "attempt_number": 1,
+            "responses": [{"question": q.id, "answer": answer} for q in questions],
+        }, format="json")
+
+    def test_choice_letters_are_stored_as_raw_option_text(self):
+        response = self.post_answers(self.questions, "B")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(Response.objects.filter(test=self.test, answer="102").count(), 20)
+        self.assertEqual(ArchivedResponse.objects.count(), 0)
+
+    def test_only_changed_rows_are_archived(self):
+        self.post_answers(self.questions, "A")
+        self.post_answers(self.questions[:5], "C")
+        self.post_answers(self.questions[5:10], "A")  # unchanged
+
+        self.assertEqual(ArchivedResponse.objects.count(), 5)
+        self.assertEqual(Response.objects.filter(answer="97").count(), 5)
+        self.assertEqual(Response.objects.filter(answer="89").count(), 15)
+
+    def test_running_score_state_matches_full_rescore(self):
+        seed_score_state(self.session)
+        self.post_answers(self.questions[:8], "A")    # correct
+        self.post_answers(self.questions[4:12], "B")  # 4 flip to wrong, 4 new wrong
+        self.post_answers(self.questions[12:14], "")  # unattempted
+        self.post_answers(self.questions[:2], "A")    # back to correct
+
+        self.assertEqual(verify_score_state(self.session), {})
+        from_state = score_from_state(self.session)["report"]
+        full = calculate_score_for_candidate(self.test, self.candidate, 1)["report"]
+        self.assertEqual(
+            (from_state.score, from_state.total_correct, from_state.total_wrong, from_state.total_unattempted),
+            (full.score, full.total_correct, full.total_wrong, full.total_unattempted),
+        )
+
+        Response.objects.filter(question=self.questions[0]).update(answer="91")  # out-of-band edit
+        self.assertIn(self.category.id, verify_score_state(self.session, repair=True))
+        self.assertEqual(verify_score_state(self.session), {})
+
+    def test_query_count_does_not_grow_with_payload(self):
+        self.post_answers(self.questions[:2], "A")
+        with self.assertNumQueries(9):
+            self.post_answers(self.questions[:2], "B")
+        with self.assertNumQueries(9):
+            self.post_answers(self.questions, "C")
+
+
+@override_settings(ANSWER_WRITE_BEHIND=True)
+class TestWriteBehindAutosave(TestBulkSaveResponses):
+    def autosave(self, question, answer):
+        return self.client.post(reverse("save-response"), {
+            "candidate": self.candidate.id,
+            "test": self.test.id,
+            "attempt_number": 1,
+            "question": question.id,
+            "answer": answer,
+        }, format="json")
+
+    def test_autosaves_collapse_and_flush_before_submit(self):
+        q = self.questions[0]
+        for answer in ["A", "B", "C"]:
+            self.assertEqual(self.autosave(q, answer).data["status"], "buffered")
+        self.assertFalse(Response.objects.filter(question=q).exists())
+        self.assertEqual(answer_buffer.pending_count(), 1)
+
+        self.post_answers(self.questions[1:3], "D")
+
+        self.assertEqual(answer_buffer.pending_count(), 0)
+        self.assertEqual(Response.objects.get(question=q).answer, "97")
+        self.assertEqual(ArchivedResponse.objects.count(), 0)
@@ -0,0 +1,93 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.core.management import call_command
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APITestCase
+from proctoring.utils import heartbeats
+from test_engine.models import (
+    Candidate, Test, Question, QuestionCategory, TestSectionConfig, TestQuestionSet,
+    TestAssignment, CandidateTestSession, SectionStatus, ReportJob
+)
+from test_engine.utils.section_timer import DeadlineHeap, expire_due
+from test_engine.utils.sessions import start_session
+from .query_budget import QueryBudgetMixin
+from .test_query_budgets import HOT_TABLES
+
+
+class TestSectionTimer(QueryBudgetMixin, APITestCase):
+    def setUp(self):
+        self.test = Test.objects.create(name="Timed", total_duration_minutes=40)
+        self.sections = []
+        for name in ("First", "Second"):
+            category = QuestionCategory.objects.create(name=name)
+            self.sections.append(TestSectionConfig.objects.create(
+                test=self.test, category=category, section_duration_minutes=20
+            ))
+            q = Question.objects.create(
+                text=name, correct_answer="a", options='["a", "b"]', difficulty="easy", category=category
+            )
+            TestQuestionSet.objects.create(test=self.test, question=q, order=0)
+
+        candidate = Candidate.objects.create(name="Candidate", email="c@example.com")
+        self.started = timezone.now() - timedelta(minutes=50)
+        self.assignment = TestAssignment.objects.create(
+            candidate=candidate, test=self.test, valid_from=self.started - timedelta(hours=1)
+        )
+        heartbeats.forget_attempt(self.assignment.id)
+        self.session = start_session(self.assignment.id, now=self.started - timedelta(minutes=1))[0]
+        self.backdate(self.started)
+
+    def backdate(self, started_at):
+        CandidateTestSession.objects.filter(id=self.session.id).update(section_started_at=started_at)
+        SectionStatus.objects.filter(session=self.session).update(started_at=started_at)
+
+    def test_abandoned_session_is_advanced_then_completed(self):
+        heap = DeadlineHeap()
+        with self.assertQueryBudget(1, HOT_TABLES):
+            self.assertEqual(heap.refresh(), 1)
+
+        self.assertEqual(expire_due(heap), (1, 0))
+        self.session.refresh_from_db()
+        self.assertEqual(self.session.current_section, self.sections[1])
+        first = SectionStatus.objects.get(session=self.session, section=self.sections[0])
+        self.assertTrue(first.auto_submitted)
+        self.assertEqual(first.submitted_at, self.started + timedelta(minutes=20))
+        self.assertFalse(ReportJob.objects.exists())  # scored once, at completion
+
+        # the next section's deadline was queued right away; once it passes the attempt completes
+        later = timezone.now() + timedelta(minutes=21)
+        self.assertEqual(expire_due(heap, now=later), (0, 1))
+        self.session.refresh_from_db()
+        self.assertTrue(self.session.completed)
+        self.assertTrue(ReportJob.objects.filter(test=self.test, attempt_number=1).exists())
+        self.assertEqual(len(heap), 0)
+
+    def test_nothing_expires_before_deadline_and_grace(self):
+        self.backdate(timezone.now() - timedelta(minutes=20) + timedelta(seconds=5))
+        heap = DeadlineHeap()
+        heap.refresh()
+        self.assertEqual(expire_due(heap), (0, 0))
+        self.assertEqual(expire_due(heap, now=timezone.now() + timedelta(seconds=5)), (0, 0))  # within grace
+        self.assertEqual(len(heap), 1)
+
+    def test_session_moved_on_by_the_client_is_not_advanced_twice(self):
+        heap = DeadlineHeap()
+        heap.refresh()
+        response = self.client.post(reverse("resume-section"), {
+            "candidate": self.assignment.candidate_id, "test": self.test.id, "attempt_number": 1,
+        }, format="json")
+        self.assertEqual(response.data["section_id"], self.sections[1].id)
+
+        self.assertEqual(expire_due(heap), (0, 0))
+        heap.refresh()
+        self.assertEqual(expire_due(heap), (0, 0))  # second section has 20 minutes left
+        self.session.refresh_from_db()
+        self.assertEqual(self.session.current_section, self.sections[1])
+        self.assertFalse(self.session.completed)
+
+    def test_worker_once(self):
+        out = StringIO()
+        call_command("run_section_timer", "--once", stdout=out)
+        self.assertIn("Advanced 1 session(s), completed 0", out.getvalue())
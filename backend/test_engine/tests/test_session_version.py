@@ -0,0 +1,67 @@
+from datetime import timedelta
+
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APITestCase
+from proctoring.utils import heartbeats
+from test_engine.models import (
+    Candidate, Test, Question, QuestionCategory, TestSectionConfig, TestQuestionSet,
+    TestAssignment, CandidateTestSession, SectionStatus, ReportJob
+)
+from test_engine.utils.section_timer import advance_session
+from test_engine.utils.sessions import start_session
+
+
+class TestSessionVersion(APITestCase):
+    def setUp(self):
+        self.test = Test.objects.create(name="Versioned", total_duration_minutes=60)
+        self.sections = []
+        for name in ("One", "Two", "Three"):
+            category = QuestionCategory.objects.create(name=name)
+            self.sections.append(TestSectionConfig.objects.create(
+                test=self.test, category=category, section_duration_minutes=20
+            ))
+            q = Question.objects.create(
+                text=name, correct_answer="a", options='["a", "b"]', difficulty="easy", category=category
+            )
+            TestQuestionSet.objects.create(test=self.test, question=q, order=0)
+
+        self.candidate = Candidate.objects.create(name="Candidate", email="c@example.com")
+        self.assignment = TestAssignment.objects.create(candidate=self.candidate, test=self.test)
+        heartbeats.forget_attempt(self.assignment.id)
+        self.session = start_session(self.assignment.id)[0]
+
+    def load(self):
+        return CandidateTestSession.objects.select_related("assignment__test", "current_section").get(
+            id=self.session.id
+        )
+
+    def test_stale_copy_loses_the_transition(self):
+        first, second = self.load(), self.load()
+        now = timezone.now()
+        self.assertTrue(first.transition(section_started_at=now))
+        self.assertEqual(first.version, 1)
+        self.assertFalse(second.transition(section_started_at=now - timedelta(minutes=5)))
+        self.assertEqual(self.load().section_started_at, now)
+
+    def test_concurrent_advances_move_one_section(self):
+        first, second = self.load(), self.load()
+        first_status = SectionStatus.objects.get(session=self.session, section=self.sections[0])
+
+        self.assertEqual(advance_session(first, first_status).section_id, self.sections[1].id)
+        # the loser reports where the session is instead of skipping section two
+        self.assertEqual(advance_session(second, first_status).section_id, self.sections[1].id)
+        self.assertEqual(self.load().current_section, self.sections[1])
+        self.assertEqual(SectionStatus.objects.filter(session=self.session).count(), 2)
+
+    def test_repeated_submit_scores_once(self):
+        payload = {"candidate": self.candidate.id, "test": self.test.id, "attempt_number": 1}
+        self.assertEqual(self.client.post(reverse("submit-test"), payload, format="json").status_code, 200)
+        job = ReportJob.objects.get(test=self.test, attempt_number=1)
+        ReportJob.objects.filter(id=job.id).update(status="done")
+
+        self.client.post(reverse("submit-test"), payload, format="json")
+        self.client.post(reverse("auto-submit"), payload, format="json")
+        job.refresh_from_db()
+        self.assertEqual(job.status, "done")  # not re-armed for another scoring run
+        self.assertFalse(SectionStatus.objects.filter(session=self.session, auto_submitted=True).exists())
@@ -0,0 +1,87 @@
+from datetime import timedelta
+
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APITestCase
+from proctoring.models import LiveProctoringStatus, ProctoringHeartbeat
+from proctoring.utils import heartbeats
+from test_engine.models import (
+    Candidate, Test, Question, QuestionCategory, TestSectionConfig, TestQuestionSet,
+    TestAssignment, CandidateTestSession, CandidateSectionQuestionOrder, SectionStatus, SessionScoreState
+)
+from test_engine.utils.sessions import start_session
+
+
+class TestStartSession(APITestCase):
+    def setUp(self):
+        self.test = Test.objects.create(name="Start Test", total_duration_minutes=60)
+        self.sections = []
+        for name in ("First", "Second"):
+            category = QuestionCategory.objects.create(name=name)
+            self.sections.append(TestSectionConfig.objects.create(
+                test=self.test, category=category, section_duration_minutes=20
+            ))
+            for i in range(5):
+                q = Question.objects.create(
+                    text=f"{name} {i}", correct_answer="a", options='["a", "b"]', difficulty="easy", category=category
+                )
+                TestQuestionSet.objects.create(test=self.test, question=q, order=i)
+
+        self.candidate = Candidate.objects.create(name="Candidate", email="c@example.com")
+        self.assignment = TestAssignment.objects.create(candidate=self.candidate, test=self.test, max_attempts=2)
+        heartbeats.forget_attempt(self.assignment.id)
+
+    def start(self, **extra):
+        return self.client.post(reverse("start-session"), {
+            "candidate": self.candidate.id, "test": self.test.id, **extra
+        }, format="json")
+
+    def test_start_seeds_the_attempt(self):
+        response = self.start()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["attempt_number"], 1)
+        self.assertEqual(response.data["section_id"], self.sections[0].id)
+        self.assertEqual(response.data["section_name"], "First")
+
+        session = CandidateTestSession.objects.get()
+        self.assertEqual(session.current_section, self.sections[0])
+        self.assertTrue(SectionStatus.objects.filter(session=session, section=self.sections[0]).exists())
+        self.assertEqual(CandidateSectionQuestionOrder.objects.filter(session=session).count(), 10)
+        self.assertEqual(SessionScoreState.objects.filter(session=session).count(), 2)
+        self.assertEqual(
+            ProctoringHeartbeat.objects.get(assignment=self.assignment, attempt_number=1).candidate_status,
+            "in_progress",
+        )
+        self.assertEqual(LiveProctoringStatus.objects.get(assignment=self.assignment).attempt_number, 1)
+
+    def test_attempt_limit_counts_each_start_once(self):
+        self.assertEqual(self.start().data["attempt_number"], 1)
+        self.assertEqual(self.start().data["attempt_number"], 2)
+        response = self.start()
+        self.assertEqual(response.status_code, 403)
+        self.assertEqual(response.data["status"], "max_attempts_exceeded")
+        self.assertEqual(CandidateTestSession.objects.count(), 2)
+
+    def test_closed_window_creates_nothing(self):
+        TestAssignment.objects.filter(id=self.assignment.id).update(valid_to=timezone.now() - timedelta(days=1))
+        response = self.start()
+        self.assertEqual(response.status_code, 403)
+        self.assertEqual(response.data["status"], "window_expired")
+        self.assertFalse(CandidateTestSession.objects.exists())
+
+    def test_retried_start_returns_the_same_session(self):
+        first = self.start(idempotency_key="click-1")
+        retry = self.client.post(
+            reverse("start-session"), {"candidate": self.candidate.id, "test": self.test.id},
+            format="json", HTTP_IDEMPOTENCY_KEY="click-1",
+        )
+        self.assertEqual(retry.status_code, 200)
+        self.assertEqual(retry.data["session_id"], first.data["session_id"])
+        self.assertEqual(CandidateTestSession.objects.count(), 1)
+
+        with self.assertNumQueries(1):
+            session, created, refused = start_session(self.assignment.id, "click-1")
+        self.assertFalse(created)
+        self.assertEqual(session.id, first.data["session_id"])
+
+        self.assertEqual(self.start(idempotency_key="click-2").data["attempt_number"], 2)
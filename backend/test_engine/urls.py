@@ -3,7 +3,7 @@ from django.urls import path
 from .views import (
     TestDetailAPIView, SubmitTestAPIView, ScoreReportByEmailAPIView,
     SavePerQuestionResponseAPIView, StartSessionAPIView, ResumeSectionAPIView, ResumeSessionAPIView, AutoSubmitAPIView,
-    SaveBulkResponsesAPIView, VerifySecretsAPIView
+    SaveBulkResponsesAPIView, VerifySecretsAPIView, ReportJobStatusAPIView
 )
 
 urlpatterns = [
@@ -17,5 +17,6 @@ urlpatterns = [
     path('resume-session/', ResumeSessionAPIView.as_view(), name='resume-session'),
     path('auto-submit/', AutoSubmitAPIView.as_view(), name='auto-submit'),
     path('verify-secrets/', VerifySecretsAPIView.as_view(), name='verify-secrets'),
+    path('report-status/', ReportJobStatusAPIView.as_view(), name='report-status'),
 
 ]
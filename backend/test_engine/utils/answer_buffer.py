@@ -0,0 +1,88 @@
+"""
+Write-behind buffer for per-question autosaves.
+
+When `settings.ANSWER_WRITE_BEHIND` is on, `SavePerQuestionResponseAPIView` drops each
+autosave into an in-process buffer keyed by (candidate, test, attempt) → question, so
+repeated clicks on the same question collapse into one pending write. A daemon thread
+persists the buffer through `save_responses_bulk` every `ANSWER_FLUSH_INTERVAL_SECONDS`.
+
+Anything that scores or completes a section must call `flush_session()` first.
+The buffer lives in the worker process, so this mode is only safe when a candidate's
+requests are all served by the same process (single worker with threads, or sticky routing).
+"""
+import atexit
+import threading
+
+from django.conf import settings
+
+from .background import PeriodicFlusher
+from .responses import save_responses_bulk
+
+
+_pending = {}
+_pending_lock = threading.Lock()
+# Serializes persists so an older snapshot can never land after a newer one.
+_flush_lock = threading.RLock()
+
+
+def write_behind_enabled():
+    return getattr(settings, "ANSWER_WRITE_BEHIND", False)
+
+
+def _session_key(candidate_id, test_id, attempt_number):
+    return int(candidate_id), int(test_id), int(attempt_number)
+
+
+def buffer_response(candidate_id, test_id, attempt_number, response):
+    key = _session_key(candidate_id, test_id, attempt_number)
+    with _pending_lock:
+        _pending.setdefault(key, {})[int(response["question"])] = response
+    _flusher.start()
+
+
+def pending_count():
+    with _pending_lock:
+        return sum(len(batch) for batch in _pending.values())
+
+
+def _persist(key, batch):
+    try:
+        save_responses_bulk(*key, list(batch.values()), skip_missing=True)
+    except Exception:
+        # Put the batch back without clobbering anything written since we took it.
+        with _pending_lock:
+            newer = _pending.get(key, {})
+            _pending[key] = {**batch, **newer}
+        raise
+
+
+def flush_session(candidate_id, test_id, attempt_number):
+    """Synchronously persist everything buffered for one attempt."""
+    key = _session_key(candidate_id, test_id, attempt_number)
+    with _flush_lock:
+        with _pending_lock:
+            batch = _pending.pop(key, None)
+        if batch:
+            _persist(key, batch)
+
+
+def flush_all():
+    with _flush_lock:
+        with _pending_lock:
+            keys = list(_pending)
+        for key in keys:
+            with _pending_lock:
+                batch = _pending.pop(key, None)
+            if batch:
+                try:
+                    _persist(key, batch)
+                except Exception as e:
+                    print(f"⚠️ Failed to flush buffered answers for {key}:", e)
+
+
+_flusher = PeriodicFlusher(
+    "answer-buffer-flusher",
+    getattr(settings, "ANSWER_FLUSH_INTERVAL_SECONDS", 2),
+    flush_all,
+)
+atexit.register(flush_all)
@@ -0,0 +1,280 @@
+"""
+Evaluated answer-sheet export.
+
+`iter_answer_sheet_payloads` walks the selected reports in chunks and turns each one into
+a plain dict (questions come from the compiled test, responses and sessions are fetched
+once per chunk). `render_answer_sheet` builds the workbook from such a dict without
+touching the database, so it can run in a process pool. `build_answer_sheet_zip` feeds
+payloads to the pool with a bounded window and writes every finished workbook into the
+zip as soon as it arrives; peak memory is a few workbooks, not the whole archive.
+The process pool is for the offline `export_answer_sheets` command; the admin action
+renders inline (workers=1) so no pool is forked from a threaded web worker.
+"""
+import io
+import os
+import zipfile
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from datetime import timedelta
+
+import openpyxl
+from django.conf import settings
+from django.utils.text import slugify
+from openpyxl.styles import Font
+
+from ..models import Response, ScoreReport, CandidateTestSession
+from .compiled_test import get_compiled_test
+
+
+EXPORT_CHUNK_SIZE = 500
+
+SHEET_HEADERS = [
+    "#", "Category", "Difficulty", "Question",
+    "Your Answer (Choice)", "Your Answer (Raw)",
+    "Correct Answer (Choice)", "Correct Answer (Raw)",
+    "Status", "+Marks", "-Marks", "Score Awarded", "Time Taken (s)", "Answered At", "Within Time?"
+]
+SUMMARY_HEADERS = [
+    "Category", "Total", "Correct", "Wrong", "Unattempted",
+    "Total +Marks", "Total -Marks", "Net Score", "Max Score", "Percentage",
+    "Section Start", "Allotted Duration (min)", "Should End Time"
+]
+
+
+def export_workers():
+    return getattr(settings, "ANSWER_SHEET_EXPORT_WORKERS", None) or min(4, os.cpu_count() or 1)
+
+
+def answer_sheet_filename(report):
+    suffix = f"_attempt{report.attempt_number}" if report.attempt_number > 1 else ""
+    return f"{slugify(report.test.name)}_{slugify(report.candidate.name)}{suffix}.xlsx"
+
+
+def _question_payload(q):
+    return {
+        "id": q.id,
+        "category_id": q.category_id,
+        "category": q.category_name,
+        "difficulty": q.difficulty,
+        "text": q.text,
+        "options": q.options,
+        "correct_answer": q.correct_answer,
+        "positive_marks": q.positive_marks,
+        "negative_marks": q.negative_marks,
+    }
+
+
+def iter_answer_sheet_payloads(queryset, chunk_size=EXPORT_CHUNK_SIZE):
+    report_ids = list(queryset.order_by("pk").values_list("pk", flat=True))
+    questions_by_test = {}
+
+    for start in range(0, len(report_ids), chunk_size):
+        reports = list(
+            ScoreReport.objects.filter(pk__in=report_ids[start:start + chunk_size])
+            .select_related("candidate", "test")
+            .order_by("pk")
+        )
+        keys = {(r.candidate_id, r.test_id, r.attempt_number) for r in reports}
+        candidate_ids = {k[0] for k in keys}
+        test_ids = {k[1] for k in keys}
+
+        responses = defaultdict(dict)
+        for candidate_id, test_id, attempt, question_id, answer, time_spent, answered_at in Response.objects.filter(
+            candidate_id__in=candidate_ids, test_id__in=test_ids
+        ).values_list(
+            "candidate_id", "test_id", "attempt_number", "question_id", "answer", "time_spent", "answered_at"
+        ).iterator():
+            if (candidate_id, test_id, attempt) in keys:
+                responses[(candidate_id, test_id, attempt)][question_id] = (answer, time_spent, answered_at)
+
+        section_started = {
+            (candidate_id, test_id, attempt): started_at
+            for candidate_id, test_id, attempt, started_at in CandidateTestSession.objects.filter(
+                assignment__candidate_id__in=candidate_ids, assignment__test_id__in=test_ids
+            ).values_list(
+                "assignment__candidate_id", "assignment__test_id", "attempt_number", "section_started_at"
+            )
+        }
+
+        for report in reports:
+            if report.test_id not in questions_by_test:
+                compiled = get_compiled_test(report.test)
+                questions_by_test[report.test_id] = (
+                    [_question_payload(compiled.questions[qid]) for qid in sorted(compiled.questions)],
+                    {category_id: duration for _, category_id, _, duration in compiled.sections},
+                    {name: duration for _, _, name, duration in compiled.sections},
+                )
+            questions, durations, durations_by_name = questions_by_test[report.test_id]
+            key = (report.candidate_id, report.test_id, report.attempt_number)
+            yield {
+                "filename": answer_sheet_filename(report),
+                "questions": questions,
+                "responses": responses.get(key, {}),
+                "section_durations": durations,
+                "section_durations_by_name": durations_by_name,
+                "section_started_at": section_started.get(key),
+            }
+
+
+def _choice_letter(val, options):
+    try:
+        return chr(options.index(val) + ord('A'))
+    except ValueError:
+        return ""
+
+
+def _label_all(raw, options):
+    return ",".join(
+        _choice_letter(val, options) for val in raw.split(",") if _choice_letter(val, options)
+    )
+
+
+def render_answer_sheet(payload):
+    """Build one evaluated answer sheet from a payload dict. Returns (filename, xlsx bytes)."""
+    wb = openpyxl.Workbook()
+    main_ws = wb.active
+    main_ws.title = "Answer Sheet"
+    summary_ws = wb.create_sheet(title="Category Summary")
+
+    main_ws.append(SHEET_HEADERS)
+    for cell in main_ws[1]:
+        cell.font = Font(bold=True)
+
+    started_at = payload["section_started_at"]
+    category_summary = {}
+
+    for i, q in enumerate(payload["questions"], start=1):
+        r = payload["responses"].get(q["id"])
+        answer, time_spent, answered_at = r if r else (None, "", None)
+        raw_submitted = (answer or "").strip()
+        raw_correct = (q["correct_answer"] or "").strip()
+
+        status = "Unattempted"
+        awarded = 0
+        if raw_submitted:
+            if sorted(raw_submitted.split(",")) == sorted(raw_correct.split(",")):
+                status = "Correct"
+                awarded = q["positive_marks"]
+            else:
+                status = "Wrong"
+                awarded = -q["negative_marks"]
+
+        cat = q["category"]
+        stats = category_summary.setdefault(cat, {
+            "total_qs": 0, "correct": 0, "wrong": 0,
+            "unattempted": 0, "positive": 0, "negative": 0, "max_marks": 0,
+        })
+        stats["total_qs"] += 1
+        stats["max_marks"] += q["positive_marks"]
+        if status == "Correct":
+            stats["correct"] += 1
+            stats["positive"] += q["positive_marks"]
+        elif status == "Wrong":
+            stats["wrong"] += 1
+            stats["negative"] += q["negative_marks"]
+        else:
+            stats["unattempted"] += 1
+
+        # Determine if answered within time
+        within_time = ""
+        answered_at_str = ""
+        if answered_at:
+            answered_at_str = answered_at.strftime("%Y-%m-%d %H:%M:%S")
+            duration = payload["section_durations"].get(q["category_id"])
+            if started_at and duration is not None:
+                within_time = "Yes" if answered_at <= started_at + timedelta(minutes=duration) else "No"
+
+        main_ws.append([
+            i,
+            cat,
+            q["difficulty"],
+            q["text"][:200].replace("\n", " "),
+            _label_all(raw_submitted, q["options"]),
+            raw_submitted,
+            _label_all(raw_correct, q["options"]),
+            raw_correct,
+            status,
+            q["positive_marks"],
+            q["negative_marks"],
+            awarded,
+            time_spent,
+            answered_at_str,
+            within_time
+        ])
+
+    summary_ws.append(SUMMARY_HEADERS)
+    for cell in summary_ws[1]:
+        cell.font = Font(bold=True)
+
+    grand = {
+        "total_qs": 0, "correct": 0, "wrong": 0, "unattempted": 0,
+        "positive": 0, "negative": 0, "max_marks": 0
+    }
+    section_start = started_at.strftime("%Y-%m-%d %H:%M:%S") if started_at else ""
+
+    for cat, s in category_summary.items():
+        net_score = s["positive"] - s["negative"]
+        percent = (net_score / s["max_marks"] * 100) if s["max_marks"] else 0
+        duration = payload["section_durations_by_name"].get(cat)
+        end_time = (started_at + timedelta(minutes=duration)).strftime("%Y-%m-%d %H:%M:%S") if started_at and duration else ""
+
+        summary_ws.append([
+            cat, s["total_qs"], s["correct"], s["wrong"], s["unattempted"],
+            s["positive"], s["negative"], net_score, s["max_marks"], round(percent, 2),
+            section_start, duration if duration is not None else "", end_time
+        ])
+        for key in grand:
+            grand[key] += s[key]
+
+    grand_net = grand["positive"] - grand["negative"]
+    grand_percent = (grand_net / grand["max_marks"] * 100) if grand["max_marks"] else 0
+    summary_ws.append([
+        "Grand Total", grand["total_qs"], grand["correct"], grand["wrong"], grand["unattempted"],
+        grand["positive"], grand["negative"], grand_net, grand["max_marks"], round(grand_percent, 2),
+        "", "", ""
+    ])
+
+    memfile = io.BytesIO()
+    wb.save(memfile)
+    return payload["filename"], memfile.getvalue()
+
+
+def _render_all(payloads, workers):
+    """Yields (filename, bytes) as workbooks finish; at most 2 × workers are in flight."""
+    if workers <= 1:
+        for payload in payloads:
+            yield render_answer_sheet(payload)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        in_flight = set()
+        for payload in payloads:
+            in_flight.add(pool.submit(render_answer_sheet, payload))
+            if len(in_flight) >= workers * 2:
+                done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield future.result()
+        for future in in_flight:
+            yield future.result()
+
+
+def build_answer_sheet_zip(queryset, fileobj, workers=None, progress=None):
+    """
+    Writes one workbook per report into a zip on `fileobj` (a path or a writable file).
+    `progress(done, total)` is called after each workbook. Returns the number written.
+    """
+    total = queryset.count()
+    workers = export_workers() if workers is None else workers
+    seen = set()
+    written = 0
+    with zipfile.ZipFile(fileobj, "w", compression=zipfile.ZIP_DEFLATED) as zf:
+        for name, content in _render_all(iter_answer_sheet_payloads(queryset), workers):
+            if name in seen:
+                base, ext = os.path.splitext(name)
+                name = f"{base}_{written}{ext}"
+            seen.add(name)
+            zf.writestr(name, content)
+            written += 1
+            if progress:
+                progress(written, total)
+    return written
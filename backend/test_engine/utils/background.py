@@ -0,0 +1,40 @@
+import threading
+
+from django.db import close_old_connections
+
+
+class PeriodicFlusher:
+    """
+    Daemon thread that calls `flush()` every `interval` seconds. Started lazily on first
+    use so management commands and tests that never buffer anything don't spawn threads.
+    """
+
+    def __init__(self, name, interval, flush):
+        self.name = name
+        self.interval = interval
+        self.flush = flush
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread and self._thread.is_alive():
+                return
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.flush()
+            except Exception as e:
+                print(f"⚠️ {self.name} flush failed:", e)
+            finally:
+                close_old_connections()
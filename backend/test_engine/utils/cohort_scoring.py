@@ -0,0 +1,146 @@
+"""
+Vectorized scoring for a whole test cohort.
+
+`score_cohort` streams every Response row of a test (optionally one attempt / a subset of
+candidates) in a single query, evaluates them against the compiled answer key with
+pandas/NumPy, aggregates per report, section and category with group-bys and writes all
+ScoreReport rows with one bulk upsert. Marks follow `calculate_score_for_candidate` exactly,
+including a zeroed report for an existing attempt that has no responses left.
+"""
+from decimal import Decimal
+
+import numpy as np
+import pandas as pd
+from django.db import transaction
+from django.db.models import Exists, OuterRef
+
+from ..models import Response, ScoreReport
+from .compiled_test import get_compiled_test
+
+
+REPORT_KEYS = ["candidate_id", "attempt_number"]
+SCORE_FIELDS = [
+    "score", "max_score", "total_positive", "total_negative",
+    "total_correct", "total_wrong", "total_unattempted",
+]
+# explicit dtypes, so empty frames (no questions, no responses) still merge on question_id
+RESPONSE_DTYPES = {"candidate_id": "int64", "attempt_number": "int64", "question_id": "int64", "answer": "object"}
+KEY_DTYPES = {
+    "question_id": "int64", "correct": "object", "positive": "float64",
+    "negative": "float64", "section_id": "int64", "category": "object",
+}
+
+
+def _to_decimal(value):
+    return Decimal(str(round(float(value), 2)))
+
+
+def _answer_key_frame(compiled):
+    questions = list(compiled.questions.values())
+    return pd.DataFrame({
+        "question_id": [q.id for q in questions],
+        "correct": [q.correct_normalized for q in questions],
+        # same fallbacks as calculate_score_for_candidate
+        "positive": [float(q.positive_marks or 1.0) for q in questions],
+        "negative": [float(q.negative_marks or 0.0) for q in questions],
+        "section_id": [q.section_id or 0 for q in questions],
+        "category": [q.category_name or "Uncategorized" for q in questions],
+    }).astype(KEY_DTYPES)
+
+
+def evaluate_responses(compiled, rows):
+    """Evaluate (candidate_id, attempt_number, question_id, answer) rows into a frame."""
+    df = pd.DataFrame.from_records(rows, columns=list(RESPONSE_DTYPES)).astype(RESPONSE_DTYPES)
+    df = df.merge(_answer_key_frame(compiled), on="question_id", how="inner")
+
+    submitted = df["answer"].fillna("").str.strip().str.lower()
+    unattempted = (submitted == "").to_numpy()
+    correct = ~unattempted & (submitted == df["correct"]).to_numpy()
+    wrong = ~unattempted & ~correct
+
+    df["correct_flag"] = correct.astype(np.int64)
+    df["wrong_flag"] = wrong.astype(np.int64)
+    df["unattempted_flag"] = unattempted.astype(np.int64)
+    df["positive_awarded"] = np.where(correct, df["positive"].to_numpy(), 0.0)
+    df["negative_awarded"] = np.where(wrong, df["negative"].to_numpy(), 0.0)
+    df["awarded"] = df["positive_awarded"] - df["negative_awarded"]
+    return df
+
+
+def _aggregate(df, keys):
+    return df.groupby(keys, sort=False).agg(
+        score=("awarded", "sum"),
+        total_positive=("positive_awarded", "sum"),
+        total_negative=("negative_awarded", "sum"),
+        total_correct=("correct_flag", "sum"),
+        total_wrong=("wrong_flag", "sum"),
+        total_unattempted=("unattempted_flag", "sum"),
+    ).reset_index()
+
+
+def score_cohort(test, attempt_number=None, candidate_ids=None, chunk_size=5000, batch_size=1000):
+    compiled = get_compiled_test(test)
+
+    responses = Response.objects.filter(test=test)
+    existing = ScoreReport.objects.filter(test_id=compiled.test_id)
+    if attempt_number is not None:
+        responses = responses.filter(attempt_number=attempt_number)
+        existing = existing.filter(attempt_number=attempt_number)
+    if candidate_ids is not None:
+        candidate_ids = list(candidate_ids)
+        responses = responses.filter(candidate_id__in=candidate_ids)
+        existing = existing.filter(candidate_id__in=candidate_ids)
+
+    rows = responses.values_list(
+        "candidate_id", "attempt_number", "question_id", "answer"
+    ).iterator(chunk_size=chunk_size)
+    df = evaluate_responses(compiled, rows)
+
+    totals = _aggregate(df, REPORT_KEYS)
+    by_section = _aggregate(df, REPORT_KEYS + ["section_id"])
+    by_category = _aggregate(df, REPORT_KEYS + ["category"])
+
+    max_score = compiled.max_score
+    reports = [
+        ScoreReport(
+            test_id=compiled.test_id,
+            candidate_id=int(row.candidate_id),
+            attempt_number=int(row.attempt_number),
+            score=_to_decimal(row.score),
+            max_score=max_score,
+            total_positive=_to_decimal(row.total_positive),
+            total_negative=_to_decimal(row.total_negative),
+            total_correct=int(row.total_correct),
+            total_wrong=int(row.total_wrong),
+            total_unattempted=int(row.total_unattempted),
+        )
+        for row in totals.itertuples(index=False)
+    ]
+
+    with transaction.atomic():
+        ScoreReport.objects.bulk_create(
+            reports,
+            batch_size=batch_size,
+            update_conflicts=True,
+            unique_fields=["candidate", "test", "attempt_number"],
+            update_fields=SCORE_FIELDS,
+        )
+        # reports whose attempt no longer has a scored response: zero them, as the
+        # per-candidate scorer would, instead of leaving the old totals in place
+        zeroed = existing.filter(~Exists(Response.objects.filter(
+            test_id=compiled.test_id,
+            candidate_id=OuterRef("candidate_id"),
+            attempt_number=OuterRef("attempt_number"),
+            question_id__in=list(compiled.questions),
+        ))).update(
+            score=0, max_score=max_score, total_positive=0, total_negative=0,
+            total_correct=0, total_wrong=0, total_unattempted=0,
+        )
+
+    return {
+        "scored": len(reports) + zeroed,
+        "responses": len(df),
+        "totals": totals,
+        "section_summary": by_section,
+        "category_summary": by_category,
+    }
@@ -0,0 +1,164 @@
+"""
+Per-test "compiled" answer key, cached in process.
+
+A CompiledTest holds everything scoring, answer normalization, the exports and resume need
+about a test's questions: parsed option lists, normalized correct answers, marks, the
+candidate-facing question payload and the category → section map. Entries are stamped with `Test.content_version` (plus the test's
+`created_at`, so a reused id never hits an old entry), which the admin bumps
+whenever the question set, a question or a section changes, so a stale entry is never
+served even when the bump happened in another worker. The cache is a small LRU.
+"""
+import json
+import threading
+from collections import OrderedDict
+from decimal import Decimal
+
+from django.conf import settings
+from django.db.models import F
+
+from ..models import Test, TestQuestionSet, TestSectionConfig, Question
+
+
+def parse_options(raw):
+    try:
+        parsed = json.loads(raw)
+        if isinstance(parsed, list):
+            return parsed
+        return [str(parsed)]
+    except Exception:
+        return []
+
+
+def normalize_answer(value):
+    return (value or "").strip().lower()
+
+
+class CompiledQuestion:
+    __slots__ = (
+        "id", "text", "difficulty", "question_type", "category_id", "category_name", "section_id",
+        "options", "correct_answer", "correct_normalized", "positive_marks", "negative_marks", "payload",
+    )
+
+    def __init__(self, question, section_id=None):
+        self.id = question.id
+        self.text = question.text
+        self.difficulty = question.difficulty
+        self.question_type = question.question_type
+        self.category_id = question.category_id
+        self.category_name = question.category.name
+        self.section_id = section_id
+        self.options = parse_options(question.options)
+        self.correct_answer = question.correct_answer
+        self.correct_normalized = normalize_answer(question.correct_answer)
+        self.positive_marks = question.positive_marks
+        self.negative_marks = question.negative_marks
+        # what QuestionSerializer renders for the candidate; shared, never mutate
+        self.payload = {
+            "id": self.id,
+            "text": self.text,
+            "question_type": self.question_type,
+            "options": self.options,
+        }
+
+
+class CompiledTest:
+    def __init__(self, test_id, version, sections, questions):
+        self.test_id = test_id
+        self.version = version
+        # [(section_id, category_id, category_name, duration_minutes)] in section id order
+        self.sections = sections
+        self.section_by_category = {category_id: section_id for section_id, category_id, _, _ in sections}
+        self.question_ids = [q.id for q in questions]
+        self.questions = {q.id: q for q in questions}
+        self.max_score = Decimal(sum(Decimal(q.positive_marks) for q in questions))
+
+    def section_questions(self, section_id):
+        return [q for q in self.questions.values() if q.section_id == section_id]
+
+    def lookup(self, question_ids):
+        """Compiled questions for `question_ids`; ids outside the test are loaded from the DB."""
+        found = {}
+        unknown = []
+        for question_id in question_ids:
+            q = self.questions.get(question_id)
+            if q is None:
+                unknown.append(question_id)
+            else:
+                found[question_id] = q
+        if unknown:
+            for question in Question.objects.filter(id__in=unknown).select_related("category"):
+                found[question.id] = CompiledQuestion(question, self.section_by_category.get(question.category_id))
+        return found
+
+
+_cache = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def _compile(test_id, version):
+    sections = [
+        (s.id, s.category_id, s.category.name, s.section_duration_minutes)
+        for s in TestSectionConfig.objects.filter(test_id=test_id).select_related("category").order_by("id")
+    ]
+    section_by_category = {category_id: section_id for section_id, category_id, _, _ in sections}
+
+    questions = [
+        CompiledQuestion(tq.question, section_by_category.get(tq.question.category_id))
+        for tq in TestQuestionSet.objects.filter(test_id=test_id)
+        .select_related("question__category")
+        .order_by("order", "id")
+    ]
+    return CompiledTest(test_id, version, sections, questions)
+
+
+def get_compiled_test(test):
+    """Accepts a Test instance (no extra query) or a test id (one version lookup)."""
+    if isinstance(test, Test):
+        test_id, version = test.id, (test.content_version, test.created_at)
+    else:
+        test_id = int(test)
+        version = Test.objects.filter(id=test_id).values_list("content_version", "created_at").first()
+        if version is None:
+            raise Test.DoesNotExist(f"Test {test_id} does not exist")
+
+    with _cache_lock:
+        compiled = _cache.get(test_id)
+        if compiled is not None and compiled.version == version:
+            _cache.move_to_end(test_id)
+            return compiled
+
+    compiled = _compile(test_id, version)
+
+    with _cache_lock:
+        _cache[test_id] = compiled
+        _cache.move_to_end(test_id)
+        while len(_cache) > getattr(settings, "COMPILED_TEST_CACHE_SIZE", 64):
+            _cache.popitem(last=False)
+    return compiled
+
+
+def _invalidate(test_ids):
+    test_ids = [int(test_id) for test_id in test_ids]
+    if not test_ids:
+        return
+    Test.objects.filter(id__in=test_ids).update(content_version=F("content_version") + 1)
+    with _cache_lock:
+        for test_id in test_ids:
+            _cache.pop(test_id, None)
+
+
+def invalidate_compiled_test(test_id):
+    _invalidate([test_id])
+
+
+def invalidate_tests_for_questions(question_ids):
+    """Call before deleting questions: the cascade removes the TestQuestionSet rows we look up."""
+    _invalidate(
+        TestQuestionSet.objects.filter(question_id__in=list(question_ids)).values_list("test_id", flat=True).distinct()
+    )
+
+
+def invalidate_tests_for_categories(category_ids):
+    _invalidate(
+        TestSectionConfig.objects.filter(category_id__in=list(category_ids)).values_list("test_id", flat=True).distinct()
+    )
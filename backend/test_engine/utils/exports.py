@@ -0,0 +1,184 @@
+"""
+Streaming score exports for the ScoreReport admin.
+
+Rows are produced by `iter_score_export_rows`, which walks the selected reports in chunks:
+one query for the reports of a chunk (with candidate and test), one for all their
+responses (filtered by test and attempt) and one up front for the category headers.
+Answer keys come from the compiled test cache. The Excel variant writes through openpyxl's
+write-only mode into a temporary file; the CSV variant streams straight to the client.
+Memory stays bounded by the chunk size, not by the number of reports.
+"""
+import csv
+import tempfile
+from collections import defaultdict
+
+import openpyxl
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Font
+
+from ..models import Response, ScoreReport, TestSectionConfig
+from .compiled_test import get_compiled_test, normalize_answer
+
+
+BASE_HEADERS = [
+    "Candidate Name", "Email", "Phone", "Test",
+    "Score", "Max Possible", "Percentage",
+    "Total Correct", "Total Wrong", "Unattempted"
+]
+CATEGORY_COLUMNS = ["Score", "Max Possible", "Percentage", "Total Correct", "Total Wrong", "Unattempted"]
+EXPORT_CHUNK_SIZE = 2000
+
+
+def _categories(queryset):
+    # one query for every test in the selection; sorted so columns remain consistent
+    return sorted(
+        TestSectionConfig.objects.filter(test_id__in=queryset.values("test_id"))
+        .values_list("category__name", flat=True)
+        .distinct()
+    )
+
+
+def score_export_headers(categories):
+    category_headers = [f"{cat} _ {column}" for cat in categories for column in CATEGORY_COLUMNS]
+    return BASE_HEADERS + category_headers + ["Created At"]
+
+
+def _category_breakdown(compiled, section_categories, answers, extra_questions):
+    by_category = {}
+    for question_id, answer in answers:
+        q = compiled.questions.get(question_id) or extra_questions.get(question_id)
+        if q is None or q.category_id not in section_categories:
+            continue
+        cat = by_category.setdefault(q.category_name, {
+            'score': 0, 'max': 0, 'correct': 0, 'wrong': 0, 'unattempted': 0
+        })
+
+        submitted = normalize_answer(answer)
+        cat['max'] += q.positive_marks
+        if not submitted:
+            cat['unattempted'] += 1
+        elif submitted == q.correct_normalized:
+            cat['correct'] += 1
+            cat['score'] += q.positive_marks
+        else:
+            cat['wrong'] += 1
+            cat['score'] -= q.negative_marks
+            cat['max'] += q.negative_marks
+    return by_category
+
+
+def _report_row(report, categories, by_category):
+    max_possible = report.total_positive + report.total_negative
+    row = [
+        report.candidate.name,
+        report.candidate.email,
+        report.candidate.phone,
+        report.test.name,
+        float(report.score),
+        float(max_possible),
+        round((report.score / max_possible * 100) if max_possible else 0, 2),
+        report.total_correct,
+        report.total_wrong,
+        report.total_unattempted,
+    ]
+    for name in categories:
+        cat = by_category.get(name, {'score': 0, 'max': 0, 'correct': 0, 'wrong': 0, 'unattempted': 0})
+        percent = (cat['score'] / cat['max'] * 100) if cat['max'] else 0
+        row.extend([
+            round(cat['score'], 2),
+            round(cat['max'], 2),
+            round(percent, 2),
+            cat['correct'],
+            cat['wrong'],
+            cat['unattempted'],
+        ])
+    row.append(report.created_at.strftime("%Y-%m-%d %H:%M:%S"))
+    return row
+
+
+def _chunk_answers(reports):
+    """{(candidate_id, test_id, attempt_number): [(question_id, answer)]} for one chunk, in one query."""
+    keys = {(r.candidate_id, r.test_id, r.attempt_number) for r in reports}
+    answers = defaultdict(list)
+    for candidate_id, test_id, attempt, question_id, answer in Response.objects.filter(
+        candidate_id__in={k[0] for k in keys},
+        test_id__in={k[1] for k in keys},
+        attempt_number__in={k[2] for k in keys},
+    ).values_list("candidate_id", "test_id", "attempt_number", "question_id", "answer").iterator():
+        key = (candidate_id, test_id, attempt)
+        if key in keys:
+            answers[key].append((question_id, answer))
+    return answers
+
+
+def iter_score_export_rows(queryset, chunk_size=EXPORT_CHUNK_SIZE):
+    """Yields the header row, then one row per report."""
+    report_ids = list(queryset.order_by("pk").values_list("pk", flat=True))
+    categories = _categories(queryset)
+    yield score_export_headers(categories)
+
+    for start in range(0, len(report_ids), chunk_size):
+        reports = list(
+            ScoreReport.objects.filter(pk__in=report_ids[start:start + chunk_size])
+            .select_related("candidate", "test")
+            .order_by("pk")
+        )
+        answers = _chunk_answers(reports)
+
+        compiled_by_test = {}
+        extra_questions = {}
+        for report in reports:
+            if report.test_id not in compiled_by_test:
+                compiled = get_compiled_test(report.test)
+                # answers to questions that have since left the test's question set
+                unknown = {
+                    question_id
+                    for key, rows in answers.items() if key[1] == report.test_id
+                    for question_id, _ in rows if question_id not in compiled.questions
+                }
+                extra_questions[report.test_id] = compiled.lookup(unknown) if unknown else {}
+                compiled_by_test[report.test_id] = compiled
+            compiled = compiled_by_test[report.test_id]
+
+            by_category = _category_breakdown(
+                compiled,
+                {category_id for _, category_id, _, _ in compiled.sections},
+                answers.get((report.candidate_id, report.test_id, report.attempt_number), ()),
+                extra_questions[report.test_id],
+            )
+            yield _report_row(report, categories, by_category)
+
+
+def write_score_export_xlsx(queryset):
+    """Writes the workbook to a temporary file and returns it rewound, ready for FileResponse."""
+    wb = openpyxl.Workbook(write_only=True)
+    ws = wb.create_sheet("Scores")
+
+    rows = iter_score_export_rows(queryset)
+    bold_font = Font(bold=True)
+    header = []
+    for title in next(rows):
+        cell = WriteOnlyCell(ws, value=title)
+        cell.font = bold_font
+        header.append(cell)
+    ws.append(header)
+    for row in rows:
+        ws.append(row)
+
+    output = tempfile.TemporaryFile()
+    wb.save(output)
+    output.seek(0)
+    return output
+
+
+class _Echo:
+    """File-like object whose write() hands the line back, for csv.writer + StreamingHttpResponse."""
+
+    def write(self, value):
+        return value
+
+
+def iter_score_export_csv(queryset):
+    writer = csv.writer(_Echo())
+    for row in iter_score_export_rows(queryset):
+        yield writer.writerow(row)
@@ -0,0 +1,60 @@
+"""
+Per-session question order.
+
+The shuffled order of every section is written once, with one bulk_create, when the
+session starts. Resume reads the current section's question ids back in a single query
+and assembles the response from the compiled test's pre-rendered question payloads, so
+no serializer runs per request; editing a question bumps the test's content version and
+with it the payloads. Sessions started before this existed get their section's order
+materialized on first resume, also with one bulk_create.
+"""
+from random import shuffle
+
+from ..models import CandidateSectionQuestionOrder
+from .compiled_test import get_compiled_test
+
+
+def _section_orders(session, section_id, compiled):
+    question_ids = [q.id for q in compiled.section_questions(section_id)]
+    shuffle(question_ids)  # can be removed if strict order needed
+    return [
+        CandidateSectionQuestionOrder(
+            session=session, section_id=section_id, question_id=question_id, display_order=index
+        )
+        for index, question_id in enumerate(question_ids)
+    ]
+
+
+def materialize_question_order(session, compiled=None, section_ids=None):
+    """Shuffle and store the order of every section (or only `section_ids`) in one INSERT."""
+    compiled = compiled or get_compiled_test(session.assignment.test)
+    if section_ids is None:
+        section_ids = [section_id for section_id, _, _, _ in compiled.sections]
+
+    orders = []
+    for section_id in section_ids:
+        orders.extend(_section_orders(session, section_id, compiled))
+    CandidateSectionQuestionOrder.objects.bulk_create(orders, ignore_conflicts=True)
+    return orders
+
+
+def _section_question_ids(session, section):
+    return list(
+        CandidateSectionQuestionOrder.objects.filter(session=session, section=section)
+        .order_by("display_order")
+        .values_list("question_id", flat=True)
+    )
+
+
+def get_section_payload(session, section, compiled=None):
+    """Candidate-facing question dicts of `section`, in this session's display order."""
+    compiled = compiled or get_compiled_test(session.assignment.test)
+    question_ids = _section_question_ids(session, section)
+    if not question_ids:
+        print("📋 No existing order. Generating fresh question list.")
+        materialize_question_order(session, compiled, section_ids=[section.id])
+        question_ids = _section_question_ids(session, section)
+
+    # questions removed from the test after the order was stored are loaded on the side
+    questions = compiled.lookup(question_ids)
+    return [questions[question_id].payload for question_id in question_ids if question_id in questions]
@@ -0,0 +1,111 @@
+"""
+Database-backed queue for score report generation.
+
+Request handlers call `enqueue_report_job()` instead of scoring and writing Excel inline.
+`python manage.py run_report_jobs` drains the queue. Jobs are deduplicated per
+(candidate, test, attempt); a job enqueued again while it is running is flagged `rerun`
+and picked up once more after it finishes, so the final report always reflects the last
+answers. Failures are retried with exponential backoff up to `max_attempts`.
+Set `REPORT_JOBS_EAGER = True` to run jobs inline (local development without a worker).
+"""
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from ..models import ReportJob
+from .scoring import serialize_score_report, generate_score_report_excel
+from .score_state import score_attempt
+
+
+RETRY_BASE_SECONDS = 30
+STALE_RUNNING_AFTER = timedelta(minutes=15)
+
+
+def enqueue_report_job(candidate_id, test_id, attempt_number):
+    now = timezone.now()
+    job, created = ReportJob.objects.get_or_create(
+        candidate_id=candidate_id,
+        test_id=test_id,
+        attempt_number=attempt_number,
+    )
+    if not created:
+        # Already pending → nothing to do. Finished → re-arm. Running → run once more afterwards.
+        rearmed = ReportJob.objects.filter(pk=job.pk, status__in=["done", "failed"]).update(
+            status="pending", attempts=0, run_after=now, last_error="", updated_at=now
+        )
+        if not rearmed:
+            ReportJob.objects.filter(pk=job.pk, status="running").update(rerun=True, updated_at=now)
+
+    if getattr(settings, "REPORT_JOBS_EAGER", False):
+        transaction.on_commit(lambda: run_pending_jobs(job_ids=[job.pk]))
+    return job
+
+
+def _claim(job):
+    return ReportJob.objects.filter(pk=job.pk, status="pending").update(
+        status="running", rerun=False, attempts=F("attempts") + 1, updated_at=timezone.now()
+    ) == 1
+
+
+def run_report_job(job):
+    job = ReportJob.objects.select_related("candidate", "test").get(pk=job.pk)
+    try:
+        result = score_attempt(job.test, job.candidate, job.attempt_number)
+        report_data = serialize_score_report(result["report"], section_summary=result["section_summary"])
+        path = generate_score_report_excel(job.candidate, job.test, job.attempt_number, report_data)
+    except Exception as e:
+        print(f"⚠️ Report job {job.pk} failed (try {job.attempts}/{job.max_attempts}):", e)
+        now = timezone.now()
+        if job.attempts < job.max_attempts:
+            ReportJob.objects.filter(pk=job.pk).update(
+                status="pending",
+                run_after=now + timedelta(seconds=RETRY_BASE_SECONDS * 2 ** (job.attempts - 1)),
+                last_error=traceback.format_exc(),
+                updated_at=now,
+            )
+        else:
+            ReportJob.objects.filter(pk=job.pk).update(
+                status="failed", last_error=traceback.format_exc(), updated_at=now
+            )
+        return False
+
+    now = timezone.now()
+    # A rerun request that arrived while we were working sends the job straight back to pending.
+    if not ReportJob.objects.filter(pk=job.pk, rerun=True).update(
+        status="pending", rerun=False, attempts=0, run_after=now, report_path=path, last_error="", updated_at=now
+    ):
+        ReportJob.objects.filter(pk=job.pk).update(
+            status="done", report_path=path, last_error="", updated_at=now
+        )
+    return True
+
+
+def requeue_stale_jobs():
+    """
+    Jobs left `running` by a worker that died are handed back to the queue, unless they
+    used up their tries: a job that kills its worker never reaches the retry branch of
+    `run_report_job`, so it would otherwise be claimed (and crash the worker) forever.
+    """
+    now = timezone.now()
+    stale = ReportJob.objects.filter(status="running", updated_at__lt=now - STALE_RUNNING_AFTER)
+    stale.filter(attempts__gte=F("max_attempts")).update(
+        status="failed", last_error="Worker stopped while running this job", updated_at=now
+    )
+    return stale.update(status="pending", updated_at=now)
+
+
+def run_pending_jobs(limit=50, job_ids=None):
+    jobs = ReportJob.objects.filter(status="pending", run_after__lte=timezone.now())
+    if job_ids is not None:
+        jobs = jobs.filter(pk__in=job_ids)
+
+    processed = 0
+    for job in jobs.order_by("run_after", "id")[:limit]:
+        if _claim(job):
+            run_report_job(job)
+            processed += 1
+    return processed
@@ -0,0 +1,121 @@
+from django.db import transaction
+from django.http import Http404
+from django.utils import timezone
+
+from ..models import Response, ArchivedResponse
+from .compiled_test import get_compiled_test
+from .score_state import apply_answer_deltas, lock_score_state
+
+
+CHOICE_LETTERS = "ABCD"
+RESPONSE_UPDATE_FIELDS = ["answer", "marked_for_review", "time_spent", "answered_at"]
+
+
+def resolve_raw_answer(question, answer):
+    """Map an "A/B/C/D" choice back to the raw option text stored in `correct_answer`."""
+    if question.question_type == "MCQ" and answer in list(CHOICE_LETTERS):
+        try:
+            return question.options[CHOICE_LETTERS.index(answer)]
+        except IndexError:
+            return answer  # fallback when the option list is short or unparseable
+    return answer
+
+
+@transaction.atomic
+def save_responses_bulk(candidate_id, test_id, attempt_number, responses, skip_missing=False):
+    """
+    Upsert a batch of answers for one candidate attempt with a fixed number of queries:
+    one test version lookup (options come from the compiled test cache), one lock on the
+    running-score rows, one read for the existing rows, one archive insert and one upsert,
+    plus one running-score UPDATE per category whose totals changed.
+    Later entries for the same question in `responses` win. Unknown question ids raise
+    Http404 unless `skip_missing` is set, in which case they are dropped.
+    """
+    latest = {}
+    for r in responses:
+        question_id = r.get("question")
+        if question_id is None:
+            continue
+        latest[int(question_id)] = r
+
+    if not latest:
+        return 0
+
+    compiled = get_compiled_test(test_id)
+    questions = compiled.lookup(list(latest))
+    missing = set(latest) - set(questions)
+    if missing and skip_missing:
+        for question_id in missing:
+            del latest[question_id]
+        if not latest:
+            return 0
+    elif missing:
+        raise Http404(f"No Question matches the given query: {sorted(missing)}")
+
+    # Row locks keep concurrent saves of the same answer from applying stale score deltas:
+    # the running-score rows first (they exist before the first answer does), then the answers
+    lock_score_state(compiled, candidate_id, test_id, attempt_number, latest)
+    existing = {
+        r.question_id: r for r in Response.objects.select_for_update().filter(
+            candidate_id=candidate_id,
+            test_id=test_id,
+            attempt_number=attempt_number,
+            question_id__in=list(latest),
+        )
+    }
+
+    now = timezone.now()
+    archived = []
+    rows = []
+    changes = []
+
+    for question_id, r in latest.items():
+        raw_answer = resolve_raw_answer(questions[question_id], r.get("answer"))
+        raw_answer = "" if raw_answer is None else str(raw_answer)
+        marked_for_review = r.get("marked_for_review", False)
+        time_spent = r.get("time_spent", 0)
+
+        old_response = existing.get(question_id)
+        changes.append((question_id, old_response.answer if old_response else None, raw_answer))
+        if old_response and (
+            old_response.answer != raw_answer
+            or old_response.marked_for_review != marked_for_review
+            or old_response.time_spent != int(time_spent or 0)
+        ):
+            archived.append(ArchivedResponse(
+                candidate_id=candidate_id,
+                question_id=question_id,
+                test_id=test_id,
+                answer=old_response.answer,
+                time_spent=old_response.time_spent,
+                marked_for_review=old_response.marked_for_review,
+                revisit_count=old_response.revisit_count,
+                answered_at=old_response.answered_at,
+                attempt_number=attempt_number,
+                archived_at=now,
+            ))
+
+        rows.append(Response(
+            candidate_id=candidate_id,
+            question_id=question_id,
+            test_id=test_id,
+            attempt_number=attempt_number,
+            answer=raw_answer,
+            marked_for_review=marked_for_review,
+            time_spent=time_spent or 0,
+            answered_at=now,
+        ))
+
+    if archived:
+        ArchivedResponse.objects.bulk_create(archived)
+
+    Response.objects.bulk_create(
+        rows,
+        update_conflicts=True,
+        unique_fields=["candidate", "question", "test", "attempt_number"],
+        update_fields=RESPONSE_UPDATE_FIELDS,
+    )
+
+    apply_answer_deltas(compiled, candidate_id, test_id, attempt_number, changes)
+
+    return len(rows)
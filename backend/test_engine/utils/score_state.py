@@ -0,0 +1,213 @@
+"""
+Running score aggregates per CandidateTestSession.
+
+Each session gets one SessionScoreState row per question category, seeded when the session
+starts. Every answer write applies the old → new delta with F() updates, so building the
+ScoreReport at completion only reads those rows (O(categories)) instead of re-evaluating
+every response. Sessions that were never seeded, or whose test's answer key changed since
+seeding, fall back to the full rescore, which also serves as a drift check / repair.
+"""
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import F
+
+from ..models import Response, ScoreReport, CandidateTestSession, SessionScoreState
+from .compiled_test import get_compiled_test, normalize_answer
+from .scoring import calculate_score_for_candidate
+
+
+COUNT_FIELDS = ["correct", "wrong", "unattempted"]
+MARK_FIELDS = ["positive", "negative"]
+STATE_FIELDS = COUNT_FIELDS + MARK_FIELDS
+
+
+def evaluate_answer(q, answer):
+    """(correct, wrong, unattempted, positive, negative) for one stored answer; None = no row."""
+    if answer is None:
+        return 0, 0, 0, Decimal("0"), Decimal("0")
+    submitted = normalize_answer(answer)
+    if not submitted:
+        return 0, 0, 1, Decimal("0"), Decimal("0")
+    if submitted == q.correct_normalized:
+        return 1, 0, 0, Decimal(str(q.positive_marks or 1.0)), Decimal("0")
+    return 0, 1, 0, Decimal("0"), Decimal(str(q.negative_marks or 0.0))
+
+
+def seed_score_state(session, compiled=None):
+    compiled = compiled or get_compiled_test(session.assignment.test)
+    category_ids = {q.category_id for q in compiled.questions.values()}
+    SessionScoreState.objects.bulk_create(
+        [SessionScoreState(session=session, category_id=category_id) for category_id in category_ids],
+        ignore_conflicts=True,
+    )
+    if session.score_state_version != compiled.version[0]:
+        session.score_state_version = compiled.version[0]
+        CandidateTestSession.objects.filter(pk=session.pk).update(score_state_version=session.score_state_version)
+
+
+def lock_score_state(compiled, candidate_id, test_id, attempt_number, question_ids):
+    """
+    Lock the state rows of the categories `question_ids` belong to, before the caller reads
+    the old answers. Concurrent saves into the same category then run one after the other:
+    two first answers to a question cannot both see "no response yet" and both add their
+    delta. Rows are seeded at session start, so this never has to insert.
+    """
+    category_ids = {compiled.questions[q].category_id for q in question_ids if q in compiled.questions}
+    if not category_ids:
+        return
+    list(SessionScoreState.objects.select_for_update(of=("self",)).filter(
+        session__assignment__candidate_id=candidate_id,
+        session__assignment__test_id=test_id,
+        session__attempt_number=attempt_number,
+        category_id__in=category_ids,
+    ).order_by("id").values_list("id", flat=True))
+
+
+def apply_answer_deltas(compiled, candidate_id, test_id, attempt_number, changes):
+    """
+    `changes` is an iterable of (question_id, old_answer_or_None, new_answer).
+    Issues one UPDATE per category whose totals actually moved. Only updates the rows
+    seeded at session start; the caller holds them via `lock_score_state`.
+    """
+    deltas = defaultdict(lambda: [0, 0, 0, Decimal("0"), Decimal("0")])
+    for question_id, old_answer, new_answer in changes:
+        q = compiled.questions.get(question_id)
+        if not q:
+            continue  # not part of the test, never scored
+        old = evaluate_answer(q, old_answer)
+        new = evaluate_answer(q, new_answer)
+        if old == new:
+            continue
+        delta = deltas[q.category_id]
+        for i in range(len(STATE_FIELDS)):
+            delta[i] += new[i] - old[i]
+
+    for category_id, delta in deltas.items():
+        if not any(delta):
+            continue
+        SessionScoreState.objects.filter(
+            session__assignment__candidate_id=candidate_id,
+            session__assignment__test_id=test_id,
+            session__attempt_number=attempt_number,
+            category_id=category_id,
+        ).update(**{field: F(field) + delta[i] for i, field in enumerate(STATE_FIELDS) if delta[i]})
+
+
+def _full_state(compiled, session):
+    totals = defaultdict(lambda: [0, 0, 0, Decimal("0"), Decimal("0")])
+    for question_id, answer in Response.objects.filter(
+        candidate_id=session.assignment.candidate_id,
+        test_id=session.assignment.test_id,
+        attempt_number=session.attempt_number,
+    ).values_list("question_id", "answer"):
+        q = compiled.questions.get(question_id)
+        if not q:
+            continue
+        row = totals[q.category_id]
+        for i, value in enumerate(evaluate_answer(q, answer)):
+            row[i] += value
+    return totals
+
+
+def verify_score_state(session, repair=False):
+    """
+    Re-evaluate every response of the session and compare with the running state.
+    Returns {category_id: {field: (state_value, actual_value)}} for every mismatch.
+    With `repair`, the state rows are rewritten from the full evaluation and re-stamped.
+    """
+    compiled = get_compiled_test(session.assignment.test)
+    actual = _full_state(compiled, session)
+    state = {
+        row["category_id"]: [row[field] for field in STATE_FIELDS]
+        for row in SessionScoreState.objects.filter(session=session).values("category_id", *STATE_FIELDS)
+    }
+
+    drift = {}
+    for category_id in set(actual) | set(state):
+        have = state.get(category_id, [0, 0, 0, Decimal("0"), Decimal("0")])
+        want = actual.get(category_id, [0, 0, 0, Decimal("0"), Decimal("0")])
+        mismatched = {
+            field: (have[i], want[i]) for i, field in enumerate(STATE_FIELDS) if have[i] != want[i]
+        }
+        if mismatched:
+            drift[category_id] = mismatched
+
+    stale = session.score_state_version != compiled.version[0]
+    if repair and (drift or stale):
+        with transaction.atomic():
+            seed_score_state(session, compiled)
+            for category_id, values in actual.items():
+                SessionScoreState.objects.filter(session=session, category_id=category_id).update(
+                    **dict(zip(STATE_FIELDS, values))
+                )
+            SessionScoreState.objects.filter(session=session).exclude(category_id__in=list(actual)).update(
+                **{field: 0 for field in STATE_FIELDS}
+            )
+    return drift
+
+
+@transaction.atomic
+def score_from_state(session, compiled=None):
+    """Build the ScoreReport from the running totals. Same return shape as calculate_score_for_candidate."""
+    compiled = compiled or get_compiled_test(session.assignment.test)
+    rows = {
+        row["category_id"]: row
+        for row in SessionScoreState.objects.filter(session=session).values("category_id", *STATE_FIELDS)
+    }
+
+    section_summary = {}
+    for section_id, category_id, category_name, _ in compiled.sections:
+        row = rows.get(category_id)
+        positive = row["positive"] if row else Decimal("0")
+        negative = row["negative"] if row else Decimal("0")
+        section_summary[section_id] = {
+            "section_name": category_name,
+            "score": positive - negative,
+            "max_score": Decimal(sum(q.positive_marks for q in compiled.section_questions(section_id))),
+            "correct": row["correct"] if row else 0,
+            "wrong": row["wrong"] if row else 0,
+            "unattempted": row["unattempted"] if row else 0,
+        }
+
+    total_positive = sum((row["positive"] for row in rows.values()), Decimal("0"))
+    total_negative = sum((row["negative"] for row in rows.values()), Decimal("0"))
+
+    report, _ = ScoreReport.objects.update_or_create(
+        test_id=session.assignment.test_id,
+        candidate_id=session.assignment.candidate_id,
+        attempt_number=session.attempt_number,
+        defaults={
+            'score': total_positive - total_negative,
+            'max_score': compiled.max_score,
+            'total_positive': total_positive,
+            'total_negative': total_negative,
+            'total_correct': sum(row["correct"] for row in rows.values()),
+            'total_wrong': sum(row["wrong"] for row in rows.values()),
+            'total_unattempted': sum(row["unattempted"] for row in rows.values()),
+        }
+    )
+
+    for sec in section_summary.values():
+        sec["percentage"] = round(
+            float(sec["score"]) / float(sec["max_score"]) * 100 if sec["max_score"] else 0.0,
+            2
+        )
+
+    return {
+        "report": report,
+        "section_summary": section_summary
+    }
+
+
+def score_attempt(test, candidate, attempt_number):
+    """Use the running state when it is trustworthy, otherwise the full rescore."""
+    session = CandidateTestSession.objects.select_related("assignment").filter(
+        assignment__candidate=candidate,
+        assignment__test=test,
+        attempt_number=attempt_number,
+    ).first()
+    if session and session.score_state_version is not None and session.score_state_version == test.content_version:
+        return score_from_state(session, get_compiled_test(test))
+    return calculate_score_for_candidate(test, candidate, attempt_number)
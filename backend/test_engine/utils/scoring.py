@@ -14,44 +14,37 @@ from ..models import (
     Response, ScoreReport, Test, Candidate,
     TestQuestionSet, TestSectionConfig, Question
 )
+from .compiled_test import get_compiled_test, normalize_answer
 
 
 @transaction.atomic
 def calculate_score_for_candidate(test: Test, candidate: Candidate, attempt_number: int):
     print(f"\n🧠 Scoring for: {candidate.name} | Test: {test.name} | Attempt #{attempt_number}")
 
-    # Fetch all questions used in this test
-    test_questions_qs = TestQuestionSet.objects.filter(test=test).select_related('question')
-    all_questions = [tq.question for tq in test_questions_qs]
-    question_map = {q.id: q for q in all_questions}
-
-    total_max_score = Decimal(sum(Decimal(q.positive_marks) for q in all_questions))
+    # Questions, answer key and section map come from the per-test compiled cache
+    compiled = get_compiled_test(test)
+    total_max_score = compiled.max_score
 
     # Organize questions by section (using category match)
     section_summary = {}
-    section_map = {}
-    for section in TestSectionConfig.objects.filter(test=test).select_related('category'):
-        section_questions = [q for q in all_questions if q.category_id == section.category_id]
-        section_id = section.id
-        section_map[section_id] = section
-
+    for section_id, category_id, category_name, _ in compiled.sections:
         section_summary[section_id] = {
-            "section_name": section.category.name,
+            "section_name": category_name,
             "score": Decimal("0.0"),
-            "max_score": Decimal(sum(q.positive_marks for q in section_questions)),
+            "max_score": Decimal(sum(q.positive_marks for q in compiled.section_questions(section_id))),
             "correct": 0,
             "wrong": 0,
             "unattempted": 0,
         }
 
     # Load responses
-    responses = Response.objects.filter(
+    responses = list(Response.objects.filter(
         candidate=candidate,
         test=test,
         attempt_number=attempt_number
-    ).select_related('question__category')
+    ).values_list("question_id", "answer"))
 
-    print(f"✅ Found {responses.count()} responses")
+    print(f"✅ Found {len(responses)} responses")
 
     total_score = Decimal('0.0')
     total_positive = Decimal('0.0')
@@ -60,14 +53,13 @@ def calculate_score_for_candidate(test: Test, candidate: Candidate, attempt_numb
     total_wrong = 0
     total_unattempted = 0
 
-    for r in responses:
-        q = question_map.get(r.question_id)
+    for question_id, answer in responses:
+        q = compiled.questions.get(question_id)
         if not q:
             continue  # Skip any question not in test
 
-        submitted = (r.answer or "").strip().lower()
-        correct = (q.correct_answer or "").strip().lower()
-        section_id = next((sid for sid, sec in section_map.items() if sec.category_id == q.category_id), None)
+        submitted = normalize_answer(answer)
+        section_id = q.section_id
 
         if not submitted:
             total_unattempted += 1
@@ -75,7 +67,7 @@ def calculate_score_for_candidate(test: Test, candidate: Candidate, attempt_numb
                 section_summary[section_id]["unattempted"] += 1
             continue
 
-        if submitted == correct:
+        if submitted == q.correct_normalized:
             marks = Decimal(str(q.positive_marks or 1.0))
             total_score += marks
             total_positive += marks
@@ -83,7 +75,6 @@ def calculate_score_for_candidate(test: Test, candidate: Candidate, attempt_numb
             if section_id:
                 section_summary[section_id]["score"] += marks
                 section_summary[section_id]["correct"] += 1
-            print(f"Q{q.id}: ✅ Correct (+{marks})")
         else:
             penalty = Decimal(str(q.negative_marks or 0.0))
             total_score -= penalty
@@ -92,7 +83,6 @@ def calculate_score_for_candidate(test: Test, candidate: Candidate, attempt_numb
             if section_id:
                 section_summary[section_id]["score"] -= penalty
                 section_summary[section_id]["wrong"] += 1
-            print(f"Q{q.id}: ❌ Incorrect (-{penalty})")
 
     # Save to ScoreReport
     report, _ = ScoreReport.objects.update_or_create(
@@ -159,9 +149,6 @@ def serialize_score_report(report: ScoreReport, section_summary=None) -> dict:
                 "unattempted": sec["unattempted"],
             }
 
-    from collections import defaultdict
-    from ..models import Response
-
     category_data = defaultdict(lambda: {
         "score": 0,
         "correct": 0,
@@ -170,20 +157,24 @@ def serialize_score_report(report: ScoreReport, section_summary=None) -> dict:
         "max_score": 0,
     })
 
-    responses = Response.objects.filter(
+    responses = list(Response.objects.filter(
         candidate=candidate,
         test=test,
         attempt_number=report.attempt_number
-    ).select_related('question__category')
+    ).values_list("question_id", "answer"))
+    questions = get_compiled_test(test).lookup([question_id for question_id, _ in responses])
 
-    for resp in responses:
-        q = resp.question
-        cat = q.category.name if q.category else "Uncategorized"
+    for question_id, answer in responses:
+        q = questions.get(question_id)
+        if not q:
+            continue
+        cat = q.category_name or "Uncategorized"
         category_data[cat]["max_score"] += q.positive_marks
 
-        if resp.answer.strip() == "":
+        submitted = normalize_answer(answer)
+        if submitted == "":
             category_data[cat]["unattempted"] += 1
-        elif resp.answer.strip().lower() == q.correct_answer.strip().lower():
+        elif submitted == q.correct_normalized:
             category_data[cat]["correct"] += 1
             category_data[cat]["score"] += q.positive_marks
         else:
@@ -248,33 +239,41 @@ def generate_score_report_excel(candidate, test, attempt_number, report_data):
         except:
             return ""
 
-    responses = Response.objects.filter(candidate=candidate, test=test, attempt_number=attempt_number)
+    compiled = get_compiled_test(test)
+    responses = list(
+        Response.objects.filter(candidate=candidate, test=test, attempt_number=attempt_number)
+        .values_list("question_id", "answer")
+    )
+    questions = compiled.lookup([question_id for question_id, _ in responses])
 
     section_lookup = {
-        s.category_id: f"Section {i + 1}: {s.category.name}"
-        for i, s in enumerate(TestSectionConfig.objects.filter(test=test).select_related("category"))
+        category_id: f"Section {i + 1}: {category_name}"
+        for i, (_, category_id, category_name, _) in enumerate(compiled.sections)
     }
 
     audit_rows = []
-    for r in responses.select_related('question'):
-        q = r.question
+    for question_id, answer in responses:
+        q = questions.get(question_id)
+        if not q:
+            continue
+        is_correct = bool(answer) and normalize_answer(answer) == q.correct_normalized
         audit_rows.append({
             "Section": section_lookup.get(q.category_id, ""),
-            "Category": q.category.name if q.category else "",
+            "Category": q.category_name or "",
             "Question ID": q.id,
             "Question": str(q.text)[:100],
-            "Your Answer (Raw)": r.answer,
-            "Your Answer (Choice)": get_choice_letter(r.answer, json.loads(q.options)),
+            "Your Answer (Raw)": answer,
+            "Your Answer (Choice)": get_choice_letter(answer, q.options),
             "Correct Answer (Raw)": q.correct_answer,
-            "Correct Answer (Choice)": get_choice_letter(q.correct_answer, json.loads(q.options)),
+            "Correct Answer (Choice)": get_choice_letter(q.correct_answer, q.options),
             "Evaluation": (
-                    "Unattempted" if not r.answer else
-                    "Correct" if r.answer.strip().lower() == (q.correct_answer or "").strip().lower()
+                    "Unattempted" if not answer else
+                    "Correct" if is_correct
                     else "Wrong"
                 ),
             "Marks Awarded": (
-                    q.positive_marks if r.answer and r.answer.strip().lower() == (q.correct_answer or "").strip().lower()
-                    else -q.negative_marks if r.answer
+                    q.positive_marks if is_correct
+                    else -q.negative_marks if answer
                     else 0
                 ),
             "Positive Marks": q.positive_marks,
@@ -0,0 +1,180 @@
+"""
+Server-side section deadlines.
+
+A section's deadline is `section_started_at + section_duration_minutes`. `ResumeSectionAPIView`
+still enforces it when the candidate's client calls in late. `python manage.py
+run_section_timer` also enforces it for clients that never call back. The worker keeps
+a DeadlineHeap of open sessions' current-section deadlines. It reads them once at start,
+then only sessions whose section started since the last refresh. It pops whatever falls
+due in batches and hands them to `advance_session`, the same step the resume view uses.
+Completions, and the report job queued for each, therefore happen when the deadlines
+pass, instead of arriving together when clients reconnect.
+
+Expiry waits SECTION_TIMER_GRACE_SECONDS past the deadline so that autosaves still in
+flight, and write-behind buffers in the web processes, land before the section closes.
+Moving on is a versioned transition (CandidateTestSession.transition), so the worker and
+a resuming client cannot both advance the same session.
+"""
+import heapq
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils import timezone
+
+from proctoring.utils import live_events, state
+from ..models import CandidateTestSession, SectionStatus
+from . import answer_buffer
+from .compiled_test import get_compiled_test
+from .report_jobs import enqueue_report_job
+
+
+DEFAULT_SECTION_MINUTES = 30
+
+
+def section_deadline(started_at, duration_minutes):
+    return started_at + timedelta(minutes=duration_minutes or DEFAULT_SECTION_MINUTES)
+
+
+def grace():
+    seconds = getattr(settings, "SECTION_TIMER_GRACE_SECONDS", 10)
+    if answer_buffer.write_behind_enabled():
+        seconds += getattr(settings, "ANSWER_FLUSH_INTERVAL_SECONDS", 2)
+    return timedelta(seconds=seconds)
+
+
+def advance_session(session, section_status, now=None):
+    """
+    Close the session's current section (auto-submitting it at its deadline unless the
+    candidate submitted it) and move on to the next section, or complete the attempt after
+    the last one. `session` needs assignment__test and current_section loaded.
+
+    Returns the SectionStatus the session is now in, or None once the attempt is complete.
+    When another process advanced the session first, reports where it ended up instead.
+    """
+    now = now or timezone.now()
+    assignment = session.assignment
+    section = session.current_section
+    answer_buffer.flush_session(assignment.candidate_id, assignment.test_id, session.attempt_number)
+
+    if not section_status.is_completed and not section_status.auto_submitted:
+        submitted_at = section_deadline(section_status.started_at, section.section_duration_minutes)
+        if SectionStatus.objects.filter(id=section_status.id, is_completed=False, auto_submitted=False).update(
+            auto_submitted=True, submitted_at=submitted_at
+        ):
+            print("⏳ Auto-submitted section due to time expiry:", session.id, section.id)
+            live_events.publish(assignment.test_id, "section_submitted", {
+                "assignment_id": session.assignment_id,
+                "section_id": section.id,
+                "auto_submitted": True,
+            })
+        section_status.auto_submitted, section_status.submitted_at = True, submitted_at
+
+    compiled = get_compiled_test(assignment.test)
+    next_id = next((section_id for section_id, _, _, _ in compiled.sections if section_id > section.id), None)
+    if next_id is None:
+        print("✅ No more sections remaining. Completing session:", session.id)
+        if state.complete_attempt(session, completed_at=now, test_id=assignment.test_id):
+            enqueue_report_job(assignment.candidate_id, assignment.test_id, session.attempt_number)
+        return None
+
+    if not session.transition(current_section_id=next_id, section_started_at=now):
+        session.refresh_from_db(fields=["completed", "current_section", "section_started_at", "version"])
+        if session.completed or not session.current_section_id:
+            return None
+        next_id, now = session.current_section_id, session.section_started_at or now
+    else:
+        # no report job here: running totals are kept per answer (score_state.py), the
+        # report is built once when the attempt completes
+        print(f"➡️ Session {session.id} moved on to section {next_id}")
+
+    status, _ = SectionStatus.objects.get_or_create(session=session, section_id=next_id, defaults={"started_at": now})
+    return status
+
+
+class DeadlineHeap:
+    """Min-heap of (deadline, session_id, section_id, section_started_at) for open sessions."""
+
+    def __init__(self):
+        self._heap = []
+        self._queued = {}  # session_id -> (section_id, section_started_at) last pushed
+        self._watermark = None
+
+    def __len__(self):
+        return len(self._heap)
+
+    def push(self, session_id, section_id, started_at, duration_minutes):
+        if self._queued.get(session_id) == (section_id, started_at):
+            return
+        self._queued[session_id] = (section_id, started_at)
+        deadline = section_deadline(started_at, duration_minutes)
+        heapq.heappush(self._heap, (deadline, session_id, section_id, started_at))
+
+    def refresh(self, now=None):
+        """Load sessions whose current section started since the last refresh (all at first)."""
+        now = now or timezone.now()
+        sessions = CandidateTestSession.objects.filter(completed=False, section_started_at__isnull=False)
+        if self._watermark is not None:
+            # overlap a little: rows committed late can carry an older started_at
+            sessions = sessions.filter(section_started_at__gte=self._watermark - timedelta(minutes=1))
+        loaded = 0
+        for session_id, section_id, started_at, duration in sessions.exclude(current_section=None).values_list(
+            "id", "current_section_id", "section_started_at", "current_section__section_duration_minutes"
+        ).iterator(chunk_size=2000):
+            self.push(session_id, section_id, started_at, duration)
+            loaded += 1
+        self._watermark = now
+        return loaded
+
+    def next_deadline(self):
+        return self._heap[0][0] if self._heap else None
+
+    def pop_due(self, now, limit):
+        """Up to `limit` entries whose deadline plus grace has passed."""
+        cutoff = now - grace()
+        due = []
+        while self._heap and len(due) < limit and self._heap[0][0] <= cutoff:
+            entry = heapq.heappop(self._heap)
+            if self._queued.get(entry[1]) == (entry[2], entry[3]):
+                del self._queued[entry[1]]
+                due.append(entry)
+        return due
+
+
+def expire_due(heap, now=None, limit=100):
+    """
+    Advance the sessions whose deadlines have passed; returns (advanced, completed).
+    Entries whose session has moved on since they were queued are dropped.
+    """
+    now = now or timezone.now()
+    due = heap.pop_due(now, limit)
+    if not due:
+        return 0, 0
+
+    sessions = {
+        s.id: s for s in CandidateTestSession.objects.filter(
+            id__in={entry[1] for entry in due}, completed=False
+        ).select_related("assignment__test", "current_section")
+    }
+    statuses = {
+        (s.session_id, s.section_id): s for s in SectionStatus.objects.filter(session_id__in=list(sessions))
+    }
+    advanced = completed = 0
+    for deadline, session_id, section_id, started_at in due:
+        session = sessions.get(session_id)
+        if session is None or session.current_section_id != section_id or session.section_started_at != started_at:
+            continue  # completed, or the candidate moved on before the deadline
+        status = statuses.get((session_id, section_id))
+        if status is None:
+            status = SectionStatus.objects.create(session=session, section_id=section_id, started_at=started_at)
+        next_status = advance_session(session, status, now)
+        if next_status is None:
+            completed += 1
+        else:
+            advanced += 1
+            minutes = next(
+                (m for sid, _, _, m in get_compiled_test(session.assignment.test).sections
+                 if sid == next_status.section_id),
+                None,
+            )
+            heap.push(session_id, next_status.section_id, session.section_started_at, minutes)
+    return advanced, completed
@@ -0,0 +1,109 @@
+"""
+Starting a CandidateTestSession (StartSessionAPIView).
+
+`start_session` runs as one transaction with the TestAssignment row locked
+(select_for_update), so concurrent starts of the same assignment queue up instead of
+racing for an attempt number. In that transaction it checks the validity window and the
+attempt limit, allocates the next attempt, and creates the session already pointing at
+the first section. It then adds the section's SectionStatus, the score state rows, the
+question order and the proctoring state, using a fixed number of statements whatever
+the size of the test.
+
+A start request may carry an idempotency key (the `Idempotency-Key` header). A retry
+with the same key returns the session the first request created, and costs one indexed
+read.
+"""
+from django.db import IntegrityError, transaction
+from django.db.models import Count, Max
+from django.utils import timezone
+
+from proctoring.utils import state
+from ..models import CandidateTestSession, SectionStatus, TestAssignment
+from .compiled_test import get_compiled_test
+from .question_order import materialize_question_order
+from .score_state import seed_score_state
+
+
+def refusal(assignment, attempts_used, now):
+    """The 403 payload when `assignment` cannot be started at `now`, else None."""
+    if assignment.valid_from and now < assignment.valid_from:
+        return {
+            "error": "Test not yet available",
+            "status": "not_yet_open",
+            "valid_from": assignment.valid_from,
+        }
+    if assignment.valid_to and now > assignment.valid_to:
+        return {
+            "error": "Test window has closed",
+            "status": "window_expired",
+            "valid_to": assignment.valid_to,
+        }
+    if attempts_used >= assignment.max_attempts:
+        return {
+            "error": "Maximum attempts reached",
+            "status": "max_attempts_exceeded",
+            "attempts_used": attempts_used,
+            "max_attempts": assignment.max_attempts,
+        }
+    return None
+
+
+def _by_key(assignment_id, idempotency_key):
+    return CandidateTestSession.objects.filter(
+        assignment_id=assignment_id, idempotency_key=idempotency_key
+    ).first()
+
+
+def start_session(assignment_id, idempotency_key=None, now=None):
+    """
+    (session, created, refusal). `created` is False when `idempotency_key` matched an
+    earlier start; `refusal` is the 403 payload and then `session` is None.
+    """
+    now = now or timezone.now()
+    idempotency_key = idempotency_key or None
+    if idempotency_key:
+        session = _by_key(assignment_id, idempotency_key)
+        if session:
+            return session, False, None
+
+    try:
+        with transaction.atomic():
+            assignment = TestAssignment.objects.select_for_update().select_related("test").get(id=assignment_id)
+            if idempotency_key:
+                # a concurrent request with the same key may have won the lock
+                session = _by_key(assignment_id, idempotency_key)
+                if session:
+                    return session, False, None
+
+            attempts = CandidateTestSession.objects.filter(assignment=assignment).aggregate(
+                used=Count("id"), last=Max("attempt_number")
+            )
+            refused = refusal(assignment, attempts["used"], now)
+            if refused:
+                return None, False, refused
+
+            compiled = get_compiled_test(assignment.test)
+            first_section_id = compiled.sections[0][0] if compiled.sections else None
+            session = CandidateTestSession.objects.create(
+                assignment=assignment,
+                attempt_number=(attempts["last"] or 0) + 1,
+                started_at=now,
+                current_section_id=first_section_id,
+                section_started_at=now if first_section_id else None,
+                score_state_version=compiled.version[0],
+                idempotency_key=idempotency_key,
+            )
+            if first_section_id:
+                SectionStatus.objects.create(session=session, section_id=first_section_id, started_at=now)
+            seed_score_state(session, compiled)
+            materialize_question_order(session, compiled)
+            state.start_attempt(assignment.id, session.attempt_number, now)
+    except IntegrityError:
+        # Backends without row locks (SQLite) let a same-key twin through to the INSERT
+        session = _by_key(assignment_id, idempotency_key) if idempotency_key else None
+        if session is None:
+            raise
+        return session, False, None
+
+    print("🔍 Started session:", session.id, "attempt", session.attempt_number)
+    return session, True, None
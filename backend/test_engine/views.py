@@ -6,11 +6,18 @@ from rest_framework.response import Response as DRFResponse
 from django.shortcuts import get_object_or_404
 from django.db import transaction
 from django.utils import timezone
-from datetime import timedelta
-from random import shuffle
 import json
-from test_engine.utils.scoring import calculate_score_for_candidate, serialize_score_report, generate_score_report_excel
-from proctoring.models import ProctoringHeartbeat
+import os
+from django.conf import settings
+from assessments.db_routers import reporting_reads
+from test_engine.utils.report_jobs import enqueue_report_job
+from test_engine.utils.responses import save_responses_bulk
+from test_engine.utils.compiled_test import get_compiled_test
+from test_engine.utils.question_order import get_section_payload
+from test_engine.utils.sessions import start_session
+from test_engine.utils.section_timer import advance_session, section_deadline
+from test_engine.utils import answer_buffer
+from proctoring.utils import live_events, state
 
 
 
@@ -18,14 +25,13 @@ from .models import (
     Test, Question, Candidate, TestQuestionSet,
     Response as CandidateResponse, ScoreReport, CandidateTestSession,
     TestSectionConfig, TestAssignment, SectionStatus,
-    CandidateSectionQuestionOrder, ArchivedResponse
+    ReportJob
 )
 from .serializers import (
-    TestSerializer, QuestionSerializer, CandidateSerializer,
+    TestSerializer, CandidateSerializer,
     ResponseSerializer, ScoreReportSerializer, TestDetailSerializer,
     PerQuestionResponseSerializer, QuestionPublicSerializer
 )
-from test_engine.utils.scoring import calculate_score_for_candidate, serialize_score_report
 
 
 # -----------------------------
@@ -62,49 +68,18 @@ class SavePerQuestionResponseAPIView(APIView):
         if not all([candidate_id, test_id, attempt_number, question_id]):
             return Response({"error": "Missing required fields"}, status=400)
 
-        question = get_object_or_404(Question, id=question_id)
+        payload = {
+            "question": question_id,
+            "answer": answer,
+            "marked_for_review": marked_for_review,
+            "time_spent": time_spent,
+        }
 
-        raw_answer = answer
-        if question.question_type == "MCQ" and answer in ["A", "B", "C", "D"]:
-            try:
-                options_list = json.loads(question.options)
-                raw_answer = options_list["ABCD".index(answer)]
-            except Exception as e:
-                raw_answer = answer  # fallback in case parsing fails
+        if answer_buffer.write_behind_enabled():
+            answer_buffer.buffer_response(candidate_id, test_id, attempt_number, payload)
+            return Response({"status": "buffered"}, status=200)
 
-        old_response = CandidateResponse.objects.filter(
-            candidate_id=candidate_id,
-            question_id=question_id,
-            test_id=test_id,
-            attempt_number=attempt_number
-        ).first()
-
-        if old_response:
-            ArchivedResponse.objects.create(
-                candidate_id=candidate_id,
-                question_id=question_id,
-                test_id=test_id,
-                answer=old_response.answer,
-                time_spent=old_response.time_spent,
-                marked_for_review=old_response.marked_for_review,
-                revisit_count=old_response.revisit_count,
-                answered_at=old_response.answered_at,
-                attempt_number=attempt_number,
-                archived_at=timezone.now()
-            )
-
-        CandidateResponse.objects.update_or_create(
-            candidate_id=candidate_id,
-            question_id=question_id,
-            test_id=test_id,
-            attempt_number=attempt_number,
-            defaults={
-                "answer": raw_answer,
-                "marked_for_review": marked_for_review,
-                "time_spent": time_spent,
-                "answered_at": timezone.now(),
-            },
-        )
+        save_responses_bulk(candidate_id, test_id, attempt_number, [payload])
 
         return Response({"status": "saved"}, status=200)
 
@@ -152,64 +127,26 @@ class SaveBulkResponsesAPIView(APIView):
                         "error": "Section already completed. No further submissions allowed."
                     }, status=400)
 
-            # ✅ Save responses
-            for r in responses:
-                question_id = r.get("question")
-                answer = r.get("answer")
-                time_spent = r.get("time_spent", 0)
-                marked_for_review = r.get("marked_for_review", False)
-
-                question = get_object_or_404(Question, id=question_id)
-
-                raw_answer = answer
-                if question.question_type == "MCQ" and answer in ["A", "B", "C", "D"]:
-                    try:
-                        options_list = json.loads(question.options)
-                        raw_answer = options_list["ABCD".index(answer)]
-                    except Exception:
-                        raw_answer = answer
-
-                old_response = CandidateResponse.objects.filter(
-                    candidate_id=candidate_id,
-                    question_id=question_id,
-                    test_id=test_id,
-                    attempt_number=attempt_number
-                ).first()
-
-                if old_response:
-                    ArchivedResponse.objects.create(
-                        candidate_id=candidate_id,
-                        question_id=question_id,
-                        test_id=test_id,
-                        answer=old_response.answer,
-                        time_spent=old_response.time_spent,
-                        marked_for_review=old_response.marked_for_review,
-                        revisit_count=old_response.revisit_count,
-                        answered_at=old_response.answered_at,
-                        attempt_number=attempt_number,
-                        archived_at=timezone.now()
-                    )
-
-                CandidateResponse.objects.update_or_create(
-                    candidate_id=candidate_id,
-                    question_id=question_id,
-                    test_id=test_id,
-                    attempt_number=attempt_number,
-                    defaults={
-                        "answer": raw_answer,
-                        "marked_for_review": marked_for_review,
-                        "time_spent": time_spent,
-                        "answered_at": timezone.now(),
-                    },
-                )
+            # ✅ Save responses (one read per table, one archive insert, one upsert)
+            # Buffered autosaves are older than this payload, so they go first.
+            answer_buffer.flush_session(candidate_id, test_id, attempt_number)
+            save_responses_bulk(candidate_id, test_id, attempt_number, responses)
 
             # ✅ Mark section complete if requested
             if section_complete and section_id:
-                section_status.is_completed = True
-                section_status.auto_submitted = auto
-                section_status.submitted_at = timezone.now()
-                section_status.save()
+                # Conditional: of two concurrent submits of this section only one gets here
+                if not SectionStatus.objects.filter(id=section_status.id, is_completed=False).update(
+                    is_completed=True, auto_submitted=auto, submitted_at=timezone.now()
+                ):
+                    return Response({
+                        "error": "Section already completed. No further submissions allowed."
+                    }, status=400)
                 print("✅ SectionStatus marked complete.")
+                live_events.publish(test_id, "section_submitted", {
+                    "assignment_id": session.assignment_id,
+                    "section_id": section_id,
+                    "auto_submitted": auto,
+                })
 
                 # ✅ Check if all sections complete → complete the test
                 all_sections = list(
@@ -221,31 +158,8 @@ class SaveBulkResponsesAPIView(APIView):
 
                 if set(all_sections) == set(completed_sections):
                     print("🎉 All sections completed. Test is now complete.")
-                    session.completed = True
-                    session.test_completed_at = timezone.now()
-                    print("📌 DEBUG — session.test_completed_at just set to:", session.test_completed_at)
-                    session.save(update_fields=["completed", "test_completed_at"])
-
-                    try:
-                        heartbeat, _ = ProctoringHeartbeat.objects.get_or_create(assignment=session.assignment)
-                        heartbeat.mark_completed()
-                        heartbeat.mark_completed()
-
-                        print("📌 DEBUG — heartbeat will receive:", session.test_completed_at)
-                        heartbeat.test_completed_at = session.test_completed_at
-                        heartbeat.save(update_fields=["candidate_status", "test_completed_at"])
-                    except Exception as e:
-                        print("❌ Failed to update heartbeat from SaveBulkResponsesAPIView:", e)
-
-                    test = Test.objects.get(id=test_id)
-                    candidate = Candidate.objects.get(id=candidate_id)
-                    try:
-                        result = calculate_score_for_candidate(test, candidate, attempt_number)
-                        report_data = serialize_score_report(result["report"],
-                                                             section_summary=result["section_summary"])
-                        generate_score_report_excel(candidate, test, attempt_number, report_data)
-                    except Exception as e:
-                        print("⚠️ Failed to generate score report:", e)
+                    if state.complete_attempt(session, test_id=test_id):
+                        enqueue_report_job(candidate_id, test_id, attempt_number)
 
                     return Response({"status": "completed"})
 
@@ -280,29 +194,12 @@ class SubmitTestAPIView(APIView):
             attempt_number=attempt_number,
         )
 
-        session.completed = True
-        session.test_completed_at = timezone.now()
-        session.save(update_fields=["completed", "test_completed_at"])
-
-        test = Test.objects.get(id=test_id)
-        candidate = Candidate.objects.get(id=candidate_id)
-
-        try:
-            result = calculate_score_for_candidate(test, candidate, attempt_number)
-            report_data = serialize_score_report(result["report"], section_summary=result["section_summary"])
-            generate_score_report_excel(candidate, test, attempt_number, report_data)
-        except Exception as e:
-            print("⚠️ Failed to generate score report:", e)
+        answer_buffer.flush_session(candidate_id, test_id, attempt_number)
 
-        try:
-            heartbeat, _ = ProctoringHeartbeat.objects.get_or_create(assignment=session.assignment)
-            heartbeat.mark_completed()
-            heartbeat.test_completed_at = session.test_completed_at
-            heartbeat.save(update_fields=["candidate_status", "test_completed_at"])
-            print("✅ SubmitTestAPIView called with:", candidate_id, test_id, attempt_number)
-
-        except Exception as e:
-            print("❌ Failed to update heartbeat:", e)
+        # Only the request that completes the attempt queues scoring; repeats are no-ops
+        if state.complete_attempt(session, test_id=test_id):
+            enqueue_report_job(candidate_id, test_id, attempt_number)
+        print("✅ SubmitTestAPIView called with:", candidate_id, test_id, attempt_number)
 
         return Response({"status": "submitted"}, status=200)
 
@@ -323,34 +220,16 @@ class AutoSubmitAPIView(APIView):
             attempt_number=attempt_number,
         )
 
-        session.completed = True
-        session.test_completed_at = timezone.now()
-        session.save(update_fields=["completed", "test_completed_at"])
+        answer_buffer.flush_session(candidate_id, test_id, attempt_number)
 
-        SectionStatus.objects.filter(
-            session=session,
-            section=session.current_section
-        ).update(auto_submitted=True, submitted_at=timezone.now())
-
-        test = Test.objects.get(id=test_id)
-        candidate = Candidate.objects.get(id=candidate_id)
-
-        try:
-            result = calculate_score_for_candidate(test, candidate, attempt_number)
-            report_data = serialize_score_report(result["report"], section_summary=result["section_summary"])
-            generate_score_report_excel(candidate, test, attempt_number, report_data)
-        except Exception as e:
-            print("⚠️ Failed to generate score report:", e)
+        if state.complete_attempt(session, test_id=test_id):
+            SectionStatus.objects.filter(
+                session=session,
+                section=session.current_section
+            ).update(auto_submitted=True, submitted_at=timezone.now())
 
-        try:
-            heartbeat, _ = ProctoringHeartbeat.objects.get_or_create(assignment=session.assignment)
-            heartbeat.mark_completed()
-            heartbeat.test_completed_at = session.test_completed_at
-            heartbeat.save(update_fields=["candidate_status", "test_completed_at"])
-            print("✅ AutoSubmitAPIView updated heartbeat for:", candidate_id, test_id, attempt_number)
-
-        except Exception as e:
-            print("❌ Failed to update heartbeat in AutoSubmit:", e)
+            enqueue_report_job(candidate_id, test_id, attempt_number)
+        print("✅ AutoSubmitAPIView completed:", candidate_id, test_id, attempt_number)
 
         return Response({"status": "auto-submitted"}, status=200)
 
@@ -367,78 +246,27 @@ class StartSessionAPIView(APIView):
 
         # Verify assignment
         assignment = get_object_or_404(
-            TestAssignment,
+            TestAssignment.objects.select_related("test"),
             candidate_id=candidate_id,
             test_id=test_id
         )
 
-        # Create session
-        attempt_number = CandidateTestSession.objects.filter(assignment=assignment).count() + 1
-        session = CandidateTestSession.objects.create(
-            assignment=assignment,
-            attempt_number=attempt_number,
-            started_at=timezone.now()
-        )
-
-        print("🔍 Created session:", session.id, session.assignment_id)
-
-        # Check validity window
-        now = timezone.now()
-        if assignment.valid_from and now < assignment.valid_from:
-            return Response({
-                "error": "Test not yet available",
-                "status": "not_yet_open",
-                "valid_from": assignment.valid_from
-            }, status=403)
-
-        if assignment.valid_to and now > assignment.valid_to:
-            return Response({
-                "error": "Test window has closed",
-                "status": "window_expired",
-                "valid_to": assignment.valid_to
-            }, status=403)
-
-        # Check attempts
-        existing_attempts = CandidateTestSession.objects.filter(assignment=assignment).count()
-        if existing_attempts >= assignment.max_attempts:
-            return Response({
-                "error": "Maximum attempts reached",
-                "status": "max_attempts_exceeded",
-                "attempts_used": existing_attempts,
-                "max_attempts": assignment.max_attempts
-            }, status=403)
-
-        # Create session
-        attempt_number = existing_attempts + 1
-        session = CandidateTestSession.objects.create(
-            assignment=assignment,
-            attempt_number=attempt_number,
-            started_at=now,
-        )
-        # Update ProctoringHeartbeat to reflect test start
-        heartbeat, _ = ProctoringHeartbeat.objects.get_or_create(assignment=assignment)
-        heartbeat.mark_started()
-
-        # Set first section
-        first_section = TestSectionConfig.objects.filter(test=assignment.test).order_by("id").first()
-        if first_section:
-            session.current_section = first_section
-            session.section_started_at = now
-            session.save()
-
-            SectionStatus.objects.get_or_create(
-                session=session,
-                section=first_section,
-                defaults={"started_at": now}
-            )
+        # Lock, validate, allocate and seed in one transaction (test_engine/utils/sessions.py)
+        idempotency_key = request.headers.get("Idempotency-Key") or request.data.get("idempotency_key")
+        session, created, refused = start_session(assignment.id, idempotency_key)
+        if refused:
+            return Response(refused, status=403)
+        if not created:
+            print("🔁 Replayed start for session:", session.id)
 
+        section_names = {section_id: name for section_id, _, name, _ in get_compiled_test(assignment.test).sections}
         return Response({
             "session_id": session.id,
             "candidate": candidate_id,
             "test": assignment.test.name,
-            "attempt_number": attempt_number,
-            "section_id": first_section.id if first_section else None,
-            "section_name": first_section.category.name if first_section else None,
+            "attempt_number": session.attempt_number,
+            "section_id": session.current_section_id,
+            "section_name": section_names.get(session.current_section_id),
             "section_start_time": session.section_started_at,
         }, status=200)
 
@@ -454,7 +282,7 @@ class ResumeSectionAPIView(APIView):
 
         try:
             session = CandidateTestSession.objects.select_related(
-                "assignment__candidate", "assignment__test", "current_section"
+                "assignment__candidate", "assignment__test", "current_section__category"
             ).get(
                 assignment__candidate_id=candidate_id,
                 assignment__test_id=test_id,
@@ -479,8 +307,7 @@ class ResumeSectionAPIView(APIView):
             defaults={"started_at": timezone.now()}
         )
 
-        section_duration = current_section.section_duration_minutes or 30
-        section_end_time = section_status.started_at + timedelta(minutes=section_duration)
+        section_end_time = section_deadline(section_status.started_at, current_section.section_duration_minutes)
         now = timezone.now()
 
         print("🛠️ --- Section Resume Diagnostics ---")
@@ -490,7 +317,7 @@ class ResumeSectionAPIView(APIView):
         print(f"📘 Section ID           : {current_section.id}")
         print(f"📘 Section Name         : {current_section.category.name}")
         print(f"✅ is_completed         : {section_status.is_completed}")
-        print(f"⏱️  Duration (minutes)  : {section_duration}")
+        print(f"⏱️  Duration (minutes)  : {current_section.section_duration_minutes}")
         print(f"🕒 Now                  : {now}")
         print(f"🕓 Started At           : {section_status.started_at}")
         print(f"🕚 Section End Time     : {section_end_time}")
@@ -498,103 +325,18 @@ class ResumeSectionAPIView(APIView):
         print("🛠️ -----------------------------------")
 
         # 🔁 Progress to next section if manually completed OR timed out
+        # (run_section_timer does the same for clients that never come back)
         if section_status.is_completed or now > section_end_time:
             print("🔄 Section considered complete. Proceeding to check next section.")
-
-            if not section_status.is_completed:
-                print("⏳ Auto-submitting section due to time expiry.")
-                section_status.auto_submitted = True
-                section_status.submitted_at = section_end_time
-                section_status.save()
-
-            next_section = (
-                session.assignment.test.sections
-                .filter(id__gt=current_section.id)
-                .order_by("id")
-                .first()
-            )
-
-            if next_section:
-                print(f"➡️ Found next section: {next_section.id} - {next_section.category.name}")
-                session.current_section = next_section
-                session.section_started_at = now
-                session.save()
-                try:
-                    test = session.assignment.test
-                    candidate = session.assignment.candidate
-                    result = calculate_score_for_candidate(test, candidate, session.attempt_number)
-                    report_data = serialize_score_report(result["report"], section_summary=result["section_summary"])
-                    generate_score_report_excel(candidate, test, session.attempt_number, report_data)
-                except Exception as e:
-                    print("⚠️ Failed to generate score report at test completion:", e)
-
-                section_status, _ = SectionStatus.objects.get_or_create(
-                    session=session,
-                    section=next_section,
-                    defaults={"started_at": now}
-                )
-
-                current_section = next_section
-                section_end_time = section_status.started_at + timedelta(
-                    minutes=current_section.section_duration_minutes or 1
-                )
-
-            else:
-                print("✅ No more sections remaining. Marking session as completed.")
-                session.completed = True
-                session.test_completed_at = timezone.now()
-                session.save(update_fields=["completed", "test_completed_at"])
-                try:
-                    heartbeat, _ = ProctoringHeartbeat.objects.get_or_create(assignment=session.assignment)
-                    heartbeat.mark_completed()
-                    heartbeat.test_completed_at = session.test_completed_at
-                    heartbeat.save(update_fields=["candidate_status", "test_completed_at"])
-                    print("✅ Heartbeat updated from ResumeSectionAPIView")
-                except Exception as e:
-                    print("❌ Failed to update heartbeat from ResumeSectionAPIView:", e)
-                try:
-                    test = session.assignment.test
-                    candidate = session.assignment.candidate
-                    result = calculate_score_for_candidate(test, candidate, session.attempt_number)
-                    report_data = serialize_score_report(result["report"], section_summary=result["section_summary"])
-                    generate_score_report_excel(candidate, test, session.attempt_number, report_data)
-                except Exception as e:
-                    print("⚠️ Failed to generate score report at test completion:", e)
-
+            section_status = advance_session(session, section_status, now)
+            if section_status is None:
                 return Response({"status": "completed"}, status=200)
 
-        # 🗂️ Get questions for the current section
-        existing_orders = CandidateSectionQuestionOrder.objects.filter(
-            session=session,
-            section=current_section
-        ).order_by("display_order")
-
-        if existing_orders.exists():
-            questions = [entry.question for entry in existing_orders]
-            print("📋 Found existing question order entries.")
-        else:
-            print("📋 No existing order. Generating fresh question list.")
-            question_ids = (
-                TestQuestionSet.objects
-                .filter(test=session.assignment.test, question__category=current_section.category)
-                .order_by("order")
-                .values_list("question_id", flat=True)
-            )
-
-            questions = list(Question.objects.filter(id__in=question_ids))
-            print(f"[DEBUG] Questions before shuffle: {[q.id for q in questions]}")
+            current_section = TestSectionConfig.objects.select_related("category").get(id=section_status.section_id)
+            section_end_time = section_deadline(section_status.started_at, current_section.section_duration_minutes)
 
-            shuffle(questions)  # can be removed if strict order needed
-
-            for index, q in enumerate(questions):
-                CandidateSectionQuestionOrder.objects.get_or_create(
-                    session=session,
-                    section=current_section,
-                    question=q,
-                    defaults={"display_order": index}
-                )
-
-        serialized_questions = QuestionSerializer(questions, many=True).data
+        # 🗂️ Get questions for the current section (order materialized at session start)
+        serialized_questions = get_section_payload(session, current_section)
         print(f"[DEBUG] Questions after shuffle (serialized): {[q['id'] for q in serialized_questions]}")
 
         return Response({
@@ -664,16 +406,64 @@ class ScoreReportByEmailAPIView(APIView):
         email = request.query_params.get("email")
         test_id = request.query_params.get("test_id")
 
-        candidate = get_object_or_404(Candidate, email=email)
-        report = get_object_or_404(ScoreReport, candidate=candidate, test_id=test_id)
+        reports = ScoreReport.objects.filter(candidate__email=email, test_id=test_id).order_by("-attempt_number")
+        with reporting_reads():
+            report = reports.first()
+            data = ScoreReportSerializer(report).data if report else None
+        if report is None:
+            # a report generated moments ago may not have reached the replica yet
+            report = reports.first()
+            if report is None:
+                return DRFResponse({"detail": "No ScoreReport matches the given query."}, status=404)
+            data = ScoreReportSerializer(report).data
 
         return DRFResponse({
-            "report": ScoreReportSerializer(report).data
+            "report": data
         })
 
 
 
 
+class ReportJobStatusAPIView(APIView):
+    def get(self, request):
+        candidate_id = request.query_params.get("candidate")
+        test_id = request.query_params.get("test")
+        attempt_number = request.query_params.get("attempt_number", 1)
+        email = request.query_params.get("email")
+
+        if not candidate_id or not test_id:
+            return Response({"error": "Missing candidate or test ID"}, status=400)
+
+        jobs = ReportJob.objects.all()
+        if not request.user.is_staff:
+            # candidates identify themselves by email, as for their score report
+            if not email:
+                return Response({"error": "Missing email"}, status=400)
+            jobs = jobs.filter(candidate__email=email)
+
+        job = get_object_or_404(
+            jobs,
+            candidate_id=candidate_id,
+            test_id=test_id,
+            attempt_number=attempt_number,
+        )
+
+        report_url = None
+        if job.report_path:
+            rel_path = os.path.relpath(job.report_path, settings.MEDIA_ROOT)
+            report_url = request.build_absolute_uri(settings.MEDIA_URL + rel_path.replace("\\", "/"))
+
+        return Response({
+            "status": job.status,
+            "attempts": job.attempts,
+            "max_attempts": job.max_attempts,
+            "queued_at": job.created_at,
+            "updated_at": job.updated_at,
+            "last_error": job.last_error.strip().splitlines()[-1] if job.last_error else "",
+            "report_url": report_url,
+        }, status=200)
+
+
 # ----------To Validate Candidate Test Assignment
 class VerifySecretsAPIView(APIView):
     def post(self, request):
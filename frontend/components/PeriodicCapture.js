@@ -140,7 +140,7 @@ export default function PeriodicCapture({
             formData.append("image", file);
 
             try {
-              const res = await fetch(`${API_BASE_URL}/api/proctoring/upload-photo/`, {
+              const res = await fetch(`${API_BASE_URL}/api/proctoring/upload-photo/?assignment_id=${assignmentId}`, {
                 method: "POST",
                 body: formData,
               });
@@ -186,7 +186,7 @@ export default function PeriodicCapture({
             formData.append("image", file);
 
             try {
-              const res = await fetch(`${API_BASE_URL}/api/proctoring/upload-photo/`, {
+              const res = await fetch(`${API_BASE_URL}/api/proctoring/upload-photo/?assignment_id=${assignmentId}`, {
                 method: "POST",
                 body: formData,
               });
@@ -149,10 +149,18 @@ export default function StartSessionPage() {
     }
 
 
+    // Double-clicks and retries of this start reuse the key and get the same session back
+    const startKeyName = `startSessionKey_${selectedTest.test_id}`;
+    let startKey = sessionStorage.getItem(startKeyName);
+    if (!startKey) {
+      startKey = crypto.randomUUID();
+      sessionStorage.setItem(startKeyName, startKey);
+    }
+
     const res = await fetch(`${API_BASE_URL}/api/start-session/`, {
       method: "POST",
       headers: { "Content-Type": "application/json" },
-      body: JSON.stringify({ candidate: candidateId, test: selectedTest.test_id }),
+      body: JSON.stringify({ candidate: candidateId, test: selectedTest.test_id, idempotency_key: startKey }),
     });
 
     const data = await res.json();
@@ -160,6 +168,7 @@ export default function StartSessionPage() {
       alert(data?.error || "Could not start session");
       return;
     }
+    sessionStorage.removeItem(startKeyName);
 
     localStorage.setItem("sessionData", JSON.stringify({
       candidate_id: candidateId,
@@ -85,7 +85,7 @@ export default function ProctoringSetup() {
     formData.append("context", "initial");
     if (subtype) formData.append("id_document_type", subtype);
 
-    const res = await fetch(`${API_BASE_URL}/api/proctoring/upload-photo/`, {
+    const res = await fetch(`${API_BASE_URL}/api/proctoring/upload-photo/?assignment_id=${assignment_id}`, {
       method: "POST",
       body: formData,
     });
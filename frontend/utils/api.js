@@ -1,41 +1,66 @@
 export const API_BASE_URL =
   process.env.NEXT_PUBLIC_API_BASE_URL || 'http://localhost:8000';
 
-export async function logViolation(type, metadata = {}, severity = 1) {
+// Violations are queued and sent together; the backend merges repeats of the same
+// type within the same window (VIOLATION_MERGE_WINDOW_SECONDS in settings.py).
+const VIOLATION_MERGE_WINDOW_MS = 2000;
+let violationQueue = [];
+let violationTimer = null;
+
+async function flushViolations() {
+  violationTimer = null;
   const assignment_id = sessionStorage.getItem("assignment_id");
-  if (!assignment_id) {
-    console.warn("⚠️ assignment_id not found in sessionStorage.");
-    return;
-  }
+  const events = violationQueue;
+  violationQueue = [];
+  if (!assignment_id || events.length === 0) return;
 
   try {
-    const res = await fetch(`${API_BASE_URL}/api/proctoring/log-violation/`, {
+    const res = await fetch(`${API_BASE_URL}/api/proctoring/log-violations/`, {
       method: "POST",
+      keepalive: true,
       headers: {
         "Content-Type": "application/json",
       },
       body: JSON.stringify({
         assignment_id: parseInt(assignment_id),
-        type,
-        severity,
-        metadata,
+        events,
       }),
     });
 
     if (!res.ok) {
       const errData = await res.json();
-      console.warn("❌ Failed to log violation:", errData);
+      console.warn("❌ Failed to log violations:", errData);
     } else {
-      console.log(`📌 Violation '${type}' logged`);
-
-      // 🚨 Dispatch local event so PeriodicCapture can react
-      window.dispatchEvent(
-        new CustomEvent("proctoringViolation", {
-          detail: { type, severity, timestamp: new Date() },
-        })
-      );
+      console.log(`📌 ${events.length} violation(s) logged`);
     }
   } catch (err) {
-    console.error("🚨 Error logging violation:", err);
+    console.error("🚨 Error logging violations:", err);
   }
 }
+
+if (typeof window !== "undefined") {
+  window.addEventListener("pagehide", () => {
+    if (violationQueue.length) flushViolations();
+  });
+}
+
+export async function logViolation(type, metadata = {}, severity = 1) {
+  const assignment_id = sessionStorage.getItem("assignment_id");
+  if (!assignment_id) {
+    console.warn("⚠️ assignment_id not found in sessionStorage.");
+    return;
+  }
+
+  const timestamp = new Date();
+  violationQueue.push({ type, severity, metadata, timestamp: timestamp.getTime() });
+  if (!violationTimer) {
+    violationTimer = setTimeout(flushViolations, VIOLATION_MERGE_WINDOW_MS);
+  }
+
+  // 🚨 Dispatch local event so PeriodicCapture can react
+  window.dispatchEvent(
+    new CustomEvent("proctoringViolation", {
+      detail: { type, severity, timestamp },
+    })
+  );
+}